@@ -0,0 +1,162 @@
+# --------------------------------------------------------------------------------
+# SPDX-FileCopyrightText: 2026 Martin Jan Köhler
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+# SPDX-License-Identifier: GPL-3.0-or-later
+#--------------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import queue
+import threading
+import traceback
+from typing import *
+
+from klayout_plugin_utils.debugging import debug, Debugging
+from klayout_plugin_utils.event_loop import EventLoop
+
+
+"""
+Background worker for blocking calls (file system access on NFS/SMB, etc.)
+
+Usage example
+-------------
+    worker = BackgroundWorker.shared()
+    worker.submit(lambda: Path(p).exists(),
+                  on_result=lambda exists: widget.set_valid(exists),
+                  on_timeout=lambda: widget.set_valid(False),
+                  timeout_ms=2000)
+
+The submitted callable runs on a daemon thread and must not touch any pya objects.
+All callbacks are invoked on the main thread (via EventLoop).
+"""
+
+
+class BackgroundTask:
+    """Handle of a job submitted to a BackgroundWorker."""
+
+    def __init__(self,
+                 fn: Callable[[], Any],
+                 on_result: Optional[Callable[[Any], None]],
+                 on_error: Optional[Callable[[Exception], None]],
+                 on_timeout: Optional[Callable[[], None]]):
+        self.fn = fn
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_timeout = on_timeout
+        self._cancelled = False
+        self._finished = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def cancel(self):
+        """No callbacks will be invoked after cancellation (the job itself may still run)."""
+        self._cancelled = True
+
+    # NOTE: main thread only, called exactly once per task (result, error or timeout),
+    #       whatever comes later is dropped
+    def _finish(self, callback: Optional[Callable], *args):
+        if self._finished:
+            return
+        self._finished = True
+        EventLoop.release_thread_bridge()
+        if self._cancelled or callback is None:
+            return
+        callback(*args)
+
+
+class BackgroundWorker:
+    """
+    Small pool of daemon threads.
+
+    NOTE: daemon threads are used on purpose, a thread stuck in a syscall
+          on a dead network mount must not block KLayout from quitting.
+          Python threads can't be interrupted, so a timeout only means
+          the result is abandoned, the thread stays busy until the syscall returns.
+    """
+
+    _shared: Optional[BackgroundWorker] = None
+
+    def __init__(self, name: str, max_workers: int = 4):
+        self.name = name
+        self.max_workers = max_workers
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._idle = 0
+
+    @classmethod
+    def shared(cls) -> BackgroundWorker:
+        if cls._shared is None:
+            cls._shared = BackgroundWorker(name='klayout_plugin_utils')
+        return cls._shared
+
+    def submit(self,
+               fn: Callable[[], Any],
+               on_result: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None,
+               on_timeout: Optional[Callable[[], None]] = None,
+               timeout_ms: Optional[int] = None) -> BackgroundTask:
+        """
+        Main thread only: run fn on a worker thread.
+
+        Exactly one of on_result, on_error or on_timeout is called on the main thread.
+        """
+        task = BackgroundTask(fn=fn, on_result=on_result, on_error=on_error, on_timeout=on_timeout)
+        EventLoop.retain_thread_bridge()
+        if timeout_ms is not None:
+            EventLoop.defer(lambda: task._finish(task.on_timeout), delay_ms=timeout_ms)
+        self._queue.put(task)
+        self._ensure_thread()
+        return task
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._idle > 0 or len(self._threads) >= self.max_workers:
+                return
+            t = threading.Thread(target=self._run,
+                                 name=f"{self.name}-worker-{len(self._threads)}",
+                                 daemon=True)
+            self._threads.append(t)
+        t.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                self._idle += 1
+            task = self._queue.get()
+            with self._lock:
+                self._idle -= 1
+
+            if task._finished or task._cancelled:
+                # timed out while waiting in the queue, still let the main thread drop it
+                EventLoop.post_from_thread(lambda t=task: t._finish(None))
+                continue
+
+            try:
+                result = task.fn()
+            except Exception as e:
+                if Debugging.DEBUG:
+                    debug(f"BackgroundWorker {self.name}: job failed with {e}")
+                    traceback.print_exc()
+                EventLoop.post_from_thread(lambda t=task, e=e: t._finish(t.on_error, e))
+                continue
+
+            EventLoop.post_from_thread(lambda t=task, r=result: t._finish(t.on_result, r))
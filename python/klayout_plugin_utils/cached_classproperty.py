@@ -31,8 +31,9 @@ class cached_classproperty(Generic[T]):
         self._cache_name = f"_{name}_cache"
 
     def __get__(self, instance: Optional[Any], owner: Type[Any]) -> T:
-        if hasattr(owner, self._cache_name):
-            return getattr(owner, self._cache_name)
+        # NOTE: look only at the owner itself, a cache of a base class must not leak into subclasses
+        if self._cache_name in owner.__dict__:
+            return owner.__dict__[self._cache_name]
         value = self.func(owner)
         setattr(owner, self._cache_name, value)
         return value
@@ -0,0 +1,308 @@
+# --------------------------------------------------------------------------------
+# SPDX-FileCopyrightText: 2026 Martin Jan Köhler
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+# SPDX-License-Identifier: GPL-3.0-or-later
+#--------------------------------------------------------------------------------
+
+from __future__ import annotations
+
+from typing import *
+import unittest
+
+import pya
+
+from klayout_plugin_utils.event_loop import EventLoop
+
+
+"""
+Central cache for KLayout configuration values.
+
+Usage example
+-------------
+    enabled = ConfigCache.get_bool('developer.enable_debug_logging')
+    grid_um = ConfigCache.get_float('grid-micron')
+
+    ConfigCache.set('my_plugin.lru', value)   # written behind, batched per event loop cycle
+
+    ConfigCache.add_observer('grid-micron', lambda key, value: ...)
+
+Reads are served from Python dicts, only the first read of a key crosses into KLayout.
+Changes made through KLayout (setup dialog, other plugins calling set_config)
+are picked up through the configure() callback of a PluginFactory.
+
+NOTE: main thread only
+"""
+
+
+class _ConfigCachePluginFactory(pya.PluginFactory):
+    """Registered only to receive configuration change callbacks."""
+
+    def __init__(self):
+        super().__init__()
+        self.has_tool_entry = False
+        self.register(-1000, 'klayout_plugin_utils_config_cache', 'Config Cache')
+
+    def configure(self, name: str, value: str) -> bool:
+        ConfigCache._on_configure(name, value)
+        return False  # never consume, other plugins must see the change as well
+
+
+class ConfigCache:
+    _raw: Dict[str, Optional[str]] = {}
+    _parsed: Dict[Tuple[str, Callable], Any] = {}
+    _observers: Dict[str, List[Callable[[str, Optional[str]], None]]] = {}
+    _pending_writes: Dict[str, str] = {}
+    _flush_scheduled = False
+    _plugin_factory: Optional[_ConfigCachePluginFactory] = None
+
+    # ------------------------------------------------------------------
+    # Setup
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def install_hooks(cls):
+        if cls._plugin_factory is not None:
+            return
+        cls._plugin_factory = _ConfigCachePluginFactory()
+
+    @staticmethod
+    def _config_root():
+        return pya.Application.instance()
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def get(cls, key: str) -> Optional[str]:
+        try:
+            return cls._raw[key]
+        except KeyError:
+            pass
+        cls.install_hooks()
+        value = cls._config_root().get_config(key)
+        cls._raw[key] = value
+        return value
+
+    @classmethod
+    def get_parsed(cls, key: str, parser: Callable[[Optional[str]], Any]) -> Any:
+        """
+        Parsed value, cached until the raw value changes.
+        NOTE: pass the same parser object (not a new lambda) each time, it is part of the cache key.
+        """
+        cache_key = (key, parser)
+        try:
+            return cls._parsed[cache_key]
+        except KeyError:
+            pass
+        value = parser(cls.get(key))
+        cls._parsed[cache_key] = value
+        return value
+
+    @classmethod
+    def get_bool(cls, key: str) -> bool:
+        return cls.get_parsed(key, _parse_bool)
+
+    @classmethod
+    def get_float(cls, key: str) -> Optional[float]:
+        return cls.get_parsed(key, _parse_float)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def set(cls, key: str, value: Any, write_behind: bool = True):
+        """
+        Update the cache immediately, the write to KLayout is batched
+        and happens on the next event loop cycle (unless write_behind is False).
+        """
+        value = str(value)
+        cls._update(key, value)
+        cls._pending_writes[key] = value
+        if not write_behind:
+            cls.flush()
+            return
+        if not cls._flush_scheduled:
+            cls._flush_scheduled = True
+            EventLoop.defer(cls.flush)
+
+    @classmethod
+    def flush(cls):
+        cls._flush_scheduled = False
+        if not cls._pending_writes:
+            return
+        pending = cls._pending_writes
+        cls._pending_writes = {}
+        root = cls._config_root()
+        for key, value in pending.items():
+            root.set_config(key, value)
+        root.commit_config()
+
+    # ------------------------------------------------------------------
+    # Invalidation & observers
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def invalidate(cls, key: Optional[str] = None):
+        if key is None:
+            cls._raw.clear()
+            cls._parsed.clear()
+            return
+        cls._raw.pop(key, None)
+        for cache_key in [k for k in cls._parsed if k[0] == key]:
+            del cls._parsed[cache_key]
+
+    @classmethod
+    def add_observer(cls, key: str, callback: Callable[[str, Optional[str]], None]):
+        cls.install_hooks()
+        cls._observers.setdefault(key, []).append(callback)
+
+    @classmethod
+    def remove_observer(cls, key: str, callback: Callable[[str, Optional[str]], None]):
+        observers = cls._observers.get(key, [])
+        if callback in observers:
+            observers.remove(callback)
+
+    @classmethod
+    def _update(cls, key: str, value: Optional[str]):
+        if key in cls._raw and cls._raw[key] == value:
+            return
+        cls.invalidate(key)
+        cls._raw[key] = value
+        for callback in list(cls._observers.get(key, [])):
+            callback(key, value)
+
+    @classmethod
+    def _on_configure(cls, name: str, value: str):
+        if name in cls._pending_writes:
+            return  # our own newer value is about to be written
+        if name in cls._raw or name in cls._observers:
+            cls._update(name, value)
+
+
+def _parse_bool(value: Optional[str]) -> bool:
+    return value == 'true'
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+#--------------------------------------------------------------------------------
+
+class _FakeConfigRoot:
+    def __init__(self, config: Dict[str, str]):
+        self.config = dict(config)
+        self.reads: List[str] = []
+        self.writes: List[Tuple[str, str]] = []
+        self.commits = 0
+    
+    def get_config(self, key: str) -> Optional[str]:
+        self.reads.append(key)
+        return self.config.get(key, None)
+    
+    def set_config(self, key: str, value: str):
+        self.writes.append((key, value))
+        self.config[key] = value
+    
+    def commit_config(self):
+        self.commits += 1
+
+
+class ConfigCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.root = _FakeConfigRoot({'grid-micron': '0.005', 'my_plugin.enabled': 'true'})
+        self.deferred: List[Callable] = []
+        self._saved = (ConfigCache.__dict__['_config_root'], EventLoop.__dict__['defer'])
+        ConfigCache._config_root = staticmethod(lambda: self.root)
+        EventLoop.defer = classmethod(lambda cls, callable, delay_ms=0: self.deferred.append(callable))
+        ConfigCache.install_hooks()
+        self._reset()
+    
+    def tearDown(self):
+        ConfigCache._config_root, EventLoop.defer = self._saved
+        self._reset()
+    
+    @staticmethod
+    def _reset():
+        ConfigCache._raw = {}
+        ConfigCache._parsed = {}
+        ConfigCache._observers = {}
+        ConfigCache._pending_writes = {}
+        ConfigCache._flush_scheduled = False
+    
+    def test_reads_are_cached(self):
+        self.assertEqual(0.005, ConfigCache.get_float('grid-micron'))
+        self.assertEqual(0.005, ConfigCache.get_float('grid-micron'))
+        self.assertTrue(ConfigCache.get_bool('my_plugin.enabled'))
+        self.assertIsNone(ConfigCache.get('missing'))
+        self.assertIsNone(ConfigCache.get('missing'))
+        self.assertEqual(['grid-micron', 'my_plugin.enabled', 'missing'], self.root.reads)
+    
+    def test_write_behind(self):
+        ConfigCache.set('my_plugin.lru', 'a')
+        ConfigCache.set('my_plugin.lru', 'b')
+        ConfigCache.set('my_plugin.other', 1)
+        self.assertEqual('b', ConfigCache.get('my_plugin.lru'))  # visible before the write
+        self.assertEqual([], self.root.writes)
+        self.assertEqual(1, len(self.deferred))  # one flush per event loop cycle
+        
+        self.deferred.pop()()
+        self.assertEqual([('my_plugin.lru', 'b'), ('my_plugin.other', '1')], self.root.writes)
+        self.assertEqual(1, self.root.commits)
+        
+        ConfigCache.set('my_plugin.lru', 'c')
+        self.assertEqual(1, len(self.deferred))  # scheduled again after the flush
+    
+    def test_write_through(self):
+        ConfigCache.set('my_plugin.lru', 'a', write_behind=False)
+        self.assertEqual([('my_plugin.lru', 'a')], self.root.writes)
+        self.assertEqual([], self.deferred)
+    
+    def test_observers(self):
+        calls = []
+        observer = lambda key, value: calls.append((key, value))
+        ConfigCache.add_observer('grid-micron', observer)
+        ConfigCache.set('grid-micron', '0.01')
+        ConfigCache.set('grid-micron', '0.01')  # unchanged, no notification
+        ConfigCache.flush()
+        ConfigCache._plugin_factory.configure('grid-micron', '0.02')  # e.g. from the setup dialog
+        ConfigCache.remove_observer('grid-micron', observer)
+        ConfigCache.set('grid-micron', '0.03')
+        self.assertEqual([('grid-micron', '0.01'), ('grid-micron', '0.02')], calls)
+    
+    def test_configure_refreshes_cache(self):
+        self.assertEqual(0.005, ConfigCache.get_float('grid-micron'))
+        self.assertFalse(ConfigCache._plugin_factory.configure('grid-micron', '0.01'))  # not consumed
+        self.assertEqual(0.01, ConfigCache.get_float('grid-micron'))
+        self.assertEqual(['grid-micron'], self.root.reads)  # refreshed without reading again
+        
+        ConfigCache._plugin_factory.configure('not_cached', 'x')
+        self.assertNotIn('not_cached', ConfigCache._raw)
+    
+    def test_configure_does_not_override_pending_write(self):
+        ConfigCache.set('grid-micron', '0.01')
+        ConfigCache._plugin_factory.configure('grid-micron', '0.005')  # older value, e.g. from another plugin
+        self.assertEqual(0.01, ConfigCache.get_float('grid-micron'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,6 +20,8 @@ from datetime import datetime
 import os
 import pya
 
+from klayout_plugin_utils.config_cache import ConfigCache
+
 
 # NOTE: always add an additional guard `if debugging.DEBUG: debug(f"...")` at each call site,
 #       otherwise the eager f-string eager evaluation can be costly,
@@ -51,9 +53,7 @@ class Debugging:
     
     @staticmethod
     def debug_logging_enabled() -> bool:
-        mw = pya.MainWindow.instance()
-        enable_debug_logging = mw.get_config(Debugging.CONFIG_KEY__ENABLE_DEBUG_LOGGING)
-        return enable_debug_logging == 'true'
+        return ConfigCache.get_bool(Debugging.CONFIG_KEY__ENABLE_DEBUG_LOGGING)
     
     @staticmethod
     def install_developer_menu():
@@ -62,7 +62,7 @@ class Debugging:
         def toggle_debug_logging(action: pya.Action):
             Debugging.DEBUG = action.checked
             print(f"toggle debug logging: {Debugging.DEBUG}")
-            mw.set_config(Debugging.CONFIG_KEY__ENABLE_DEBUG_LOGGING, 'true' if Debugging.DEBUG else 'false')
+            ConfigCache.set(Debugging.CONFIG_KEY__ENABLE_DEBUG_LOGGING, 'true' if Debugging.DEBUG else 'false')
         
         menu = mw.menu()
         action = pya.Action()
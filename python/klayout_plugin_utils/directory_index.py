@@ -0,0 +1,218 @@
+# --------------------------------------------------------------------------------
+# SPDX-FileCopyrightText: 2026 Martin Jan Köhler
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+# SPDX-License-Identifier: GPL-3.0-or-later
+#--------------------------------------------------------------------------------
+
+#--------------------------------------------------------------------------------
+# Per-directory listing cache used for path completion:
+#    - directories are scanned lazily with os.scandir, one at a time
+#    - listings are invalidated by the directory mtime
+#    - files are filtered by Qt file dialog patterns, e.g. "GDSII (*.gds *.gds.gz)"
+#    - prefix queries are answered with bisect on a sorted key list
+#
+# NOTE: refresh() does blocking syscalls, call it from a background thread,
+#       cached() and the listing queries never touch the file system
+#--------------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import bisect
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import fnmatch
+import os
+import re
+import sys
+import threading
+from typing import *
+import unittest
+
+
+@dataclass(frozen=True)
+class DirectoryEntry:
+    name: str
+    is_dir: bool
+
+
+@dataclass
+class DirectoryListing:
+    directory: str
+    mtime_ns: int
+    case_sensitive: bool = True
+    entries: List[DirectoryEntry] = field(default_factory=list)  # sorted by key
+    keys: List[str] = field(default_factory=list)
+
+    def with_prefix(self, prefix: str, limit: Optional[int] = None) -> List[DirectoryEntry]:
+        key = prefix if self.case_sensitive else prefix.casefold()
+        start = bisect.bisect_left(self.keys, key)
+        result = []
+        for i in range(start, len(self.keys)):
+            if not self.keys[i].startswith(key):
+                break
+            result.append(self.entries[i])
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+
+def patterns_from_file_types(file_types: List[str]) -> Optional[List[str]]:
+    """
+    Extract glob patterns from Qt file dialog filters,
+    e.g. ["GDSII Files (*.gds *.gds.gz)", "All Files (*.*)"].
+
+    Returns None if any filter accepts all files.
+    """
+    patterns = []
+    for ft in file_types:
+        m = re.search(r'\(([^)]*)\)', ft)
+        globs = m.group(1).split() if m else ft.split()
+        for g in globs:
+            if g in ('*', '*.*'):
+                return None
+            patterns.append(g)
+    return patterns or None
+
+
+class DirectoryIndex:
+    def __init__(self,
+                 patterns: Optional[List[str]] = None,
+                 case_sensitive: Optional[bool] = None,
+                 max_directories: int = 64):
+        if case_sensitive is None:
+            case_sensitive = not (sys.platform.startswith('win') or sys.platform == 'darwin')
+        self.case_sensitive = case_sensitive
+        self.max_directories = max_directories
+        if patterns:
+            flags = 0 if case_sensitive else re.IGNORECASE
+            self._file_regex = re.compile('|'.join(fnmatch.translate(p) for p in patterns), flags)
+        else:
+            self._file_regex = None
+        self._lock = threading.Lock()
+        self._listings: OrderedDict[str, DirectoryListing] = OrderedDict()
+
+    def cached(self, directory: str) -> Optional[DirectoryListing]:
+        with self._lock:
+            listing = self._listings.get(directory, None)
+            if listing is not None:
+                self._listings.move_to_end(directory)
+            return listing
+
+    def invalidate(self, directory: Optional[str] = None):
+        with self._lock:
+            if directory is None:
+                self._listings.clear()
+            else:
+                self._listings.pop(directory, None)
+
+    def refresh(self, directory: str) -> Optional[DirectoryListing]:
+        """
+        Blocking: rescan directory if its mtime changed since the last scan.
+        Returns None if the directory is not accessible.
+        """
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            self.invalidate(directory)
+            return None
+
+        listing = self.cached(directory)
+        if listing is not None and listing.mtime_ns == mtime_ns:
+            return listing
+
+        try:
+            listing = self._scan(directory, mtime_ns)
+        except OSError:
+            self.invalidate(directory)
+            return None
+
+        with self._lock:
+            self._listings[directory] = listing
+            self._listings.move_to_end(directory)
+            while len(self._listings) > self.max_directories:
+                self._listings.popitem(last=False)
+        return listing
+
+    def _scan(self, directory: str, mtime_ns: int) -> DirectoryListing:
+        file_regex = self._file_regex
+        pairs = []
+        with os.scandir(directory) as it:
+            for e in it:
+                try:
+                    is_dir = e.is_dir()
+                except OSError:
+                    continue
+                if not is_dir and file_regex is not None and not file_regex.match(e.name):
+                    continue
+                key = e.name if self.case_sensitive else e.name.casefold()
+                pairs.append((key, DirectoryEntry(name=e.name, is_dir=is_dir)))
+        pairs.sort(key=lambda p: p[0])
+        return DirectoryListing(directory=directory,
+                                mtime_ns=mtime_ns,
+                                case_sensitive=self.case_sensitive,
+                                entries=[p[1] for p in pairs],
+                                keys=[p[0] for p in pairs])
+
+
+#--------------------------------------------------------------------------------
+
+class DirectoryIndexTests(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = self._tmp.name
+        for name in ('top.gds', 'top.gds.gz', 'tile_a.oas', 'notes.txt'):
+            open(os.path.join(self.dir, name), 'w').close()
+        os.mkdir(os.path.join(self.dir, 'tiles'))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_patterns_from_file_types(self):
+        self.assertEqual(['*.gds', '*.gds.gz'], patterns_from_file_types(['GDSII (*.gds *.gds.gz)']))
+        self.assertEqual(None, patterns_from_file_types(['GDSII (*.gds)', 'All Files (*.*)']))
+
+    def test_refresh_filters_files_but_keeps_directories(self):
+        index = DirectoryIndex(patterns=['*.gds', '*.gds.gz'], case_sensitive=True)
+        listing = index.refresh(self.dir)
+        self.assertEqual(['tiles', 'top.gds', 'top.gds.gz'], [e.name for e in listing.entries])
+        self.assertTrue(listing.entries[0].is_dir)
+
+    def test_with_prefix(self):
+        index = DirectoryIndex(case_sensitive=True)
+        listing = index.refresh(self.dir)
+        self.assertEqual(['tile_a.oas', 'tiles'], [e.name for e in listing.with_prefix('til')])
+        self.assertEqual(['tile_a.oas'], [e.name for e in listing.with_prefix('til', limit=1)])
+        self.assertEqual([], listing.with_prefix('x'))
+
+    def test_cache_invalidated_by_mtime(self):
+        index = DirectoryIndex(case_sensitive=True)
+        first = index.refresh(self.dir)
+        self.assertIs(first, index.refresh(self.dir))
+        self.assertIs(first, index.cached(self.dir))
+
+        open(os.path.join(self.dir, 'new.gds'), 'w').close()
+        os.utime(self.dir, ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+        second = index.refresh(self.dir)
+        self.assertIsNot(first, second)
+        self.assertIn('new.gds', [e.name for e in second.entries])
+
+    def test_missing_directory(self):
+        index = DirectoryIndex()
+        self.assertIsNone(index.refresh(os.path.join(self.dir, 'does_not_exist')))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -113,9 +113,9 @@ class EditorOptions:
         elif name == 'edit-snap-objects-to-grid':
             self._edit_snap_objects_to_grid = value == 'true'
         elif name == 'edit-connect-angle-mode':
-            self._edit_connect_angle_mode = AngleMode(value)
+            self._edit_connect_angle_mode = AngleMode.from_value(value)
         elif name == 'edit-move-angle-mode':
-            self._edit_move_angle_mode = AngleMode(value)
+            self._edit_move_angle_mode = AngleMode.from_value(value)
         if Debugging.DEBUG:
             debug(f"Plugin reconfigured: EditorOptions are now {self.__dict__}")
 
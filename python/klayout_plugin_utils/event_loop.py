@@ -17,6 +17,7 @@
 #--------------------------------------------------------------------------------
 
 import pya
+import queue
 import traceback
 import weakref
 from typing import *
@@ -24,8 +25,16 @@ from typing import *
 class EventLoop:
     _active_timers = weakref.WeakSet()  # track active timers safely
 
+    # NOTE: pya objects (including QTimer) must only be touched from the main thread,
+    #       background threads therefore hand over their callables through a queue,
+    #       which is drained by a repeating timer on the main thread (the "thread bridge")
+    THREAD_BRIDGE_INTERVAL_MS = 20
+    _thread_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _thread_bridge_timer: Optional['pya.QTimer'] = None  # NOTE: quoted, pya may lack Qt bindings (standalone klayout module)
+    _thread_bridge_users: int = 0
+
     @classmethod
-    def defer(cls, callable: Callable):
+    def defer(cls, callable: Callable, delay_ms: int = 0):
         # NOTE: if we directly call the Editor Options menu action
         #       the GUI immediately will switch back to the Librariew view
         #       so we enqueue it into the event loop
@@ -50,4 +59,62 @@ class EventLoop:
         
         timer.timeout = on_timeout
         cls._active_timers.add(timer)
-        timer.start(0)
+        timer.start(delay_ms)
+
+    @classmethod
+    def post_from_thread(cls, callable: Callable):
+        """
+        Thread-safe: enqueue callable to be run on the main thread.
+        
+        Only delivered while the thread bridge is retained (see retain_thread_bridge()),
+        otherwise it is kept in the queue until the bridge is retained again.
+        """
+        cls._thread_queue.put(callable)
+
+    @classmethod
+    def retain_thread_bridge(cls):
+        """
+        Main thread only: start draining callables posted by background threads.
+        Each call must be balanced by release_thread_bridge().
+        """
+        cls._thread_bridge_users += 1
+        if cls._thread_bridge_timer is not None:
+            return
+        
+        mw = pya.Application.instance().main_window()
+        timer = pya.QTimer(mw)
+        timer.setSingleShot(False)
+        timer.timeout = cls._drain_thread_queue
+        cls._thread_bridge_timer = timer
+        timer.start(cls.THREAD_BRIDGE_INTERVAL_MS)
+    
+    @classmethod
+    def release_thread_bridge(cls):
+        """
+        Main thread only: counterpart of retain_thread_bridge().
+        The bridge timer stops itself once there are no users and the queue is empty.
+        """
+        cls._thread_bridge_users = max(0, cls._thread_bridge_users - 1)
+    
+    @classmethod
+    def _drain_thread_queue(cls):
+        while True:
+            try:
+                callable = cls._thread_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callable()
+            except Exception as e:
+                print("EventLoop._drain_thread_queue() caught an exception", e)
+                traceback.print_exc()
+        
+        if cls._thread_bridge_users == 0 and cls._thread_queue.empty():
+            timer = cls._thread_bridge_timer
+            cls._thread_bridge_timer = None
+            if timer is not None:
+                timer.stop()
+                try:
+                    timer._destroy()
+                except RuntimeError:
+                    pass  # already deleted by Qt
@@ -16,16 +16,37 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 #--------------------------------------------------------------------------------
 
+import os
 from pathlib import Path
 import sys
+import time
 from typing import *
 
 import pya
 
+from klayout_plugin_utils.background_worker import BackgroundTask, BackgroundWorker
+from klayout_plugin_utils.directory_index import DirectoryIndex, DirectoryListing, patterns_from_file_types
 from klayout_plugin_utils.event_loop import EventLoop
 from klayout_plugin_utils.file_system_helpers import FileSystemHelpers
 
 
+# NOTE: async path validators run on a background thread and must not touch any pya objects,
+#       they get the entered path and return None if it is valid, otherwise an error message
+PathValidator = Callable[[str], Optional[str]]
+
+
+def path_exists_validator(path: str) -> Optional[str]:
+    if not os.path.exists(os.path.expanduser(path)):
+        return f"Path does not exist: {path}"
+    return None
+
+
+def path_is_file_validator(path: str) -> Optional[str]:
+    if not os.path.isfile(os.path.expanduser(path)):
+        return f"Not a file: {path}"
+    return None
+
+
 class FileSelectorWidget(pya.QWidget):
     def __init__(self, 
                  parent: pya.QWidget,
@@ -38,6 +59,7 @@ class FileSelectorWidget(pya.QWidget):
         
         self.editable = editable
         self.file_dialog_title = file_dialog_title
+        self.file_types = file_types
         self.file_type_filter = ';;'.join(file_types)
         self.path_transformer = path_transformer
         
@@ -74,6 +96,40 @@ class FileSelectorWidget(pya.QWidget):
 
         self.line_edit.editingFinished.connect(self.emit_path_changed)
         self.line_edit.returnPressed.connect(self.emit_path_changed)
+        
+        # NOTE: synchronous validator, gets called with this widget
+        self.validator: Optional[Callable[[FileSelectorWidget], None]] = None
+        
+        # NOTE: asynchronous validators (see PathValidator), evaluated in order on a background thread,
+        #       debounced while typing and cached per path for a short time
+        self.async_validators: List[PathValidator] = []
+        self.validation_debounce_ms = 300
+        self.validation_timeout_ms = 2000
+        self.validation_cache_ttl_s = 5.0
+        
+        # NOTE: here widget users can register callback for async validation results,
+        #       called with this widget and the error message (None if valid)
+        self.on_validation_finished: List[Callable[[FileSelectorWidget, Optional[str]], None]] = []
+        
+        self._validation_cache: Dict[str, Tuple[float, Optional[str]]] = {}
+        self._validation_task: Optional[BackgroundTask] = None
+        self._validation_timer = pya.QTimer(self)
+        self._validation_timer.setSingleShot(True)
+        self._validation_timer.timeout = self.validate_async
+        self.line_edit.textChanged.connect(self._on_text_changed)
+        
+        # NOTE: path completion, directory listings are indexed on a background thread,
+        #       QCompleter only gets the (capped) prefix matches of the current directory
+        self.completion_limit = 500
+        self.completer: Optional[pya.QCompleter] = None
+        self._directory_index = DirectoryIndex(patterns=patterns_from_file_types(file_types))
+        self._directory_refresh_in_flight: Set[str] = set()
+        if editable:
+            self._completion_model = pya.QStringListModel(self)
+            self.completer = pya.QCompleter(self._completion_model, self)
+            self.completer.setCaseSensitivity(pya.Qt.CaseSensitive if self._directory_index.case_sensitive 
+                                              else pya.Qt.CaseInsensitive)
+            self.line_edit.setCompleter(self.completer)
     
     @property
     def path(self) -> str:
@@ -123,14 +179,132 @@ class FileSelectorWidget(pya.QWidget):
             self.action_btn.icon = pya.QIcon()
 
     def validate(self):
-        if self.validator is None:
-            return
-        self.validator(self)
+        if self.validator is not None:
+            self.validator(self)
+        if self.async_validators:
+            self.validate_async()
 
     def set_valid(self, valid: bool):
         color = 'white' if valid else '#FFCCCC'
         self.line_edit.setStyleSheet(f"background-color: {color};")
 
+    def _on_text_changed(self, text: str):
+        if self.completer is not None:
+            self._update_completions(text)
+        if not self.async_validators:
+            return
+        # restart the debounce timer, validation only starts once the user pauses typing
+        self._validation_timer.start(self.validation_debounce_ms)
+
+    @staticmethod
+    def _split_completion_text(text: str) -> Tuple[str, str, str]:
+        """
+        Split entered text into (typed directory part, expanded directory, file name prefix)
+        """
+        seps = '/\\' if sys.platform.startswith('win') else '/'
+        cut = max(text.rfind(c) for c in seps) + 1
+        typed_dir = text[:cut]
+        prefix = text[cut:]
+        directory = os.path.expandvars(os.path.expanduser(typed_dir)) if typed_dir else ''
+        return typed_dir, directory, prefix
+
+    def _update_completions(self, text: str):
+        typed_dir, directory, prefix = self._split_completion_text(text)
+        if directory == '':
+            return
+        
+        listing = self._directory_index.cached(directory)
+        if listing is not None:
+            self._show_completions(typed_dir, prefix, listing)
+        
+        # NOTE: even for cached listings, the mtime check is done in the background,
+        #       as a stat on a remote file system may block as well
+        if directory in self._directory_refresh_in_flight:
+            return
+        self._directory_refresh_in_flight.add(directory)
+        
+        def on_done(listing: Optional[DirectoryListing] = None):
+            self._directory_refresh_in_flight.discard(directory)
+            if listing is None:
+                return
+            current_typed_dir, current_directory, current_prefix = self._split_completion_text(self.path)
+            if current_directory == directory:
+                self._show_completions(current_typed_dir, current_prefix, listing)
+        
+        BackgroundWorker.shared().submit(lambda: self._directory_index.refresh(directory),
+                                         on_result=on_done,
+                                         on_error=lambda e: on_done(None),
+                                         on_timeout=on_done,
+                                         timeout_ms=self.validation_timeout_ms)
+    
+    def _show_completions(self, typed_dir: str, prefix: str, listing: DirectoryListing):
+        matches = listing.with_prefix(prefix, limit=self.completion_limit)
+        completions = [f"{typed_dir}{e.name}{os.sep if e.is_dir else ''}" for e in matches]
+        self._completion_model.setStringList(completions)
+        if completions and self.line_edit.hasFocus():
+            self.completer.complete()
+
+    def validate_async(self):
+        self._validation_timer.stop()
+        if self._validation_task is not None:
+            self._validation_task.cancel()
+            self._validation_task = None
+        
+        if not self.async_validators:
+            return
+        
+        path = self.path
+        if path == '':
+            self._apply_validation_result(path, None)
+            return
+        
+        now = time.monotonic()
+        cached = self._validation_cache.get(path, None)
+        if cached is not None and now - cached[0] < self.validation_cache_ttl_s:
+            self._apply_validation_result(path, cached[1])
+            return
+        
+        validators = list(self.async_validators)
+        
+        def run() -> Optional[str]:
+            for v in validators:
+                error = v(path)
+                if error:
+                    return error
+            return None
+        
+        def on_result(error: Optional[str]):
+            self._cache_validation_result(path, error)
+            self._apply_validation_result(path, error)
+        
+        def on_error(e: Exception):
+            self._apply_validation_result(path, f"Validation failed: {e}")
+        
+        def on_timeout():
+            self._apply_validation_result(path, f"Validation timed out after {self.validation_timeout_ms} ms")
+        
+        self._validation_task = BackgroundWorker.shared().submit(run,
+                                                                 on_result=on_result,
+                                                                 on_error=on_error,
+                                                                 on_timeout=on_timeout,
+                                                                 timeout_ms=self.validation_timeout_ms)
+    
+    def _cache_validation_result(self, path: str, error: Optional[str]):
+        now = time.monotonic()
+        if len(self._validation_cache) > 256:
+            ttl = self.validation_cache_ttl_s
+            self._validation_cache = {p: v for p, v in self._validation_cache.items() if now - v[0] < ttl}
+        self._validation_cache[path] = (now, error)
+    
+    def _apply_validation_result(self, path: str, error: Optional[str]):
+        if path != self.path:
+            return  # stale result, the user kept typing
+        self._validation_task = None
+        self.set_valid(error is None)
+        self.line_edit.setToolTip(error or '')
+        for c in self.on_validation_finished:
+            c(self, error)
+
 
 if __name__ == "__main__":
     mw = pya.MainWindow.instance()
@@ -18,22 +18,37 @@
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import os
 from pathlib import Path
+import shutil
 import subprocess
 import sys
+import threading
 from typing import *
+import unittest
 
 import pya
 
+from klayout_plugin_utils.background_worker import BackgroundTask, BackgroundWorker
+from klayout_plugin_utils.config_cache import ConfigCache
+from klayout_plugin_utils.debugging import debug, Debugging
+from klayout_plugin_utils.path_helpers import SuffixMatcher
+
 
 class FileSystemHelpers:
     CONFIG_KEY__LEAST_RECENT_DIRECTORY = 'KLayoutLibraryManager__lru_directory'
     
+    # NOTE: Linux file managers that can select (multiple) files, in order of preference
+    LINUX_FILE_MANAGERS_WITH_SELECT = ('dolphin', 'nautilus')
+    
+    _detected_file_manager: Optional[str] = None  # cached, '' if none of the above
+    
     @classmethod
     def least_recent_directory(cls) -> str:
-        mw = pya.MainWindow.instance()
-        lru_dir = mw.get_config(cls.CONFIG_KEY__LEAST_RECENT_DIRECTORY)
-        if lru_dir is None:
+        lru_dir = ConfigCache.get(cls.CONFIG_KEY__LEAST_RECENT_DIRECTORY)
+        if not lru_dir:
             return ''
         lru_path = Path(lru_dir)
         if not lru_path.exists():
@@ -43,26 +58,285 @@ class FileSystemHelpers:
     @classmethod
     def set_least_recent_directory(cls, path: str | Path):
         path = Path(path)
-        mw = pya.MainWindow.instance()
-        mw.set_config(cls.CONFIG_KEY__LEAST_RECENT_DIRECTORY, path)
+        ConfigCache.set(cls.CONFIG_KEY__LEAST_RECENT_DIRECTORY, str(path))
+
+    @classmethod
+    def detected_file_manager(cls) -> str:
+        """
+        Linux only: name of the available file manager supporting selection, or '' for xdg-open.
+        Detection happens once per session.
+        """
+        if cls._detected_file_manager is None:
+            cls._detected_file_manager = ''
+            for fm in cls.LINUX_FILE_MANAGERS_WITH_SELECT:
+                if shutil.which(fm):
+                    cls._detected_file_manager = fm
+                    break
+        return cls._detected_file_manager
+
+    @classmethod
+    def _launch_detached(cls, args: List[str]):
+        """
+        Start the process without waiting for it,
+        a daemon thread reaps it once it exits (no zombies).
+        """
+        if Debugging.DEBUG:
+            debug(f"FileSystemHelpers: launching {args}")
+        
+        kwargs = {}
+        if sys.platform.startswith("win"):
+            kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs['start_new_session'] = True
+        
+        try:
+            proc = subprocess.Popen(args,
+                                    stdin=subprocess.DEVNULL,
+                                    stdout=subprocess.DEVNULL,
+                                    stderr=subprocess.DEVNULL,
+                                    **kwargs)
+        except OSError as e:
+            print(f"FileSystemHelpers: failed to launch {args[0]}: {e}")
+            return
+        
+        threading.Thread(target=proc.wait, name=f"reap-{args[0]}", daemon=True).start()
 
     @classmethod
     def reveal_in_file_manager(cls, path: str | Path):
-        path = Path(path).resolve()
+        cls.reveal_all_in_file_manager([path])
+
+    @classmethod
+    def reveal_all_in_file_manager(cls, paths: Iterable[str | Path]):
+        """
+        Reveal (and select) the given paths, without blocking the GUI.
+        Where the file manager supports it, all paths are revealed with one call.
+        """
+        paths = list(dict.fromkeys(str(Path(p).resolve()) for p in paths))
+        if not paths:
+            return
     
         if sys.platform == "darwin":   # macOS
             # macOS Finder: open and select
-            subprocess.run(["open", "-R", str(path)])
+            cls._launch_detached(["open", "-R", *paths])
         elif sys.platform.startswith("win"):  # Windows
-            # Windows Explorer: open and select
-            subprocess.run(["explorer", "/select,", str(path)])
+            # Windows Explorer: open and select, only one file per call,
+            # so we reveal one file per folder
+            first_per_folder = {str(Path(p).parent): p for p in reversed(paths)}
+            for p in first_per_folder.values():
+                cls._launch_detached(["explorer", "/select,", p])
         else:  # Linux / BSD / Unix: try common file managers
-            # KDE Dolphin
-            try:
-                subprocess.run(["dolphin", "--select", str(path)])
+            fm = cls.detected_file_manager()
+            if fm:
+                cls._launch_detached([fm, "--select", *paths])
                 return
-            except FileNotFoundError:
-                pass
             
-            # Fallback: open the directory using default manager
-            subprocess.run(["xdg-open", str(path.parent)])
+            # Fallback: open the directories using default manager
+            for folder in dict.fromkeys(str(Path(p).parent) for p in paths):
+                cls._launch_detached(["xdg-open", folder])
+
+
+#--------------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class LayoutFileEntry:
+    path: str
+    directory: str
+    stem: str    # see path_helpers.stem_without_suffixes
+    suffix: str  # the matched allowed suffix
+
+
+@dataclass
+class _DirectoryScan:
+    mtime_ns: int
+    files: List[LayoutFileEntry] = field(default_factory=list)
+    subdirectories: List[str] = field(default_factory=list)
+
+
+class LayoutFileDiscovery:
+    """
+    In-memory index of layout files below one or more root folders.
+
+    The first refresh() walks the trees with os.scandir, later refreshes
+    only stat each known directory and re-scan those whose mtime changed.
+    Directories of one tree level are processed in parallel on a thread pool.
+
+    NOTE: refresh() is blocking, use refresh_async() from the GUI.
+    """
+
+    def __init__(self,
+                 roots: Iterable[str | Path],
+                 allowed_suffixes: Iterable[str],
+                 max_workers: int = 8,
+                 include_hidden: bool = False):
+        self.roots = [os.path.abspath(os.path.expanduser(str(r))) for r in roots]
+        self.allowed_suffixes = tuple(allowed_suffixes)
+        self._suffix_matcher = SuffixMatcher.for_suffixes(self.allowed_suffixes)
+        self.max_workers = max_workers
+        self.include_hidden = include_hidden
+        
+        self._lock = threading.Lock()
+        self._scans: Dict[str, _DirectoryScan] = {}
+        self._entries: List[LayoutFileEntry] = []
+        self._entries_by_stem: Dict[str, List[LayoutFileEntry]] = {}
+
+    # ------------------------------------------------------------------
+    # Queries (no file system access)
+    # ------------------------------------------------------------------
+
+    def entries(self) -> List[LayoutFileEntry]:
+        return self._entries
+
+    def entries_with_stem(self, stem: str) -> List[LayoutFileEntry]:
+        return self._entries_by_stem.get(stem, [])
+
+    def stems(self) -> List[str]:
+        return list(self._entries_by_stem.keys())
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+
+    def refresh(self) -> bool:
+        """
+        Blocking: bring the index up to date.
+        Returns True if anything changed since the previous refresh.
+        """
+        with self._lock:
+            old_scans = self._scans
+            new_scans: Dict[str, _DirectoryScan] = {}
+            changed = False
+            
+            frontier = [r for r in self.roots if os.path.isdir(r)]
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                while frontier:
+                    results = executor.map(lambda d: self._refresh_directory(d, old_scans.get(d, None)),
+                                           frontier)
+                    next_frontier = []
+                    for directory, (scan, rescanned) in zip(frontier, results):
+                        if scan is None:
+                            continue
+                        changed |= rescanned
+                        new_scans[directory] = scan
+                        next_frontier.extend(d for d in scan.subdirectories if d not in new_scans)
+                    frontier = next_frontier
+            
+            changed |= len(new_scans) != len(old_scans)
+            self._scans = new_scans
+            if changed:
+                self._rebuild_index()
+            
+            if Debugging.DEBUG:
+                debug(f"LayoutFileDiscovery.refresh(): {len(new_scans)} directories, "
+                      f"{len(self._entries)} layout files, changed={changed}")
+            return changed
+
+    def refresh_async(self,
+                      on_done: Optional[Callable[[bool], None]] = None,
+                      timeout_ms: Optional[int] = None) -> BackgroundTask:
+        """
+        Main thread only: refresh on the shared BackgroundWorker,
+        on_done is called on the main thread with the changed flag.
+        """
+        return BackgroundWorker.shared().submit(self.refresh,
+                                                on_result=on_done,
+                                                timeout_ms=timeout_ms)
+
+    def _refresh_directory(self,
+                           directory: str,
+                           previous: Optional[_DirectoryScan]) -> Tuple[Optional[_DirectoryScan], bool]:
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None, True
+        
+        # NOTE: a directory mtime changes when entries are added, removed or renamed,
+        #       changes deeper in the tree are caught when visiting the subdirectories
+        if previous is not None and previous.mtime_ns == mtime_ns:
+            return previous, False
+        
+        scan = _DirectoryScan(mtime_ns=mtime_ns)
+        match = self._suffix_matcher.match
+        try:
+            with os.scandir(directory) as it:
+                for e in it:
+                    name = e.name
+                    if not self.include_hidden and name.startswith('.'):
+                        continue
+                    try:
+                        if e.is_dir(follow_symlinks=False):
+                            scan.subdirectories.append(e.path)
+                            continue
+                    except OSError:
+                        continue
+                    m = match(name)
+                    if m is None:
+                        continue
+                    scan.files.append(LayoutFileEntry(path=e.path,
+                                                      directory=directory,
+                                                      stem=m[0],
+                                                      suffix=m[1]))
+        except OSError:
+            return None, True
+        return scan, True
+
+    def _rebuild_index(self):
+        entries = []
+        by_stem: Dict[str, List[LayoutFileEntry]] = {}
+        for scan in self._scans.values():
+            entries.extend(scan.files)
+            for f in scan.files:
+                by_stem.setdefault(f.stem, []).append(f)
+        self._entries = entries
+        self._entries_by_stem = by_stem
+
+
+#--------------------------------------------------------------------------------
+
+class LayoutFileDiscoveryTests(unittest.TestCase):
+    SUFFIXES = ('.gds', '.gds.gz', '.oas')
+
+    def setUp(self):
+        import tempfile
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        os.makedirs(os.path.join(self.root, 'lib', 'cells'))
+        for rel in ('top.gds', 'lib/inv.gds.gz', 'lib/cells/nand.oas', 'lib/readme.txt'):
+            open(os.path.join(self.root, rel), 'w').close()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _touch_dir(self, directory: str):
+        st = os.stat(directory)
+        os.utime(directory, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    def test_discovery(self):
+        d = LayoutFileDiscovery([self.root], self.SUFFIXES)
+        self.assertTrue(d.refresh())
+        self.assertEqual(['inv', 'nand', 'top'], sorted(e.stem for e in d.entries()))
+        self.assertEqual('.gds.gz', d.entries_with_stem('inv')[0].suffix)
+
+    def test_refresh_unchanged(self):
+        d = LayoutFileDiscovery([self.root], self.SUFFIXES)
+        d.refresh()
+        self.assertFalse(d.refresh())
+
+    def test_refresh_incremental(self):
+        d = LayoutFileDiscovery([self.root], self.SUFFIXES)
+        d.refresh()
+        cells = os.path.join(self.root, 'lib', 'cells')
+        open(os.path.join(cells, 'nor.gds'), 'w').close()
+        self._touch_dir(cells)
+        self.assertTrue(d.refresh())
+        self.assertEqual(['inv', 'nand', 'nor', 'top'], sorted(e.stem for e in d.entries()))
+
+    def test_removed_directory(self):
+        d = LayoutFileDiscovery([self.root], self.SUFFIXES)
+        d.refresh()
+        shutil.rmtree(os.path.join(self.root, 'lib'))
+        self.assertTrue(d.refresh())
+        self.assertEqual(['top'], [e.stem for e in d.entries()])
+
+
+if __name__ == "__main__":
+    unittest.main()
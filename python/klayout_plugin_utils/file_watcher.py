@@ -0,0 +1,329 @@
+# --------------------------------------------------------------------------------
+# SPDX-FileCopyrightText: 2026 Martin Jan Köhler
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+# SPDX-License-Identifier: GPL-3.0-or-later
+#--------------------------------------------------------------------------------
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import heapq
+import os
+from pathlib import Path
+import threading
+import time
+import traceback
+from typing import *
+import unittest
+
+from klayout_plugin_utils.debugging import debug, Debugging
+from klayout_plugin_utils.event_loop import EventLoop
+from klayout_plugin_utils.str_enum_compat import StrEnum
+
+
+"""
+Polling file watcher, reporting changes on the main thread.
+
+Usage example
+-------------
+    def on_changes(changes: List[FileChange]):
+        for c in changes:
+            print(c.kind, c.path)
+
+    watcher = FileWatcher(on_changes=on_changes)
+    watcher.watch([runset_path, library_path])
+    watcher.start()
+    ...
+    watcher.stop()
+"""
+
+
+class FileChangeKind(StrEnum):
+    CREATED = 'created'
+    MODIFIED = 'modified'
+    DELETED = 'deleted'
+
+
+@dataclass(frozen=True)
+class FileChange:
+    path: str
+    kind: FileChangeKind
+
+
+# (mtime_ns, size), None if the path does not exist
+_Signature = Optional[Tuple[int, int]]
+
+
+class _WatchState:
+    __slots__ = ('signature', 'interval_s', 'due', 'last_change', 'generation')
+
+    def __init__(self, signature: _Signature, interval_s: float, due: float, generation: int):
+        self.signature = signature
+        self.interval_s = interval_s
+        self.due = due
+        self.last_change = float('-inf')
+        self.generation = generation
+
+
+def merge_change_kinds(previous: FileChangeKind, new: FileChangeKind) -> Optional[FileChangeKind]:
+    """
+    Coalesce two changes of the same path, None if they cancel out.
+    """
+    if previous == FileChangeKind.CREATED:
+        return None if new == FileChangeKind.DELETED else FileChangeKind.CREATED
+    if previous == FileChangeKind.DELETED:
+        return FileChangeKind.MODIFIED if new == FileChangeKind.CREATED else FileChangeKind.DELETED
+    return new  # MODIFIED
+
+
+class FileWatcher:
+    """
+    Watches many paths by batching os.stat calls on a background thread.
+
+    Adaptive polling: a path that changed is polled every fast_interval_s,
+    idle paths back off exponentially up to slow_interval_s.
+    At most max_stats_per_tick paths are checked per tick, so the stat cost
+    stays bounded for thousands of paths (idle paths are then simply polled later).
+
+    Changes are coalesced for delivery_interval_s and delivered in one batch
+    to on_changes on the main thread.
+    """
+
+    def __init__(self,
+                 on_changes: Callable[[List[FileChange]], None],
+                 fast_interval_s: float = 0.5,
+                 slow_interval_s: float = 10.0,
+                 tick_s: float = 0.25,
+                 max_stats_per_tick: int = 256,
+                 delivery_interval_s: float = 0.5):
+        self.on_changes = on_changes
+        self.fast_interval_s = fast_interval_s
+        self.slow_interval_s = slow_interval_s
+        self.tick_s = tick_s
+        self.max_stats_per_tick = max_stats_per_tick
+        self.delivery_interval_s = delivery_interval_s
+
+        self._lock = threading.Lock()
+        self._states: Dict[str, _WatchState] = {}
+        self._schedule: List[Tuple[float, int, str]] = []  # heap of (due, generation, path)
+        self._generation = 0
+        self._pending: Dict[str, FileChangeKind] = {}
+        self._last_delivery = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Public API (main thread)
+    # ------------------------------------------------------------------
+
+    def watch(self, paths: Iterable[str | Path]):
+        """
+        NOTE: the initial stat of each path happens on the watcher thread,
+              paths created or deleted before that are not reported.
+        """
+        with self._lock:
+            for p in paths:
+                p = str(p)
+                if p in self._states:
+                    continue
+                self._generation += 1
+                due = float('-inf')  # initial stat on the next tick
+                state = _WatchState(signature=None, interval_s=self.fast_interval_s, due=due,
+                                    generation=-self._generation)  # negative: not yet initialized
+                self._states[p] = state
+                heapq.heappush(self._schedule, (due, state.generation, p))
+
+    def unwatch(self, paths: Iterable[str | Path]):
+        with self._lock:
+            for p in paths:
+                self._states.pop(str(p), None)
+                self._pending.pop(str(p), None)
+            # stale heap entries are skipped lazily
+
+    def watched_paths(self) -> List[str]:
+        with self._lock:
+            return list(self._states.keys())
+
+    def start(self):
+        if self._thread is not None:
+            return
+        EventLoop.retain_thread_bridge()
+        self._stop_event = threading.Event()  # NOTE: per thread, a stopped thread may still be sleeping
+        self._thread = threading.Thread(target=self._run, args=(self._stop_event,), 
+                                        name='FileWatcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread = None
+        EventLoop.release_thread_bridge()
+
+    # ------------------------------------------------------------------
+    # Watcher thread
+    # ------------------------------------------------------------------
+
+    def _run(self, stop_event: threading.Event):
+        while not stop_event.is_set():
+            try:
+                changes = self.poll_once(time.monotonic())
+                if changes:
+                    self._deliver(changes)
+            except Exception as e:
+                print("FileWatcher._run() caught an exception", e)
+                traceback.print_exc()
+            stop_event.wait(self.tick_s)
+
+    @staticmethod
+    def _stat_signature(path: str) -> _Signature:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def poll_once(self, now: float) -> List[FileChange]:
+        """
+        Stat the due paths (bounded by max_stats_per_tick),
+        returns the coalesced batch of changes that is due for delivery.
+        """
+        due_paths: List[Tuple[str, int]] = []
+        with self._lock:
+            while self._schedule and len(due_paths) < self.max_stats_per_tick:
+                due, generation, path = self._schedule[0]
+                if due > now:
+                    break
+                heapq.heappop(self._schedule)
+                state = self._states.get(path, None)
+                if state is None or state.generation != generation:
+                    continue  # unwatched or rescheduled
+                due_paths.append((path, generation))
+
+        # NOTE: stat outside the lock, watch()/unwatch() must never wait for the file system
+        signatures = [(path, generation, self._stat_signature(path)) for path, generation in due_paths]
+
+        with self._lock:
+            for path, generation, signature in signatures:
+                state = self._states.get(path, None)
+                if state is None or state.generation != generation:
+                    continue
+
+                if generation < 0:  # initial stat
+                    state.signature = signature
+                    state.interval_s = self.slow_interval_s
+                else:
+                    kind = None
+                    if state.signature != signature:
+                        if state.signature is None:
+                            kind = FileChangeKind.CREATED
+                        elif signature is None:
+                            kind = FileChangeKind.DELETED
+                        else:
+                            kind = FileChangeKind.MODIFIED
+
+                    if kind is None:
+                        state.interval_s = min(state.interval_s * 2, self.slow_interval_s)
+                    else:
+                        state.signature = signature
+                        state.last_change = now
+                        state.interval_s = self.fast_interval_s
+                        previous = self._pending.pop(path, None)
+                        merged = kind if previous is None else merge_change_kinds(previous, kind)
+                        if merged is not None:
+                            self._pending[path] = merged
+
+                self._generation += 1
+                state.generation = self._generation
+                state.due = now + state.interval_s
+                heapq.heappush(self._schedule, (state.due, state.generation, path))
+
+            if not self._pending or now - self._last_delivery < self.delivery_interval_s:
+                return []
+            changes = [FileChange(path=p, kind=k) for p, k in self._pending.items()]
+            self._pending = {}
+            self._last_delivery = now
+            return changes
+
+    def _deliver(self, changes: List[FileChange]):
+        if Debugging.DEBUG:
+            debug(f"FileWatcher: {len(changes)} changes")
+
+        def notify():
+            if self._thread is None:
+                return  # stopped in the meantime
+            self.on_changes(changes)
+
+        EventLoop.post_from_thread(notify)
+
+
+#--------------------------------------------------------------------------------
+
+class FileWatcherTests(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, 'runset.drc')
+        with open(self.path, 'w') as f:
+            f.write('a')
+        self.watcher = FileWatcher(on_changes=lambda changes: None,
+                                   fast_interval_s=1.0, slow_interval_s=8.0, delivery_interval_s=0.0)
+        self.watcher.watch([self.path])
+        self.watcher.poll_once(now=100.0)  # initial stat
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _bump_mtime(self):
+        st = os.stat(self.path)
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    def test_modified(self):
+        self._bump_mtime()
+        self.assertEqual([FileChange(self.path, FileChangeKind.MODIFIED)], self.watcher.poll_once(now=200.0))
+        self.assertEqual([], self.watcher.poll_once(now=300.0))
+
+    def test_deleted_and_created(self):
+        os.remove(self.path)
+        self.assertEqual([FileChange(self.path, FileChangeKind.DELETED)], self.watcher.poll_once(now=200.0))
+        open(self.path, 'w').close()
+        self.assertEqual([FileChange(self.path, FileChangeKind.CREATED)], self.watcher.poll_once(now=300.0))
+
+    def test_not_due_yet(self):
+        self._bump_mtime()
+        self.assertEqual([], self.watcher.poll_once(now=101.0))  # idle interval is slow_interval_s
+
+    def test_backoff_after_change(self):
+        self._bump_mtime()
+        self.watcher.poll_once(now=200.0)
+        state = self.watcher._states[self.path]
+        self.assertEqual(1.0, state.interval_s)
+        self.watcher.poll_once(now=201.0)
+        self.assertEqual(2.0, state.interval_s)
+
+    def test_bounded_stats_per_tick(self):
+        w = FileWatcher(on_changes=lambda changes: None, max_stats_per_tick=10)
+        w.watch([os.path.join(self._tmp.name, f"f{i}") for i in range(25)])
+        w.poll_once(now=1.0)
+        self.assertEqual(15, sum(1 for s in w._states.values() if s.generation < 0))
+
+    def test_merge_change_kinds(self):
+        self.assertIsNone(merge_change_kinds(FileChangeKind.CREATED, FileChangeKind.DELETED))
+        self.assertEqual(FileChangeKind.MODIFIED, merge_change_kinds(FileChangeKind.DELETED, FileChangeKind.CREATED))
+        self.assertEqual(FileChangeKind.CREATED, merge_change_kinds(FileChangeKind.CREATED, FileChangeKind.MODIFIED))
+
+
+if __name__ == "__main__":
+    unittest.main()
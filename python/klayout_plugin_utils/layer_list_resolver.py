@@ -0,0 +1,277 @@
+# --------------------------------------------------------------------------------
+# SPDX-FileCopyrightText: 2026 Martin Jan Köhler
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+# SPDX-License-Identifier: GPL-3.0-or-later
+#--------------------------------------------------------------------------------
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import *
+import unittest
+import weakref
+
+import pya
+
+from klayout_plugin_utils.debugging import debug, Debugging
+from klayout_plugin_utils.layer_list_string import LayerList, LayerListIndex
+
+
+"""
+Resolution of a LayerList to the layer indices of a pya.Layout.
+
+Usage example
+-------------
+    layer_list = LayerList.parse_layer_list_string('metal1 via1 met* !met5').result
+
+    for li in resolve_layer_list(layer_list, layout):
+        ...
+
+    # or, to create the plain (non-pattern) layers which don't exist yet:
+    layer_indices = resolve_layer_list(layer_list, layout, create_missing=True)
+
+The result is cached per layout (weakly referenced), and reused as long as the layer table is unchanged,
+so repeated operations on the same layout don't look up any layers.
+
+NOTE: pya.Layout has no layer table change counter, and Layout.layers() is unchanged by delete_layer()
+      (the freed index is reused by the next insert_layer()), so each cache hit compares a snapshot
+      of the layer table: one pass over the layer infos, instead of find_layer() per layer.
+"""
+
+
+LayerTableSnapshot = Tuple[Tuple[int, int, int, str], ...]  # (layer index, layer, datatype, name)
+
+
+def _layer_table_snapshot(layout: pya.Layout) -> LayerTableSnapshot:
+    result = []
+    for li in layout.layer_indexes():
+        info = layout.get_info(li)
+        result.append((li, info.layer, info.datatype, info.name))
+    return tuple(result)
+
+
+@dataclass
+class _ResolvedLayers:
+    snapshot: LayerTableSnapshot
+    index: LayerListIndex
+    layer_indices: List[int]
+    missing: List[pya.LayerInfo] = field(default_factory=list)  # plain layers not found (unique, not excluded)
+
+
+class LayerListResolver:
+    def __init__(self, layer_list: LayerList):
+        self.layer_list = layer_list
+        self._cache: weakref.WeakKeyDictionary[pya.Layout, _ResolvedLayers] = weakref.WeakKeyDictionary()
+
+    def resolve(self, layout: pya.Layout, create_missing: bool = False) -> List[int]:
+        """
+        Layer indices of the plain layers (in list order) followed by the layers matched by patterns
+        (in layer table order), without duplicates and without the negated ones.
+
+        Plain layers which don't exist are skipped, or created if create_missing is True.
+        """
+        entry = self._cached(layout)
+        if entry is None:
+            entry = self._resolve(layout)
+        if create_missing and entry.missing:
+            entry = self._create_missing(layout, entry)
+        return list(entry.layer_indices)
+
+    def missing_layers(self, layout: pya.Layout) -> List[pya.LayerInfo]:
+        entry = self._cached(layout)
+        if entry is None:
+            entry = self._resolve(layout)
+        return list(entry.missing)
+
+    def invalidate(self, layout: Optional[pya.Layout] = None):
+        if layout is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(layout, None)
+
+    # ------------------------------------------------------------------
+
+    def _cached(self, layout: pya.Layout) -> Optional[_ResolvedLayers]:
+        entry = self._cache.get(layout, None)
+        if entry is None:
+            return None
+        if layout.destroyed() \
+           or entry.index is not self.layer_list.index() \
+           or entry.snapshot != _layer_table_snapshot(layout):
+            del self._cache[layout]
+            return None
+        return entry
+
+    def _resolve(self, layout: pya.Layout) -> _ResolvedLayers:
+        index = self.layer_list.index()
+
+        # NOTE: one pass over the layer table instead of one find_layer() per layer
+        snapshot = _layer_table_snapshot(layout)
+        by_pair: Dict[Tuple[int, int], int] = {}
+        by_name: Dict[str, int] = {}
+        for li, layer, datatype, name in snapshot:
+            if layer != -1 and datatype != -1:
+                by_pair.setdefault((layer, datatype), li)
+            if name:
+                by_name.setdefault(name, li)
+
+        layer_indices = []
+        seen = set()
+        missing = []
+        missing_sources = set()
+        excluded = index.excluded
+        for info in self.layer_list.layers:
+            if info.layer != -1 and info.datatype != -1:
+                source = (info.layer, info.datatype)
+                li = by_pair.get(source, None)
+            else:
+                source = info.name
+                li = by_name.get(source, None)
+            if li is None:
+                if source not in missing_sources \
+                   and (excluded is None or not excluded.matches(info.name, info.layer, info.datatype)):
+                    missing_sources.add(source)
+                    missing.append(info)
+                continue
+            if li in seen:
+                continue
+            if excluded is not None and excluded.matches(info.name, info.layer, info.datatype):
+                continue
+            seen.add(li)
+            layer_indices.append(li)
+
+        if self.layer_list.patterns:
+            matches = index.matches
+            for li, layer, datatype, name in snapshot:
+                if li not in seen and matches(name, layer, datatype):
+                    seen.add(li)
+                    layer_indices.append(li)
+
+        entry = _ResolvedLayers(snapshot=snapshot,
+                                index=index,
+                                layer_indices=layer_indices,
+                                missing=missing)
+        self._cache[layout] = entry
+
+        if Debugging.DEBUG:
+            debug(f"LayerListResolver: resolved {len(layer_indices)} layers, {len(missing)} missing")
+        return entry
+
+    def _create_missing(self, layout: pya.Layout, entry: _ResolvedLayers) -> _ResolvedLayers:
+        layout.start_changes()
+        try:
+            for info in entry.missing:  # NOTE: deduplicated, without the excluded ones (see _resolve)
+                layout.insert_layer(info)
+        finally:
+            layout.end_changes()
+        # NOTE: resolve again, so the new layers take their list position (before the pattern matches),
+        #       the same order as resolving the layout from scratch
+        return self._resolve(layout)
+
+
+def resolve_layer_list(layer_list: LayerList,
+                       layout: pya.Layout,
+                       create_missing: bool = False) -> List[int]:
+    """
+    Resolve with a resolver kept on the LayerList itself,
+    so all consumers of the same LayerList share the cache.
+    """
+    resolver = layer_list.__dict__.get('_resolver', None)
+    if resolver is None:
+        resolver = LayerListResolver(layer_list)
+        layer_list.__dict__['_resolver'] = resolver
+    return resolver.resolve(layout, create_missing=create_missing)
+
+
+#--------------------------------------------------------------------------------
+
+class LayerListResolverTests(unittest.TestCase):
+    def _layout(self) -> pya.Layout:
+        layout = pya.Layout()
+        layout.insert_layer(pya.LayerInfo(1, 0, 'metal1'))
+        layout.insert_layer(pya.LayerInfo(2, 0, 'via1'))
+        layout.insert_layer(pya.LayerInfo(3, 0, 'metal2'))
+        layout.insert_layer(pya.LayerInfo(5, 0, 'metal5'))
+        return layout
+
+    def test_resolve(self):
+        layout = self._layout()
+        layer_list = LayerList.parse_layer_list_string('via1, (1/0), met* !metal5').result
+        self.assertEqual([1, 0, 2], resolve_layer_list(layer_list, layout))
+
+    def test_create_missing(self):
+        layout = self._layout()
+        layer_list = LayerList.parse_layer_list_string('metal1 metal9, (7/0)').result
+        resolver = LayerListResolver(layer_list)
+        self.assertEqual([0], resolver.resolve(layout))
+        self.assertEqual(2, len(resolver.missing_layers(layout)))
+        self.assertEqual([0, 4, 5], resolver.resolve(layout, create_missing=True))
+        self.assertEqual([0, 4, 5], resolver.resolve(layout))
+        self.assertEqual([], resolver.missing_layers(layout))
+
+    def test_create_missing_duplicates(self):
+        layout = self._layout()
+        layer_list = LayerList.parse_layer_list_string('metal9 metal9').result
+        resolver = LayerListResolver(layer_list)
+        self.assertEqual(1, len(resolver.missing_layers(layout)))
+        self.assertEqual([4], resolver.resolve(layout, create_missing=True))
+        self.assertEqual(5, len(layout.layer_indexes()))
+
+    def test_create_missing_keeps_list_order(self):
+        layout = self._layout()
+        layer_list = LayerList.parse_layer_list_string('metal9 met*').result
+        resolver = LayerListResolver(layer_list)
+        created = resolver.resolve(layout, create_missing=True)
+        self.assertEqual([4, 0, 2, 3], created)
+        resolver.invalidate()
+        self.assertEqual(created, resolver.resolve(layout))
+
+    def test_cache_follows_layer_table(self):
+        layout = self._layout()
+        layer_list = LayerList.parse_layer_list_string('met*').result
+        resolver = LayerListResolver(layer_list)
+        self.assertEqual([0, 2, 3], resolver.resolve(layout))
+        self.assertIs(resolver._cache[layout], resolver._cached(layout))
+        layout.insert_layer(pya.LayerInfo(6, 0, 'metal6'))
+        self.assertEqual([0, 2, 3, 4], resolver.resolve(layout))
+
+    def test_cache_follows_deleted_and_reused_layer(self):
+        layout = self._layout()
+        layer_list = LayerList.parse_layer_list_string('met*').result
+        resolver = LayerListResolver(layer_list)
+        self.assertEqual([0, 2, 3], resolver.resolve(layout))
+        layout.delete_layer(2)
+        self.assertEqual(2, layout.insert_layer(pya.LayerInfo(7, 0, 'poly')))  # reuses the freed index
+        self.assertEqual([0, 3], resolver.resolve(layout))
+
+    def test_cache_follows_renamed_layer(self):
+        layout = self._layout()
+        layer_list = LayerList.parse_layer_list_string('met*').result
+        resolver = LayerListResolver(layer_list)
+        self.assertEqual([0, 2, 3], resolver.resolve(layout))
+        layout.set_info(1, pya.LayerInfo(2, 0, 'metal_via1'))
+        self.assertEqual([0, 1, 2, 3], resolver.resolve(layout))
+
+    def test_cache_does_not_keep_layouts_alive(self):
+        import gc
+        layer_list = LayerList.parse_layer_list_string('met*').result
+        resolver = LayerListResolver(layer_list)
+        resolver.resolve(self._layout())
+        gc.collect()
+        self.assertEqual(0, len(resolver._cache))
+
+
+if __name__ == "__main__":
+    unittest.main()
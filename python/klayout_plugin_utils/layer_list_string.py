@@ -17,7 +17,11 @@
 #--------------------------------------------------------------------------------
 
 from __future__ import annotations
+from collections import OrderedDict
 from dataclasses import dataclass, field
+import fnmatch
+import sys
+import threading
 from typing import *
 import traceback
 import re
@@ -26,26 +30,366 @@ import unittest
 import pya
 
 
+ANY_NUMBER = sys.maxsize  # upper bound of the "*" layer / datatype range
+
+
 @dataclass
 class ParserError:
     msg: str
     column: int
 
 
+class LayerToken(NamedTuple):
+    start: int
+    end: int
+    layer: int     # -1 if not given
+    datatype: int  # -1 if not given
+    name: str      # '' if not given, may contain the glob characters * and ?
+    layer_max: int = -1
+    datatype_max: int = -1
+    negated: bool = False
+    
+    @property
+    def is_pattern(self) -> bool:
+        return self.negated \
+               or self.layer_max != self.layer \
+               or self.datatype_max != self.datatype \
+               or _is_glob(self.name)
+    
+    def layer_info(self) -> pya.LayerInfo:
+        if self.name == '':
+            return pya.LayerInfo(self.layer, self.datatype)
+        if self.layer == -1:
+            return pya.LayerInfo(self.name)
+        return pya.LayerInfo(self.layer, self.datatype, self.name)
+    
+    def pattern(self) -> LayerPattern:
+        return LayerPattern(name=self.name,
+                            layers=(self.layer, self.layer_max),
+                            datatypes=(self.datatype, self.datatype_max),
+                            negated=self.negated)
+
+
 @dataclass
 class ParseResult:
     result: Optional[LayerList] = field(default_factory=list)
     errors: List[ParserError] = field(default_factory=list)
+    
+    # NOTE: kept for LayerList.reparse_layer_list_string(), not part of the comparison
+    source: str = field(default='', compare=False, repr=False)
+    tokens: Tuple[LayerToken, ...] = field(default=(), compare=False, repr=False)
+
+
+def _is_glob(name: str) -> bool:
+    return '*' in name or '?' in name
+
+
+@dataclass(frozen=True)
+class LayerPattern:
+    """
+    Layer specification which is not a single layer:
+    a name glob (e.g. "met*"), layer / datatype ranges (e.g. "1-10/0", "*/20"),
+    or a negated specification (e.g. "!met1", "!*.pin").
+    
+    Like for plain layers, the name and the layer / datatype part match independently.
+    """
+    name: str = ''                           # exact name or glob, '' if not given
+    layers: Tuple[int, int] = (-1, -1)       # inclusive range, (-1, -1) if not given
+    datatypes: Tuple[int, int] = (-1, -1)    # inclusive range, (-1, -1) if not given
+    negated: bool = False
+    
+    def __str__(self) -> str:
+        prefix = '!' if self.negated else ''
+        has_gds = self.layers[0] != -1 and self.datatypes[0] != -1
+        gds = f"({self._format_range(self.layers)}/{self._format_range(self.datatypes)})"
+        if self.name and has_gds:
+            return f"{prefix}{self.name} {gds}"
+        elif self.name:
+            return f"{prefix}{self.name}"
+        elif has_gds:
+            return f"{prefix}{gds}"
+        else:
+            return ''  # degenerate pattern, shouldn't normally occur
+    
+    @staticmethod
+    def _format_range(r: Tuple[int, int]) -> str:
+        if r == (0, ANY_NUMBER):
+            return '*'
+        if r[0] == r[1]:
+            return str(r[0])
+        return f"{r[0]}-{r[1]}"
+    
+    def matches(self, name: str, layer: int, datatype: int) -> bool:
+        """NOTE: ignores negated, i.e. whether the pattern itself matches"""
+        if self.name and name and fnmatch.fnmatchcase(name, self.name):
+            return True
+        return self.layers[0] != -1 and self.datatypes[0] != -1 \
+               and self.layers[0] <= layer <= self.layers[1] \
+               and self.datatypes[0] <= datatype <= self.datatypes[1]
+
+
+# A symbolic name token: an identifier optionally followed by .identifier segments,
+# e.g. "metal1", "Metal1.drawing", "M1.pin.text"
+# Each segment may contain the glob characters * and ?, e.g. "met*", "*.pin", "via?"
+_NAME = r'[A-Za-z_*?][\w*?]*(?:\.[A-Za-z_*?][\w*?]*)*'
+
+# A layer or datatype number, an inclusive range "1-10" or "*" for any number
+_NUMBER = r'\d+(?:-\d+)?|\*'
+
+# Regex matches (each optionally negated by a leading "!"):
+# 1) name + (layer/datatype)
+# 2) bare (layer/datatype)
+# 3) bare numeric layer/datatype (L/D)
+# 4) name only
+_LAYER_PATTERN = re.compile(rf"""
+    (?P<negated>!)?                           # optional negation
+    (?:
+        (?:
+            (?P<name>{_NAME})?                # optional symbolic name
+            \s*
+            \(                                      # opening parenthesis
+                \s*(?P<layer1>{_NUMBER})\s*/\s*(?P<dtype1>{_NUMBER})\s*   # L/D inside ()
+            \)
+        )
+        |
+        (?:
+            (?P<layer2>{_NUMBER})\s*/\s*(?P<dtype2>{_NUMBER})  # bare numeric L/D
+        )
+        |
+        (?:
+            (?P<name_only>{_NAME})            # name only
+        )
+    )
+""", re.VERBOSE)
+
+
+def _number_range(spec: str) -> Tuple[int, int]:
+    if spec == '*':
+        return 0, ANY_NUMBER
+    lower, _, upper = spec.partition('-')
+    if upper == '':
+        n = int(lower)
+        return n, n
+    return int(lower), int(upper)
+
+
+class _Tokenization(NamedTuple):
+    tokens: Tuple[LayerToken, ...]
+    error_columns: Tuple[int, ...]
+
+
+def _tokenize(s: str,
+              pos: int = 0,
+              stop_at: Optional[Callable[[int], bool]] = None) -> Tuple[List[LayerToken], List[int], int]:
+    """
+    Tokenize s starting at pos, until the end or until stop_at(pos) is true for a token start.
+    Returns tokens, error columns and the position where tokenizing stopped.
+    """
+    match = _LAYER_PATTERN.match
+    tokens = []
+    error_columns = []
+    n = len(s)
+    while pos < n:
+        m = match(s, pos)
+        if not m:
+            # Skip whitespace and commas
+            if s[pos] in " ,":
+                pos += 1
+                continue
+            error_columns.append(pos)
+            # Skip this character to avoid infinite loop
+            pos += 1
+            continue
+        
+        if stop_at is not None and stop_at(pos):
+            break
+        
+        negated, layer2, layer1 = m.group('negated', 'layer2', 'layer1')
+        if layer2:  # numeric only
+            layers, datatypes = _number_range(layer2), _number_range(m.group('dtype2'))
+            name = ''
+        elif layer1:  # name + (layer/datatype)
+            layers, datatypes = _number_range(layer1), _number_range(m.group('dtype1'))
+            name = m.group('name') or ''
+        else:  # name only
+            layers = datatypes = (-1, -1)
+            name = m.group('name_only')
+        if layers[0] > layers[1] or datatypes[0] > datatypes[1]:
+            error_columns.append(pos)  # empty range, e.g. 10-1/0
+        else:
+            tokens.append(LayerToken(pos, m.end(), layers[0], datatypes[0], name,
+                                     layers[1], datatypes[1], negated is not None))
+        pos = m.end()
+    return tokens, error_columns, pos
+
+
+class _ParseCache:
+    """Bounded LRU of tokenizations, keyed by the input string."""
+    
+    MAX_ENTRIES = 256
+    
+    def __init__(self):
+        self._entries: OrderedDict[str, _Tokenization] = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, s: str) -> Optional[_Tokenization]:
+        with self._lock:
+            t = self._entries.get(s, None)
+            if t is not None:
+                self._entries.move_to_end(s)
+            return t
+    
+    def put(self, s: str, t: _Tokenization):
+        with self._lock:
+            self._entries[s] = t
+            self._entries.move_to_end(s)
+            while len(self._entries) > self.MAX_ENTRIES:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_parse_cache = _ParseCache()
+
+
+@dataclass(frozen=True)
+class LayerListIndex:
+    """
+    Compiled form of a LayerList, for fast membership tests.
+    
+    Exact names and layer / datatype pairs are looked up in hash sets,
+    name globs are combined into one prefix tuple (for "xyz*") and one regex (all others),
+    layer / datatype ranges are checked one by one.
+    Negated entries are compiled into a separate index (excluded).
+    """
+    names: FrozenSet[str]
+    layer_datatype_pairs: FrozenSet[Tuple[int, int]]
+    name_prefixes: Tuple[str, ...] = ()
+    name_regex: Optional[re.Pattern] = None
+    ranges: Tuple[Tuple[int, int, int, int], ...] = ()  # (layer min, layer max, datatype min, datatype max)
+    match_all: bool = False  # only negated entries, i.e. everything else is included
+    excluded: Optional[LayerListIndex] = None
+    
+    @classmethod
+    def build(cls, layers: List[pya.LayerInfo], patterns: Sequence[LayerPattern] = ()) -> LayerListIndex:
+        names = set()
+        pairs = set()
+        for l in layers:
+            name, layer, datatype = l.name, l.layer, l.datatype
+            if name:
+                names.add(name)
+            if layer != -1 and datatype != -1:
+                pairs.add((layer, datatype))
+        
+        prefixes = []
+        globs = []
+        ranges = []
+        negated = []
+        for p in patterns:
+            if p.negated:
+                negated.append(p)
+                continue
+            if _is_glob(p.name):
+                head, star, tail = p.name.partition('*')
+                if star and tail == '' and not _is_glob(head):
+                    prefixes.append(head)
+                else:
+                    globs.append(fnmatch.translate(p.name))
+            elif p.name:
+                names.add(p.name)
+            (lmin, lmax), (dmin, dmax) = p.layers, p.datatypes
+            if lmin == -1 or dmin == -1:
+                continue
+            if lmin == lmax and dmin == dmax:
+                pairs.add((lmin, dmin))
+            else:
+                ranges.append((lmin, lmax, dmin, dmax))
+        
+        excluded = None
+        if negated:
+            excluded = LayerListIndex.build([], [LayerPattern(p.name, p.layers, p.datatypes) for p in negated])
+        
+        return LayerListIndex(names=frozenset(names),
+                              layer_datatype_pairs=frozenset(pairs),
+                              name_prefixes=tuple(prefixes),
+                              name_regex=re.compile('|'.join(globs)) if globs else None,
+                              ranges=tuple(ranges),
+                              match_all=excluded is not None and not layers and len(negated) == len(patterns),
+                              excluded=excluded)
+    
+    def matches(self, name: str, layer: int, datatype: int) -> bool:
+        if name and (name in self.names
+                     or name.startswith(self.name_prefixes)
+                     or (self.name_regex is not None and self.name_regex.match(name))):
+            found = True
+        elif (layer, datatype) in self.layer_datatype_pairs:
+            found = True
+        elif self.ranges and layer != -1 and datatype != -1:
+            found = any(lmin <= layer <= lmax and dmin <= datatype <= dmax
+                        for lmin, lmax, dmin, dmax in self.ranges)
+        else:
+            found = self.match_all
+        if found and self.excluded is not None:
+            return not self.excluded.matches(name, layer, datatype)
+        return found
+    
+    def contains(self, candidate_layer: pya.LayerProperties) -> bool:
+        name = candidate_layer.name or candidate_layer.source_name
+        return self.matches(name, candidate_layer.source_layer, candidate_layer.source_datatype)
+    
+    def contains_layer_info(self, info: pya.LayerInfo) -> bool:
+        return self.matches(info.name, info.layer, info.datatype)
 
 
 @dataclass
 class LayerList:
     layers: List[pya.LayerInfo] = field(default_factory=list)
+    patterns: List[LayerPattern] = field(default_factory=list)  # globs, ranges and negations
+    
+    # NOTE: the index is rebuilt when self.layers / self.patterns are replaced or change their length,
+    #       call invalidate_index() after modifying entries in place.
+    #       The indexed lists themselves are kept (not their ids, which may be reused).
+    def index(self) -> LayerListIndex:
+        cached = self.__dict__.get('_index', None)
+        if cached is not None:
+            layers, layer_count, patterns, pattern_count, index = cached
+            if layers is self.layers and layer_count == len(layers) \
+               and patterns is self.patterns and pattern_count == len(patterns):
+                return index
+        index = LayerListIndex.build(self.layers, self.patterns)
+        self.__dict__['_index'] = (self.layers, len(self.layers), self.patterns, len(self.patterns), index)
+        return index
+    
+    def invalidate_index(self):
+        self.__dict__.pop('_index', None)
     
     def __str__(self) -> str:
-        if not self.layers:
+        """
+        Layers and patterns in the order of the parsed string,
+        if the lists were built in code (or replaced / resized), plain layers come first.
+        """
+        if not self.layers and not self.patterns:
             return ''
-        return ' '.join(self._format_layer(l) for l in self.layers)
+        layers = [self._format_layer(l) for l in self.layers]
+        patterns = [str(p) for p in self.patterns]
+        order = self._token_order()
+        if order is None:
+            return ' '.join(layers + patterns)
+        layer_iter, pattern_iter = iter(layers), iter(patterns)
+        return ' '.join(next(pattern_iter) if is_pattern else next(layer_iter) for is_pattern in order)
+    
+    def _token_order(self) -> Optional[Tuple[bool, ...]]:
+        """is_pattern per token of the parsed string, None if the lists no longer match it"""
+        cached = self.__dict__.get('_parsed_token_order', None)
+        if cached is None:
+            return None
+        layers, layer_count, patterns, pattern_count, order = cached
+        if layers is self.layers and layer_count == len(layers) \
+           and patterns is self.patterns and pattern_count == len(patterns):
+            return order
+        return None
     
     @staticmethod
     def _format_layer(l: pya.LayerInfo) -> str:
@@ -61,99 +405,160 @@ class LayerList:
             return ''  # degenerate LayerInfo, shouldn't normally occur
     
     def contains(self, candidate_layer: pya.LayerProperties) -> bool:
-        for l in self.layers:
-            name = candidate_layer.name or candidate_layer.source_name
-            if name and l.name and name == l.name:
-                return True
-            if l.layer != -1 \
-               and l.layer == candidate_layer.source_layer \
-               and l.datatype != -1 \
-               and l.datatype == candidate_layer.source_datatype:
-                return True
-        return False
+        return self.index().contains(candidate_layer)
+    
+    def filter(self, layer_properties: Iterable[pya.LayerProperties]) -> List[pya.LayerProperties]:
+        """All entries contained in this list, in one pass."""
+        contains = self.index().contains
+        return [lp for lp in layer_properties if contains(lp)]
+    
+    def matching_layer_indices(self, layout: pya.Layout) -> List[int]:
+        """Indices of all layers of the layout's layer table contained in this list."""
+        matches = self.index().matches
+        result = []
+        for li in layout.layer_indexes():
+            info = layout.get_info(li)
+            if matches(info.name, info.layer, info.datatype):
+                result.append(li)
+        return result
     
     @classmethod
     def parse_layer_list_string(cls, s: str) -> ParseResult:
         """
         Parse LayerList from a string:
         
-        A comma or blank separated list of layers to create in the usual layer notation, 
+        A comma or blank separated list of layers to create in the usual layer notation,
         e.g. "1/0 2/0 3/0", "metal1 via1 metal2" or "metal1 (1/0) via1 (2/0) metal2 (3/0)"
-
+        
+        Layers can also be given as patterns:
+            - name globs, e.g. "met*", "*.pin", "via?"
+            - layer / datatype ranges, e.g. "1-10/0", "*/20", "(5/*)"
+            - negations, e.g. "met* !met5" (a list of negations only, e.g. "!*.pin", excludes from all layers)
+        
         Returns either a valid LayerList, or a list of parser errors
         """
-        layers = []
-        errors = []
+        t = _parse_cache.get(s)
+        if t is None:
+            tokens, error_columns, _ = _tokenize(s)
+            t = _Tokenization(tuple(tokens), tuple(error_columns))
+            _parse_cache.put(s, t)
+        return cls._parse_result(s, t)
+    
+    @classmethod
+    def reparse_layer_list_string(cls,
+                                  s: str,
+                                  previous: ParseResult,
+                                  position: Optional[int] = None,
+                                  chars_removed: Optional[int] = None,
+                                  chars_added: Optional[int] = None) -> ParseResult:
+        """
+        Parse s, which was obtained by editing previous.source.
         
-        # A symbolic name token: an identifier optionally followed by .identifier segments,
-        # e.g. "metal1", "Metal1.drawing", "M1.pin.text"
-        _NAME = r'[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*'
+        Only the edited region is tokenized again, tokens before and after it are reused.
+        The edit range uses the convention of QTextDocument.contentsChange,
+        if it is not given, it is derived from the common prefix / suffix of both strings.
+        """
+        t = _parse_cache.get(s)
+        if t is not None:
+            return cls._parse_result(s, t)
         
-        # Regex matches:
-        # 1) name + (layer/datatype)
-        # 2) bare (layer/datatype)
-        # 3) bare numeric layer/datatype (L/D)
-        # 4) name only
-        layer_pattern = re.compile(rf"""
-            (?:
-                (?P<name>{_NAME})?                # optional symbolic name
-                \s*
-                \(                                      # opening parenthesis
-                    \s*(?P<layer1>\d+)\s*/\s*(?P<dtype1>\d+)\s*   # L/D inside ()
-                \)
-            )
-            |
-            (?:
-                (?P<layer2>\d+)\s*/\s*(?P<dtype2>\d+)  # bare numeric L/D
-            )
-            |
-            (?:
-                (?P<name_only>{_NAME})            # name only
-            )
-        """, re.VERBOSE)
+        old_s = previous.source
+        if len(previous.tokens) == 0 and len(previous.errors) == 0 and old_s != '':
+            return cls.parse_layer_list_string(s)  # previous result without tokens
         
-        pos = 0
-        while pos < len(s):
-            m = layer_pattern.match(s, pos)
-            if not m:
-                # Skip whitespace and commas
-                if s[pos] in " ,":
-                    pos += 1
-                    continue
-                errors.append(ParserError(f"Unexpected token at position {pos}", pos))
-                # Skip this character to avoid infinite loop
-                pos += 1
-                continue
+        if position is None or chars_removed is None or chars_added is None:
+            position, chars_removed, chars_added = _edit_range(old_s, s)
+        old_edit_end = position + chars_removed
+        delta = chars_added - chars_removed
         
-            gd = m.groupdict()
-            if gd["layer2"]:  # numeric only
-                li = pya.LayerInfo(int(gd["layer2"]), int(gd["dtype2"]))
-            elif gd["layer1"]:  # name + (layer/datatype)
-                name = gd["name"] if gd["name"] else ""
-                if name == '':
-                    li = pya.LayerInfo(int(gd["layer1"]), int(gd["dtype1"]))
-                else:
-                    li = pya.LayerInfo(int(gd["layer1"]), int(gd["dtype1"]), name)
-            elif gd["name_only"]:  # name only
-                li = pya.LayerInfo(gd["name_only"])
-            else:
-                # Should never happen
-                errors.append(ParserError(f"Invalid token at position {pos}", pos))
-                pos = m.end()
-                continue
-            layers.append(li)
-            pos = m.end()
-            
-        if errors:
-            return ParseResult(errors=errors)
-            
-        return ParseResult(result=LayerList(layers=layers))
+        resume = _resume_position(s, position)
+        old_tokens = previous.tokens
+        keep = 0
+        while keep < len(old_tokens) and old_tokens[keep].end <= resume:
+            keep += 1
+        
+        # NOTE: the regex match at a position only depends on the text after it,
+        #       once we reach the start of an old token behind the edit, the rest is unchanged
+        old_start_indices = {tok.start: i
+                             for i, tok in enumerate(old_tokens)
+                             if tok.start >= old_edit_end}
+        new_edit_end = position + chars_added
+        
+        def stop_at(pos: int) -> bool:
+            return pos >= new_edit_end and (pos - delta) in old_start_indices
+        
+        mid_tokens, mid_errors, stop = _tokenize(s, resume, stop_at)
+        
+        tokens = list(old_tokens[:keep]) + mid_tokens
+        error_columns = [e.column for e in previous.errors if e.column < resume] + mid_errors
+        if stop < len(s):
+            old_stop = stop - delta
+            tokens += [tok._replace(start=tok.start + delta, end=tok.end + delta)
+                       for tok in old_tokens[old_start_indices[old_stop]:]]
+            error_columns += [e.column + delta for e in previous.errors if e.column >= old_stop]
         
+        t = _Tokenization(tuple(tokens), tuple(error_columns))
+        _parse_cache.put(s, t)
+        return cls._parse_result(s, t)
+    
+    @classmethod
+    def _parse_result(cls, s: str, t: _Tokenization) -> ParseResult:
+        if t.error_columns:
+            return ParseResult(errors=[ParserError(f"Unexpected token at position {c}", c) for c in t.error_columns],
+                               source=s,
+                               tokens=t.tokens)
+        layer_list = LayerList(layers=[tok.layer_info() for tok in t.tokens if not tok.is_pattern],
+                               patterns=[tok.pattern() for tok in t.tokens if tok.is_pattern])
+        layer_list.__dict__['_parsed_token_order'] = (layer_list.layers, len(layer_list.layers),
+                                                      layer_list.patterns, len(layer_list.patterns),
+                                                      tuple(tok.is_pattern for tok in t.tokens))
+        return ParseResult(result=layer_list,
+                           source=s,
+                           tokens=t.tokens)
+    
     @classmethod
     def is_valid_layer_list_string(cls, s: str) -> bool:
-        r = cls.parse_layer_list_string(s)
-        return not r.errors
-        
+        t = _parse_cache.get(s)
+        if t is None:
+            return not cls.parse_layer_list_string(s).errors
+        return not t.error_columns
+
+
+def _resume_position(s: str, position: int) -> int:
+    """
+    Position before an edit at which tokenizing can safely restart,
+    i.e. no match of _LAYER_PATTERN starting before it looks at s[position:].
+    
+    NOTE: matches never look past a character outside of names, blanks and "(", "/", "-", "!",
+          and after a name followed by blanks, they only look at the next character
+          (unless it follows "(" or "/", where numbers continue the match)
+    """
+    k = position
+    while k > 0:
+        c = s[k - 1]
+        if not (c.isalnum() or c in '_.(/-!*?' or c.isspace()):
+            return k
+        if k < position and c.isspace() and (s[k].isalnum() or s[k] in '_!*?'):
+            j = k - 1
+            while j >= 0 and s[j].isspace():
+                j -= 1
+            if j < 0 or s[j] not in '(/':
+                return k
+        k -= 1
+    return 0
+
+
+def _edit_range(old: str, new: str) -> Tuple[int, int, int]:
+    """(position, chars_removed, chars_added) of a single edit turning old into new."""
+    n = min(len(old), len(new))
+    prefix = 0
+    while prefix < n and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < n - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    return prefix, len(old) - prefix - suffix, len(new) - prefix - suffix
+
 #--------------------------------------------------------------------------------
 
 class LayerListTests(unittest.TestCase):
@@ -272,6 +677,125 @@ class LayerListTests(unittest.TestCase):
         lp.source_name = 'Metal1.drawing'
         self.assertEqual(True, obtained.result.contains(lp))
 
+    def test_filter(self):
+        obtained = LayerList.parse_layer_list_string('metal1 8/2')
+        
+        lp1 = pya.LayerProperties()
+        lp1.source_name = 'metal1'
+        lp2 = pya.LayerProperties()
+        lp2.source_layer = 8
+        lp2.source_datatype = 2
+        lp3 = pya.LayerProperties()
+        lp3.source_layer = 8
+        lp3.source_datatype = 0
+        self.assertEqual([lp1, lp2], obtained.result.filter([lp1, lp2, lp3]))
+        
+    def test_index_follows_layers(self):
+        layer_list = LayerList(layers=[pya.LayerInfo('metal1')])
+        lp = pya.LayerProperties()
+        lp.name = 'metal2'
+        self.assertEqual(False, layer_list.contains(lp))
+        layer_list.layers.append(pya.LayerInfo('metal2'))
+        self.assertEqual(True, layer_list.contains(lp))
+    
+    def test_index_follows_replaced_layers(self):
+        layer_list = LayerList(layers=[pya.LayerInfo('metal1')])
+        lp = pya.LayerProperties()
+        lp.name = 'metal2'
+        self.assertEqual(False, layer_list.contains(lp))
+        layer_list.layers = [pya.LayerInfo('metal2')]  # same length, the old list may be collected
+        self.assertEqual(True, layer_list.contains(lp))
+
+    def _expect_reparse(self, old: str, new: str, *edit):
+        previous = LayerList.parse_layer_list_string(old)
+        _parse_cache.clear()
+        obtained = LayerList.reparse_layer_list_string(new, previous, *edit)
+        _parse_cache.clear()
+        expected = LayerList.parse_layer_list_string(new)
+        self.assertEqual(expected, obtained)
+        self.assertEqual(expected.tokens, obtained.tokens)
+    
+    def test_reparse(self):
+        self._expect_reparse('metal1 via1 metal2', 'metal1 via2 metal2')
+        self._expect_reparse('metal1 via1 metal2', 'metal1 via1 metal2 (3/0)')
+        self._expect_reparse('metal 1/0', 'metal1 1/0')
+        self._expect_reparse('metal1 1/0', 'metal1 (1/0)')
+        self._expect_reparse('metal1', 'metal1 (1/0)', 6, 0, 6)
+        self._expect_reparse('a b c', 'a # c')
+        self._expect_reparse('a # c # d', 'a b c # d')
+        self._expect_reparse('', '1/0 2/0')
+        self._expect_reparse('1/0 2/0', '')
+        self._expect_reparse('( 1/0', '( 1/0)')
+        self._expect_reparse('metal1 ( 1/0', 'metal1 ( 1/0 )')
+        self._expect_reparse('metal1 ( 1 / via1', 'metal1 ( 1 / 0) via1')
+        self._expect_reparse('metal1 via1', 'metal1 (1/0) via1')
+        self._expect_reparse('a, b, c, d', 'a, b, x, d')
+        self._expect_reparse('met1 1/0', 'met* 1-5/0 !met2')
+        self._expect_reparse('!met1 ( 1-', '!met1 ( 1-3/*)')
+    
+    def test_parse_cache(self):
+        s = 'metal1 (1/0) via1'
+        first = LayerList.parse_layer_list_string(s)
+        second = LayerList.parse_layer_list_string(s)
+        self.assertEqual(first, second)
+        self.assertIsNot(first.result.layers, second.result.layers)  # callers may modify results
+        self.assertIs(first.tokens, second.tokens)
+        self.assertEqual(False, LayerList.is_valid_layer_list_string('metal1 #'))
+    
+    def _lp(self, name: str = '', layer: int = -1, datatype: int = -1) -> pya.LayerProperties:
+        lp = pya.LayerProperties()
+        lp.source_name = name
+        lp.source_layer = layer
+        lp.source_datatype = datatype
+        return lp
+    
+    def test_parse_patterns(self):
+        self._expect_parse_result('met* 1-10/0 (*/20) !met5',
+                                  ParseResult(result=LayerList(layers=[], patterns=[
+                                      LayerPattern(name='met*'),
+                                      LayerPattern(layers=(1, 10), datatypes=(0, 0)),
+                                      LayerPattern(layers=(0, ANY_NUMBER), datatypes=(20, 20)),
+                                      LayerPattern(name='met5', negated=True),
+                                  ])))
+        self._expect_error('10-1/0')
+        self._expect_error('! met1')
+    
+    def test_roundtrip_patterns(self):
+        self._expect_roundtrip('met* (1-10/0) (*/20) !met5 !*.pin (5/*)')
+    
+    def test_roundtrip_patterns_and_layers(self):
+        self._expect_roundtrip('met* metal1 !met5 via1 (2/0) (5/*)')
+    
+    def test_format_modified_patterns_and_layers(self):
+        layer_list = LayerList.parse_layer_list_string('met* metal1').result
+        layer_list.layers.append(pya.LayerInfo('via1'))
+        self.assertEqual('metal1 via1 met*', str(layer_list))  # no longer the parsed order
+    
+    def test_contains_patterns(self):
+        layer_list = LayerList.parse_layer_list_string('met* via? 1-10/0 */20 !met5 !(3/0)').result
+        self.assertEqual(True, layer_list.contains(self._lp('metal1')))
+        self.assertEqual(True, layer_list.contains(self._lp('via1')))
+        self.assertEqual(False, layer_list.contains(self._lp('via12')))
+        self.assertEqual(False, layer_list.contains(self._lp('met5')))
+        self.assertEqual(True, layer_list.contains(self._lp(layer=10, datatype=0)))
+        self.assertEqual(False, layer_list.contains(self._lp(layer=11, datatype=0)))
+        self.assertEqual(True, layer_list.contains(self._lp(layer=99, datatype=20)))
+        self.assertEqual(False, layer_list.contains(self._lp(layer=3, datatype=0)))
+    
+    def test_contains_only_negations(self):
+        layer_list = LayerList.parse_layer_list_string('!*.pin').result
+        self.assertEqual(True, layer_list.contains(self._lp('met1.drawing')))
+        self.assertEqual(True, layer_list.contains(self._lp(layer=1, datatype=0)))
+        self.assertEqual(False, layer_list.contains(self._lp('met1.pin')))
+    
+    def test_index_agrees_with_patterns(self):
+        patterns = LayerList.parse_layer_list_string('m*1 *.pin via? 2-4/1-2 */7').result.patterns
+        index = LayerListIndex.build([], patterns)
+        for name in ('m1', 'met1', 'met2', 'a.pin', 'pin', 'via1', 'via'):
+            for layer, datatype in ((-1, -1), (2, 1), (4, 2), (5, 2), (0, 7), (3, 3)):
+                expected = any(p.matches(name, layer, datatype) for p in patterns)
+                self.assertEqual(expected, index.matches(name, layer, datatype), (name, layer, datatype))
+
 #--------------------------------------------------------------------------------
 
 if __name__ == "__main__":
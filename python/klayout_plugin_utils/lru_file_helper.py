@@ -18,12 +18,20 @@
 
 from __future__ import annotations
 
+from collections import OrderedDict
 import json
+import os
 from pathlib import Path
+import time
 from typing import *
 
 import pya
 
+from klayout_plugin_utils.background_worker import BackgroundWorker
+from klayout_plugin_utils.config_cache import ConfigCache
+from klayout_plugin_utils.recent_items_store import RecentItemsStore
+from klayout_plugin_utils.shared_recent_files_store import SharedRecentFilesStore
+
 
 """
 Reusable LRU (Least-Recently-Used) file list helper.
@@ -43,10 +51,23 @@ Usage example
 """
 
 
+class _LRUModel:
+    """In-memory state of one LRU list, shared by all helpers using the same config key."""
+
+    def __init__(self):
+        self.serialised: Optional[str] = None      # config value the model was synced with
+        self.paths: OrderedDict[str, None] = OrderedDict()  # oldest first, most-recent last
+        self.last_prune = float('-inf')
+        self.prune_in_flight: Set[str] = set()
+
+
 class LRUFileHelper:
     """Manages a most-recently-used list of file paths stored in KLayout's
     persistent application configuration.
 
+    The list is kept in memory (shared per config key) and only re-parsed
+    when the config value was changed by someone else.
+
     Parameters
     ----------
     config_key:
@@ -59,9 +80,16 @@ class LRUFileHelper:
         list grows beyond this limit).
     """
 
+    PRUNE_INTERVAL_S = 30.0
+    PRUNE_TIMEOUT_MS = 2000
+
+    _models: Dict[str, _LRUModel] = {}
+    _prune_worker: Optional[BackgroundWorker] = None
+
     def __init__(self, config_key: str, max_entries: int = 10):
         self._key = config_key
         self._max = max_entries
+        self._model = self._models.setdefault(config_key, _LRUModel())
 
     # ------------------------------------------------------------------
     # Public API
@@ -70,14 +98,13 @@ class LRUFileHelper:
     def entries(self) -> List[Path]:
         """Return the LRU list as ``Path`` objects, most-recent first.
 
-        Paths that no longer exist on disk are silently removed.
+        Paths that no longer exist on disk are removed in the background
+        (at most every ``PRUNE_INTERVAL_S``), so a stale entry may be
+        returned until the existence check has finished.
         """
-        raw = self._load_raw()
-        existing = [Path(p) for p in raw if Path(p).exists()]
-        if len(existing) != len(raw):
-            # Prune stale entries from storage
-            self._save_raw([str(p) for p in existing])
-        return existing
+        self._sync()
+        self._schedule_prune(list(self._model.paths))
+        return [Path(p) for p in reversed(self._model.paths)]
 
     def push(self, path: Union[Path, str]):
         """Record *path* as the most-recently used entry.
@@ -85,27 +112,77 @@ class LRUFileHelper:
         If the path is already in the list it is moved to the front.
         The list is capped at ``max_entries``.
         """
-        path = Path(path).resolve()
-        raw = self._load_raw()
-        path_str = str(path)
-        # Remove duplicates, prepend
-        raw = [p for p in raw if p != path_str]
-        raw.insert(0, path_str)
-        raw = raw[: self._max]
-        self._save_raw(raw)
+        path_str = str(Path(path).resolve())
+        self._sync()
+        paths = self._model.paths
+        paths[path_str] = None
+        paths.move_to_end(path_str)
+        while len(paths) > self._max:
+            paths.popitem(last=False)
+        self._save()
 
     def clear(self):
         """Wipe the entire LRU list."""
-        self._save_raw([])
+        self._model.paths.clear()
+        self._save()
 
     # ------------------------------------------------------------------
     # Private helpers
     # ------------------------------------------------------------------
 
-    def _load_raw(self) -> List[str]:
+    def _sync(self):
+        serialised = self._load_serialised()
+        if serialised == self._model.serialised:
+            return
+        self._model.serialised = serialised
+        self._model.paths = OrderedDict((p, None) for p in reversed(self._parse(serialised)))
+
+    def _save(self):
+        self._model.serialised = self._save_raw(list(reversed(self._model.paths)))
+
+    def _remove_missing(self, path: str):
+        if path in self._model.paths:
+            self._sync()
+            self._model.paths.pop(path, None)
+            self._save()
+
+    def _schedule_prune(self, candidates: List[str]):
+        model = self._model
+        now = time.monotonic()
+        if now - model.last_prune < self.PRUNE_INTERVAL_S:
+            return
+        model.last_prune = now
+
+        # NOTE: dedicated worker, so threads hanging on a dead NFS mount
+        #       can't starve the shared BackgroundWorker
+        if LRUFileHelper._prune_worker is None:
+            LRUFileHelper._prune_worker = BackgroundWorker(name='LRUFileHelper', max_workers=2)
+
+        for p in candidates:
+            if p in model.prune_in_flight:
+                continue
+            model.prune_in_flight.add(p)
+
+            def on_result(exists: bool, p=p):
+                model.prune_in_flight.discard(p)
+                if not exists:
+                    self._remove_missing(p)
+
+            LRUFileHelper._prune_worker.submit(lambda p=p: os.path.exists(p),
+                                               on_result=on_result,
+                                               on_error=lambda e, p=p: model.prune_in_flight.discard(p),
+                                               on_timeout=lambda p=p: model.prune_in_flight.discard(p),
+                                               timeout_ms=self.PRUNE_TIMEOUT_MS)
+
+    def _load_serialised(self) -> str:
+        try:
+            return ConfigCache.get(self._key) or ''
+        except Exception:
+            return ''
+
+    @staticmethod
+    def _parse(serialised: str) -> List[str]:
         try:
-            app = pya.Application.instance()
-            serialised = app.get_config(self._key)
             if serialised:
                 data = json.loads(serialised)
                 if isinstance(data, list):
@@ -114,11 +191,75 @@ class LRUFileHelper:
             pass
         return []
 
-    def _save_raw(self, entries: List[str]):
+    def _load_raw(self) -> List[str]:
+        return self._parse(self._load_serialised())
+
+    def _save_raw(self, entries: List[str]) -> Optional[str]:
         try:
             value = json.dumps(entries)
-        
-            app = pya.Application.instance()
-            app.set_config(self._key, value)
+            ConfigCache.set(self._key, value)
+            return value
         except Exception:
-            pass
+            return None
+
+
+class FileBackedLRUFileHelper(LRUFileHelper):
+    """Same API as LRUFileHelper, but backed by a RecentItemsStore file
+    instead of one JSON string in KLayout's configuration.
+
+    Holds thousands of entries with access counts and timestamps,
+    the store file is shared by all plugins, config_key is used as namespace.
+    ``entries()`` returns the ``max_entries`` most recent paths,
+    ``ranked_entries()`` the best by frecency.
+    """
+
+    STORE_FILE_NAME = 'klayout_plugin_utils_recent_items.jsonl'
+
+    def __init__(self,
+                 config_key: str,
+                 max_entries: int = 10,
+                 store: Optional[RecentItemsStore | SharedRecentFilesStore] = None):
+        super().__init__(config_key=config_key, max_entries=max_entries)
+        self._model = self._models.setdefault(f"file:{config_key}", _LRUModel())
+        self._store = store or self.default_store()
+
+    @classmethod
+    def default_store(cls) -> RecentItemsStore | SharedRecentFilesStore:
+        return RecentItemsStore.shared(cls.default_store_path())
+
+    @classmethod
+    def default_store_path(cls) -> Path:
+        app = pya.Application.instance()
+        return Path(app.application_data_path()) / cls.STORE_FILE_NAME
+
+    def entries(self) -> List[Path]:
+        items = self._store.items(self._key, limit=self._max)
+        self._schedule_prune(items)
+        return [Path(p) for p in items]
+
+    def ranked_entries(self, limit: Optional[int] = None) -> List[Path]:
+        items = self._store.ranked(self._key, limit=limit or self._max)
+        self._schedule_prune(items)
+        return [Path(p) for p in items]
+
+    def push(self, path: Union[Path, str]):
+        self._store.push(self._key, str(Path(path).resolve()))
+
+    def clear(self):
+        self._store.clear(self._key)
+
+    def _remove_missing(self, path: str):
+        self._store.remove(self._key, path)
+
+
+class SharedLRUFileHelper(FileBackedLRUFileHelper):
+    """FileBackedLRUFileHelper for several concurrently running KLayout instances,
+    backed by a SharedRecentFilesStore (SQLite) in KLayout's application data path.
+    Pushes of other instances are picked up without re-reading the whole list.
+    """
+
+    STORE_FILE_NAME = 'klayout_plugin_utils_recent_items.sqlite'
+
+    @classmethod
+    def default_store(cls) -> RecentItemsStore | SharedRecentFilesStore:
+        return SharedRecentFilesStore.shared(cls.default_store_path())
@@ -16,52 +16,59 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 #--------------------------------------------------------------------------------
 
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import islice
 from typing import *
+import unittest
 
 import pya
 
+from klayout_plugin_utils.shape_classifier import classify_shape, ShapeKind
+
+
+_SHAPE_NAME_BY_KIND: Dict[ShapeKind, str] = {
+    ShapeKind.POINT: "Point",
+    ShapeKind.BOX: "Box",
+    ShapeKind.PATH: "Path",
+    ShapeKind.SIMPLE_POLYGON: "Polygon",
+    ShapeKind.POLYGON: "Polygon",
+    ShapeKind.EDGE: "Edge",
+    ShapeKind.EDGE_PAIR: "EdgePair",
+    ShapeKind.NULL: "none",
+    ShapeKind.TEXT: "Text",
+    ShapeKind.USER_OBJECT: "User Defined Object",
+}
 
-def describe_shape_name(shape: pya.Shape) -> str:
-    if shape.is_point():
-        return "Point"
-    elif shape.is_box():
-        return "Box"
-    elif shape.is_path():
-        return "Path"
-    elif shape.is_simple_polygon():
-        return "Polygon"
-    elif shape.is_polygon():
-        return "Polygon"
-    elif shape.is_edge():
-        return "Edge"
-    elif shape.is_edge_pair():
-        return "EdgePair"
-    elif shape.is_null():
-        return "none"
-    elif shape.is_text():
-        return "Text"
-    elif shape.is_user_object():
-        return "User Defined Object"
-
-def describe_shape_geometry(shape: pya.Shape) -> str:
-    if shape.is_point():
+
+def describe_shape_name(shape: pya.Shape, kind: Optional[ShapeKind] = None) -> Optional[str]:
+    if kind is None:
+        kind = classify_shape(shape)
+    return _SHAPE_NAME_BY_KIND.get(kind, None)
+
+def describe_shape_geometry(shape: pya.Shape, kind: Optional[ShapeKind] = None) -> str:
+    if kind is None:
+        kind = classify_shape(shape)
+    if kind == ShapeKind.POINT:
         p = shape.dpoint
         return f"at ({p.x}, {p.y})"
-    elif shape.is_box():
+    elif kind == ShapeKind.BOX:
         return f"box {shape.dbox}"
-    elif shape.is_path():
+    elif kind == ShapeKind.PATH:
         return f"path {shape.dpath}"
-    elif shape.is_simple_polygon():
+    elif kind == ShapeKind.SIMPLE_POLYGON:
         return f"polygon {shape.dsimple_polygon}"
-    elif shape.is_polygon():
+    elif kind == ShapeKind.POLYGON:
         return f"polygon {shape.dpolygon}"
-    elif shape.is_edge():
+    elif kind == ShapeKind.EDGE:
         return f"edge {shape.dedge}"
-    elif shape.is_edge_pair():
+    elif kind == ShapeKind.EDGE_PAIR:
         return f"edge pair {shape.dedge_pair}"
-    elif shape.is_null():
+    elif kind == ShapeKind.NULL:
         return ''
-    elif shape.is_text():
+    elif kind == ShapeKind.TEXT:
         return f"text {shape.dtext}"
     else:
         return f"bbox {shape.dbbox}"
@@ -70,8 +77,9 @@ def describe_shape(shape: Optional[pya.Shape]) -> str:
     if shape is None:
         return 'none'
     li = shape.layer_info
-    return f"{describe_shape_name(shape)} (layer {li}) "\
-           f"{describe_shape_geometry(shape)}"
+    kind = classify_shape(shape)
+    return f"{describe_shape_name(shape, kind)} (layer {li}) "\
+           f"{describe_shape_geometry(shape, kind)}"
     
 def describe_instance(inst: Optional[pya.Instance]) -> str:
     if inst is None:
@@ -88,4 +96,247 @@ def describe_object(o: pya.ObjectInstPath) -> str:
         if inst is not None:
             return describe_instance(inst)
     return "unknown"
-    
\ No newline at end of file
+    
+
+#--------------------------------------------------------------------------------
+
+@dataclass
+class ShapeSummary:
+    kind: ShapeKind
+    num_points: Optional[int]  # polygons / paths only
+    dbbox: pya.DBox
+    area: int  # in DBU²
+
+
+class ObjectDescriber:
+    """
+    Bounded and cached variant of describe_object() and friends,
+    meant for large selections and list views.
+
+    Geometries with more than max_points points are summarized
+    (point count, bbox, area) instead of formatted, and every description
+    is cut to max_length characters.
+
+    Descriptions are cached per shape / instance, the cached bbox is compared on each hit,
+    call invalidate() after edits that keep the bbox (the generation is part of the cache key).
+
+    NOTE: pya.Shape hashes by value, pya.Instance only by identity (while __eq__ compares values),
+          so instances are keyed by a value tuple instead (see _instance_key())
+    """
+
+    def __init__(self, max_length: int = 200, max_points: int = 16, cache_size: int = 4096):
+        self.max_length = max_length
+        self.max_points = max_points
+        self.cache_size = cache_size
+        self._generation = 0
+        self._cache: OrderedDict[Tuple[Any, int], Tuple[pya.Box, str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        self._generation += 1
+        self._cache.clear()
+
+    # ------------------------------------------------------------------
+
+    def summarize_shape(self, shape: pya.Shape) -> ShapeSummary:
+        """NOTE: the point count of polygons needs a copy of the polygon, it is only computed here"""
+        kind = classify_shape(shape)
+        num_points = None
+        if kind == ShapeKind.SIMPLE_POLYGON:
+            num_points = shape.simple_polygon.num_points()
+        elif kind == ShapeKind.POLYGON:
+            num_points = shape.polygon.num_points()
+        elif kind == ShapeKind.PATH:
+            num_points = shape.path.num_points()
+        return ShapeSummary(kind=kind, num_points=num_points, dbbox=shape.dbbox(), area=shape.area())
+
+    def describe_shape(self, shape: Optional[pya.Shape]) -> str:
+        if shape is None:
+            return 'none'
+        return self._cached(shape, shape.bbox, lambda: self._format_shape(shape))
+
+    def describe_instance(self, inst: Optional[pya.Instance]) -> str:
+        if inst is None:
+            return 'none'
+        return self._cached(self._instance_key(inst), inst.bbox, lambda: self._truncate(describe_instance(inst)))
+
+    def describe_object(self, o: pya.ObjectInstPath) -> str:
+        sh = o.shape
+        if sh is not None:
+            return self.describe_shape(sh)
+        else:
+            inst = o.inst()
+            if inst is not None:
+                return self.describe_instance(inst)
+        return "unknown"
+
+    def lazy(self, objects: Sequence[pya.ObjectInstPath]) -> LazyDescriptions:
+        return LazyDescriptions(objects=objects, describer=self)
+
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _instance_key(inst: pya.Instance) -> Tuple:
+        # NOTE: CellInstArray hashes by value (cell index, transformation, array parameters)
+        return (inst.layout(), inst.parent_cell.cell_index(), inst.cell_inst, inst.prop_id)
+
+    def _truncate(self, s: str) -> str:
+        if len(s) <= self.max_length:
+            return s
+        return s[:self.max_length - 1] + '…'
+
+    def _format_shape(self, shape: pya.Shape) -> str:
+        kind = classify_shape(shape)
+        name = describe_shape_name(shape, kind)
+        li = shape.layer_info
+        
+        if kind in (ShapeKind.POLYGON, ShapeKind.SIMPLE_POLYGON, ShapeKind.PATH):
+            if self._exceeds_max_points(shape, kind):
+                # NOTE: no exact point count, that would copy the whole polygon (see summarize_shape())
+                return self._truncate(f"{name} (layer {li}) more than {self.max_points} points, "
+                                      f"bbox {shape.dbbox()}")
+        
+        return self._truncate(f"{name} (layer {li}) {describe_shape_geometry(shape, kind)}")
+
+    def _exceeds_max_points(self, shape: pya.Shape, kind: ShapeKind) -> bool:
+        # NOTE: count at most max_points + 1 points (hull and holes), instead of formatting all of them
+        budget = self.max_points + 1
+        if kind == ShapeKind.PATH:
+            return sum(1 for _ in islice(shape.each_dpoint(), budget)) >= budget
+        budget -= sum(1 for _ in islice(shape.each_dpoint_hull(), budget))
+        if budget <= 0:
+            return True
+        if kind == ShapeKind.POLYGON:
+            hole_count = shape.holes()
+            if 3 * hole_count >= budget:  # every hole has at least 3 points
+                return True
+            for h in range(hole_count):
+                budget -= sum(1 for _ in islice(shape.each_dpoint_hole(h), budget))
+                if budget <= 0:
+                    return True
+        return False
+
+    def _cached(self, obj: Any, bbox: Callable[[], pya.Box], format: Callable[[], str]) -> str:
+        try:
+            key = (obj, self._generation)
+            hash(key)
+        except TypeError:
+            return format()  # not hashable in this KLayout version
+        
+        current_bbox = bbox()
+        entry = self._cache.get(key, None)
+        if entry is not None and entry[0] == current_bbox:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        
+        self.misses += 1
+        description = format()
+        self._cache[key] = (current_bbox, description)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return description
+
+
+class LazyDescriptions(Sequence[str]):
+    """Per-row descriptions for list views, formatted on first access."""
+
+    def __init__(self, objects: Sequence[pya.ObjectInstPath], describer: ObjectDescriber):
+        self.objects = objects
+        self.describer = describer
+        self._rows: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        row = self._rows.get(index, None)
+        if row is None:
+            row = self.describer.describe_object(self.objects[index])
+            self._rows[index] = row
+        return row
+
+
+#--------------------------------------------------------------------------------
+
+class ObjectDescriberTests(unittest.TestCase):
+    def setUp(self):
+        self.layout = pya.Layout()
+        self.top = self.layout.create_cell('TOP')
+        self.child = self.layout.create_cell('CHILD')
+        self.layer = self.layout.layer(1, 0)
+        self.child.shapes(self.layer).insert(pya.Box(0, 0, 100, 100))
+        self.top.shapes(self.layer).insert(pya.Box(0, 0, 10, 10))
+        self.top.insert(pya.CellInstArray(self.child.cell_index(), pya.Trans(5, 5)))
+
+    def _instance(self) -> pya.Instance:
+        return next(iter(self.top.each_inst()))  # a new Instance object each time
+
+    def _shape(self) -> pya.Shape:
+        return next(iter(self.top.shapes(self.layer).each()))
+
+    def test_instance_cache_hits(self):
+        describer = ObjectDescriber()
+        first = describer.describe_instance(self._instance())
+        for _ in range(2):
+            self.assertEqual(first, describer.describe_instance(self._instance()))
+        self.assertEqual((2, 1), (describer.hits, describer.misses))
+        self.assertEqual(1, len(describer._cache))
+
+    def test_shape_cache_hits(self):
+        describer = ObjectDescriber()
+        first = describer.describe_shape(self._shape())
+        self.assertEqual(first, describer.describe_shape(self._shape()))
+        self.assertEqual((1, 1), (describer.hits, describer.misses))
+
+    def test_cache_miss_after_change(self):
+        describer = ObjectDescriber()
+        before = describer.describe_instance(self._instance())
+        self._instance().transform(pya.Trans(10, 0))
+        after = describer.describe_instance(self._instance())
+        self.assertNotEqual(before, after)
+        self.assertEqual((0, 2), (describer.hits, describer.misses))
+
+    def test_cache_is_bounded(self):
+        describer = ObjectDescriber(cache_size=2)
+        shapes = self.top.shapes(self.layer)
+        for i in range(5):
+            shapes.insert(pya.Box(i * 20, 100, i * 20 + 10, 110))
+        for sh in shapes.each():
+            describer.describe_shape(sh)
+        self.assertEqual(2, len(describer._cache))
+
+    def test_large_polygon_is_summarized(self):
+        describer = ObjectDescriber(max_points=4)
+        points = [pya.Point(i * 10, (i % 2) * 10) for i in range(10)] + [pya.Point(90, -50), pya.Point(0, -50)]
+        sh = self.top.shapes(self.layer).insert(pya.Polygon(points))
+        self.assertIn('more than 4 points', describer.describe_shape(sh))
+        self.assertEqual(12, describer.summarize_shape(sh).num_points)
+
+    def test_polygon_with_many_holes_is_summarized(self):
+        describer = ObjectDescriber(max_points=16)
+        polygon = pya.Polygon(pya.Box(0, 0, 100000, 100000))
+        for i in range(2000):
+            x = (i % 50) * 1000 + 100
+            y = (i // 50) * 1000 + 100
+            polygon.insert_hole(pya.Box(x, y, x + 500, y + 500))
+        sh = self.top.shapes(self.layer).insert(polygon)
+        self.assertEqual(ShapeKind.POLYGON, classify_shape(sh))
+        self.assertIn('more than 16 points', describer.describe_shape(sh))
+
+    def test_polygon_with_few_holes_is_described(self):
+        describer = ObjectDescriber(max_points=16)
+        polygon = pya.Polygon(pya.Box(0, 0, 1000, 1000))
+        polygon.insert_hole(pya.Box(100, 100, 200, 200))
+        sh = self.top.shapes(self.layer).insert(polygon)
+        self.assertNotIn('more than', describer.describe_shape(sh))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -24,6 +24,81 @@ from typing import *
 import unittest
 
 
+class SuffixMatcher:
+    """
+    Compiled form of an allowed_suffixes list, see stem_without_suffixes().
+    Build once per suffix set (or use for_suffixes(), which caches),
+    then match many file names.
+    """
+
+    _cache: Dict[Tuple[str, ...], SuffixMatcher] = {}
+
+    def __init__(self, allowed_suffixes: Iterable[str]):
+        self.allowed_suffixes = tuple(allowed_suffixes)
+        # NOTE: stable sort, so the result is the same as in the original stem_without_suffixes()
+        self._descending_len_suffixes = tuple(sorted(self.allowed_suffixes, key=len, reverse=True))
+        self._any_suffix = tuple(s for s in self._descending_len_suffixes if s)
+        self._has_empty_suffix = '' in self.allowed_suffixes
+
+    @classmethod
+    def for_suffixes(cls, allowed_suffixes: Iterable[str]) -> SuffixMatcher:
+        key = tuple(allowed_suffixes)
+        matcher = cls._cache.get(key, None)
+        if matcher is None:
+            if len(cls._cache) > 64:
+                cls._cache.clear()
+            matcher = SuffixMatcher(key)
+            cls._cache[key] = matcher
+        return matcher
+
+    def match(self, name: str) -> Optional[Tuple[str, str]]:
+        """
+        Returns (stem, suffix) for the longest matching allowed suffix of the file name,
+        or None if none matches.
+        """
+        # NOTE: one C-level endswith() rejects the bulk of non-matching names
+        if self._any_suffix and name.endswith(self._any_suffix):
+            for suffix in self._descending_len_suffixes:
+                if name.endswith(suffix):
+                    return name[:-len(suffix)] if suffix else '', suffix
+        if self._has_empty_suffix:
+            return '', ''  # quirk of name[:-0], kept for compatibility
+        return None
+
+    @staticmethod
+    def _name(path: Union[str, Path]) -> str:
+        if isinstance(path, str) and '/' not in path and os.sep not in path and path not in ('', '.', '..'):
+            return path  # fast path: already a plain file name
+        return Path(path).name
+
+    @staticmethod
+    def _pathlib_stem(name: str) -> str:
+        i = name.rfind('.')
+        if 0 < i < len(name) - 1:
+            return name[:i]
+        return name
+
+    def stem(self, path: Union[str, Path]) -> str:
+        name = self._name(path)
+        m = self.match(name)
+        if m is not None:
+            return m[0]
+        return self._pathlib_stem(name)  # fallback: just strip last suffix
+
+    def match_many(self, names: Iterable[str]) -> List[Tuple[str, Optional[str]]]:
+        """
+        Batch variant for plain file names (e.g. from os.scandir),
+        returns (stem, matched suffix) pairs, the suffix is None where the fallback was used.
+        """
+        match = self.match
+        pathlib_stem = self._pathlib_stem
+        result = []
+        for name in names:
+            m = match(name)
+            result.append(m if m is not None else (pathlib_stem(name), None))
+        return result
+
+
 def stem_without_suffixes(path: Union[str, Path], allowed_suffixes: List[str]) -> str:
     """
     Normal pathlib.Path.stem would return 'layout.gds' for 'layout.gds.gz',
@@ -31,12 +106,7 @@ def stem_without_suffixes(path: Union[str, Path], allowed_suffixes: List[str]) -
     
     Return filename with any known hierarchical layout suffix removed.
     """
-    path = Path(path)
-    descending_len_suffixes = sorted(list(allowed_suffixes), key=len, reverse=True)
-    for suffix in descending_len_suffixes:
-        if path.name.endswith(suffix):
-            return path.name[: -len(suffix)]
-    return path.stem  # fallback: just strip last suffix
+    return SuffixMatcher.for_suffixes(allowed_suffixes).stem(path)
 
 
 # deprecated
@@ -86,6 +156,114 @@ def abbreviate_path(path: Union[str, Path],
     return shortest
 
 
+class PathAbbreviator:
+    """
+    Batch variant of abbreviate_path().
+
+    Environment variables and the base folder are resolved once,
+    and put into a trie over their path parts. Abbreviating a path then
+    only walks the trie along the path's parts (pure string work,
+    unless resolve_paths is True, where each path is resolved with syscalls).
+
+    The environment is checked once per abbreviate_many() call,
+    the index is rebuilt when one of the variables changed.
+    """
+
+    _BASE = 0  # priority of the base folder candidate (same order as in abbreviate_path)
+
+    def __init__(self,
+                 env_vars: Optional[List[str]],
+                 base_folder: Optional[Union[str, Path]],
+                 resolve_paths: bool = False):
+        self.env_vars = list(env_vars or [])
+        self.base_folder = base_folder
+        self.resolve_paths = resolve_paths
+        self._env_snapshot: Dict[str, Optional[str]] = {}
+        self._trie: Dict[str, Any] = {}
+        self.rebuild()
+
+    def _normalize(self, path: Union[str, Path]) -> str:
+        if self.resolve_paths:
+            return str(Path(path).expanduser().resolve())
+        return os.path.abspath(os.path.expanduser(str(path)))
+
+    @staticmethod
+    def _split_parts(normalized: str) -> Tuple[str, ...]:
+        drive, rest = os.path.splitdrive(normalized)
+        if os.altsep:
+            rest = rest.replace(os.altsep, os.sep)
+        root = drive + os.sep if rest.startswith(os.sep) else drive
+        parts = tuple(p for p in rest.split(os.sep) if p)
+        return ((root,) if root else ()) + parts
+
+    def is_stale(self) -> bool:
+        return any(os.getenv(var) != val for var, val in self._env_snapshot.items())
+
+    def rebuild(self):
+        """(Re-)resolve base folder and environment variables."""
+        self._env_snapshot = {var: os.getenv(var) for var in self.env_vars}
+        self._trie = {}
+        
+        if self.base_folder:
+            for base in self._prefix_forms(self.base_folder):
+                self._insert(self._split_parts(base), (self._BASE, None))
+        
+        for priority, var in enumerate(self.env_vars, start=1):
+            val = self._env_snapshot[var]
+            if not val:
+                continue
+            for val_path in self._prefix_forms(val):
+                self._insert(self._split_parts(val_path), (priority, var))
+
+    def _prefix_forms(self, prefix: Union[str, Path]) -> List[str]:
+        # NOTE: abbreviate_path() resolves both sides, so a path below a symlinked prefix is abbreviated.
+        #       Without resolve_paths, the paths are only made absolute,
+        #       so the prefix is indexed both resolved and in the same (unresolved) form
+        resolved = str(Path(prefix).expanduser().resolve())
+        if self.resolve_paths:
+            return [resolved]
+        normalized = self._normalize(prefix)
+        return [resolved] if normalized == resolved else [resolved, normalized]
+
+    def _insert(self, parts: Tuple[str, ...], candidate: Tuple[int, Optional[str]]):
+        node = self._trie
+        for part in parts:
+            node = node.setdefault(part, {})
+        node.setdefault(None, []).append(candidate)  # key None holds the candidates ending here
+
+    def abbreviate(self, path: Union[str, Path]) -> str:
+        normalized = self._normalize(path)
+        parts = self._split_parts(normalized)
+        
+        # (part count, priority, abbreviation), the full path has the lowest priority
+        best = (len(parts), len(self.env_vars) + 1, normalized)
+        
+        node = self._trie
+        for depth in range(len(parts) + 1):
+            for priority, var in node.get(None, ()):
+                rel_parts = parts[depth:]
+                if var is None:
+                    abbrev = os.sep.join(rel_parts) if rel_parts else '.'
+                    count = len(rel_parts)
+                else:
+                    abbrev = f"${var}/{os.sep.join(rel_parts)}" if rel_parts else f"${var}"
+                    count = 1 + len(rel_parts)
+                candidate = (count, priority, abbrev)
+                if candidate[:2] < best[:2]:
+                    best = candidate
+            if depth == len(parts):
+                break
+            node = node.get(parts[depth], None)
+            if node is None:
+                break
+        return best[2]
+
+    def abbreviate_many(self, paths: Iterable[Union[str, Path]]) -> List[str]:
+        if self.is_stale():
+            self.rebuild()
+        return [self.abbreviate(p) for p in paths]
+
+
 def normalize_path(path: Path) -> Path:
     """
     Collapse '.' and '..' without following symlinks.
@@ -150,6 +328,99 @@ def rebase_relative_path(relative_path: str | Path,
     return new_relative_path
 
 
+def _normalize_parts(parts: Tuple[str, ...]) -> Tuple[str, ...]:
+    """normalize_path() on a parts tuple"""
+    result = []
+    for part in parts:
+        if part == ".":
+            continue
+        elif part == "..":
+            if result and result[-1] != "..":
+                result.pop()
+            else:
+                result.append("..")
+        else:
+            result.append(part)
+    return tuple(result)
+
+
+def _path_parts(path: Union[str, Path]) -> Tuple[str, ...]:
+    """Path(path).parts, with a string-only fast path for plain POSIX paths"""
+    if isinstance(path, str) and os.name == 'posix' and not path.startswith('//'):
+        parts = tuple(p for p in path.split('/') if p and p != '.')
+        return ('/',) + parts if path.startswith('/') else parts
+    return Path(path).parts
+
+
+def rebase_relative_paths(relative_paths: Iterable[str | Path],
+                          old_base_folder: str | Path,
+                          new_base_folder: str | Path,
+                          as_strings: bool = False) -> List[Path] | List[str]:
+    """
+    Batch variant of rebase_relative_path() with the same semantics,
+    e.g. for relocating a project with thousands of referenced layouts.
+
+    The bases are normalized once, the work is done on parts tuples,
+    and the relative path of each target directory is computed only once.
+    """
+    old_base = Path(old_base_folder)
+    old_base_parts = old_base.parts
+    new_base = normalize_path(Path(new_base_folder))
+    new_base_parts = new_base.parts
+    new_base_drive = new_base.drive
+    
+    dir_cache: Dict[Tuple[str, ...], Tuple[int, Tuple[str, ...]]] = {}
+
+    def relative_parts(target: Tuple[str, ...]) -> Tuple[str, ...]:
+        # pathlib_relpath() on parts tuples
+        n = min(len(target), len(new_base_parts))
+        i = 0
+        while i < n and target[i] == new_base_parts[i]:
+            i += 1
+        return ('..',) * (len(new_base_parts) - i) + target[i:]
+    
+    results = []
+    for relative_path in relative_paths:
+        parts = _path_parts(relative_path)
+        is_absolute = Path(relative_path).is_absolute() if os.name != 'posix' \
+                      else bool(parts) and parts[0].startswith('/')
+        target = _normalize_parts(parts if is_absolute else old_base_parts + parts)
+        
+        if os.name != 'posix' and Path(*target).drive != new_base_drive:
+            results.append(str(Path(*target)) if as_strings else Path(*target))
+            continue
+        
+        rel = None
+        if target:
+            directory, name = target[:-1], target[-1]
+            cached = dir_cache.get(directory, None)
+            if cached is None:
+                n = min(len(directory), len(new_base_parts))
+                i = 0
+                while i < n and directory[i] == new_base_parts[i]:
+                    i += 1
+                cached = (i, ('..',) * (len(new_base_parts) - i) + directory[i:])
+                dir_cache[directory] = cached
+            common, dir_rel = cached
+            if common == len(directory) and len(new_base_parts) > common and new_base_parts[common] == name:
+                rel = relative_parts(target)  # the file name itself continues the common prefix
+            else:
+                rel = dir_rel + (name,)
+        else:
+            rel = relative_parts(target)
+        
+        if as_strings:
+            if not rel:
+                results.append('.')
+            elif any(os.sep in p or (os.altsep and os.altsep in p) for p in rel):
+                results.append(str(Path(*rel)))  # a root part, let pathlib decide
+            else:
+                results.append(os.sep.join(rel))
+        else:
+            results.append(Path(*rel) if rel else Path('.'))
+    return results
+
+
 #--------------------------------------------------------------------------------
 
 class PathHelperTests(unittest.TestCase):
@@ -161,6 +432,39 @@ class PathHelperTests(unittest.TestCase):
         self.assertEqual('layout', stem_without_suffixes('layout.klay.gds.gz', allowed_suffixes))
         self.assertEqual('layout', stem_without_suffixes('/tmp/layout.klay.gds.gz', allowed_suffixes))
         
+    @staticmethod
+    def _reference_stem_without_suffixes(path: Union[str, Path], allowed_suffixes: List[str]) -> str:
+        path = Path(path)
+        descending_len_suffixes = sorted(list(allowed_suffixes), key=len, reverse=True)
+        for suffix in descending_len_suffixes:
+            if path.name.endswith(suffix):
+                return path.name[: -len(suffix)]
+        return path.stem
+
+    def test_suffix_matcher__edge_cases(self):
+        allowed_suffixes = ('.gds', '.gds.gz', '.oas')
+        for p in ('.gds', 'layout', 'layout.txt', 'layout.', '.hidden', 'a.b.c.gds.gz',
+                  '/tmp/dir/', '/tmp/dir.gds/', '', '.', 'dir/..', Path('/tmp/x.oas')):
+            self.assertEqual(self._reference_stem_without_suffixes(p, allowed_suffixes),
+                             stem_without_suffixes(p, allowed_suffixes), repr(p))
+        self.assertEqual('', stem_without_suffixes('layout.txt', ('.gds', '')))
+
+    def test_suffix_matcher__100k_entries(self):
+        import time
+        allowed_suffixes = ('.gds', '.gds.gz', '.klay.gds', '.klay.gds.gz', '.oas', '.oas.gz')
+        extensions = allowed_suffixes + ('.txt', '.lyp', '')
+        names = [f"cell_{i}{extensions[i % len(extensions)]}" for i in range(100_000)]
+
+        t0 = time.perf_counter()
+        expected = [self._reference_stem_without_suffixes(n, allowed_suffixes) for n in names]
+        t1 = time.perf_counter()
+        obtained = [stem for stem, suffix in SuffixMatcher(allowed_suffixes).match_many(names)]
+        t2 = time.perf_counter()
+
+        self.assertEqual(expected, obtained)
+        if os.getenv('KLAYOUT_PLUGIN_UTILS_BENCHMARK'):
+            print(f"\nstem_without_suffixes (reference): {t1 - t0:.3f}s, SuffixMatcher.match_many: {t2 - t1:.3f}s")
+        
     def test_expand_path(self):
         self.assertEqual(f"{os.environ['HOME']}/layout.gds", str(expand_path('$HOME/layout.gds')))
         self.assertEqual(f"{os.environ['HOME']}/layout.gds", str(expand_path('~/layout.gds')))
@@ -186,6 +490,45 @@ class PathHelperTests(unittest.TestCase):
             base_folder=f"{os.environ['HOME']}/base_folder/"
         )))
         
+    def test_path_abbreviator__matches_abbreviate_path(self):
+        home = os.environ['HOME']
+        abbreviator = PathAbbreviator(env_vars=['HOME', 'PWD'], base_folder=f"{home}/base_folder/")
+        for p in (f"{home}/layout.gds",
+                  f"{home}/base_folder/layout.gds",
+                  f"{home}/base_folder",
+                  f"{home}",
+                  '/tmp/layout.gds',
+                  '/'):
+            self.assertEqual(str(abbreviate_path(path=p, env_vars=['HOME', 'PWD'], base_folder=f"{home}/base_folder/")),
+                             abbreviator.abbreviate(p))
+
+    def test_path_abbreviator__env_change(self):
+        os.environ['KLAYOUT_PLUGIN_UTILS_TEST_DIR'] = '/tmp'
+        try:
+            abbreviator = PathAbbreviator(env_vars=['KLAYOUT_PLUGIN_UTILS_TEST_DIR'], base_folder=None)
+            self.assertEqual(['$KLAYOUT_PLUGIN_UTILS_TEST_DIR/a.gds'], abbreviator.abbreviate_many(['/tmp/a.gds']))
+            os.environ['KLAYOUT_PLUGIN_UTILS_TEST_DIR'] = '/var'
+            self.assertEqual(['/tmp/a.gds'], abbreviator.abbreviate_many(['/tmp/a.gds']))
+        finally:
+            del os.environ['KLAYOUT_PLUGIN_UTILS_TEST_DIR']
+
+    def test_path_abbreviator__symlinked_env_var(self):
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            target = os.path.join(tmp, 'target')
+            os.makedirs(os.path.join(target, 'proj'))
+            link = os.path.join(tmp, 'link')
+            os.symlink(target, link)
+            os.environ['KLAYOUT_PLUGIN_UTILS_TEST_DIR'] = link
+            try:
+                abbreviator = PathAbbreviator(env_vars=['KLAYOUT_PLUGIN_UTILS_TEST_DIR'], base_folder=None)
+                for p in (f"{link}/proj/a.gds", f"{target}/proj/a.gds"):
+                    self.assertEqual('$KLAYOUT_PLUGIN_UTILS_TEST_DIR/proj/a.gds', abbreviator.abbreviate(p))
+                    self.assertEqual(str(abbreviate_path(path=p, env_vars=['KLAYOUT_PLUGIN_UTILS_TEST_DIR'], base_folder=None)),
+                                     abbreviator.abbreviate(p))
+            finally:
+                del os.environ['KLAYOUT_PLUGIN_UTILS_TEST_DIR']
+
     def test_rebase_relative_path(self):
         self.assertEqual('../layout.gds', str(rebase_relative_path(
             relative_path='../layout.gds',
@@ -200,6 +543,35 @@ class PathHelperTests(unittest.TestCase):
         )))
 
 
+    def test_rebase_relative_paths__matches_rebase_relative_path(self):
+        home = os.environ['HOME']
+        relative_paths = ['../layout.gds', 'subdir/layout.gds', './a/../b/c.gds', '/abs/x.gds',
+                          'base_folder2', 'base_folder2/x.gds', '../base_folder2', '../../..', '', '.',
+                          Path('p/q.gds')]
+        for old_base, new_base in ((f"{home}/base_folder1/", f"{home}/base_folder2/"),
+                                   (f"{home}/base_folder1/", '/tmp/base_folder2/'),
+                                   ('rel/base', 'rel/other'),
+                                   ('/', '/x/y')):
+            expected = [rebase_relative_path(p, old_base, new_base) for p in relative_paths]
+            self.assertEqual(expected, rebase_relative_paths(relative_paths, old_base, new_base))
+            self.assertEqual([str(p) for p in expected],
+                             rebase_relative_paths(relative_paths, old_base, new_base, as_strings=True))
+
+    def test_rebase_relative_paths__50k(self):
+        import time
+        relative_paths = [f"../lib{i % 100}/cells/cell{i}.gds" for i in range(50_000)]
+        t0 = time.perf_counter()
+        expected = [str(rebase_relative_path(p, '/projects/a/layout', '/projects/b/new/layout'))
+                    for p in relative_paths]
+        t1 = time.perf_counter()
+        obtained = rebase_relative_paths(relative_paths, '/projects/a/layout', '/projects/b/new/layout',
+                                         as_strings=True)
+        t2 = time.perf_counter()
+        self.assertEqual(expected, obtained)
+        if os.getenv('KLAYOUT_PLUGIN_UTILS_BENCHMARK'):
+            print(f"\nrebase_relative_path (per path): {t1 - t0:.3f}s, rebase_relative_paths: {t2 - t1:.3f}s")
+
+
 #--------------------------------------------------------------------------------
 
 if __name__ == "__main__":
@@ -22,6 +22,8 @@ import traceback
 
 import pya
 
+from klayout_plugin_utils.str_enum_compat import DualStrEnum, StrEnum
+
 
 def qt_major_version() -> int:
     qt_major = int(pya.Qt.QT_VERSION_STR.split('.')[0])
@@ -53,6 +55,34 @@ def compat_QTreeWidgetItem_setBackground(tvi: pya.QTreeWidgetItem,
         raise NotImplementedError()
 
 
+def combo_box_labels(enum_cls: Type[StrEnum]) -> List[str]:
+    if issubclass(enum_cls, DualStrEnum):
+        return [m.ui_label for m in enum_cls.members_list]
+    return [m.value for m in enum_cls.members_list]
+
+
+def fill_combo_box_with_enum(combo: pya.QComboBox,
+                             enum_cls: Type[StrEnum],
+                             current: Optional[StrEnum] = None):
+    """
+    Fill combo box with all members (UI labels for DualStrEnum),
+    in one addItems() call, item index == index in enum_cls.members_list
+    """
+    combo.clear()
+    combo.addItems(combo_box_labels(enum_cls))
+    if current is not None:
+        combo.setCurrentIndex(enum_cls.members_list.index(current))
+
+
+def enum_from_combo_box(combo: pya.QComboBox, enum_cls: Type[StrEnum]) -> Optional[StrEnum]:
+    """Counterpart of fill_combo_box_with_enum()"""
+    i = combo.currentIndex
+    members = enum_cls.members_list
+    if 0 <= i < len(members):
+        return members[i]
+    return None
+
+
 def qmessagebox(icon: pya.QMessageBox_Icon,
                window_title: str, 
                text: str, 
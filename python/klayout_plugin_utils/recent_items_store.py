@@ -0,0 +1,325 @@
+# --------------------------------------------------------------------------------
+# SPDX-FileCopyrightText: 2026 Martin Jan Köhler
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+# SPDX-License-Identifier: GPL-3.0-or-later
+#--------------------------------------------------------------------------------
+
+#--------------------------------------------------------------------------------
+# File-backed store of recently used items (e.g. file paths),
+# shared by several plugins through namespaces (e.g. "my_plugin/lru_runsets").
+#
+# Storage is an append-only JSON lines log:
+#    {"op": "push",  "ns": ..., "item": ..., "t": ...}
+#    {"op": "set",   "ns": ..., "item": ..., "count": ..., "t": ...}   (written by compaction)
+#    {"op": "remove", "ns": ..., "item": ...}
+#    {"op": "clear", "ns": ...}
+#
+# The log is compacted (rewritten atomically with one "set" line per item)
+# once it has grown well beyond the number of live items.
+#--------------------------------------------------------------------------------
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+import heapq
+import json
+import os
+from pathlib import Path
+import threading
+import time
+from typing import *
+import unittest
+
+
+@dataclass
+class RecentItemStats:
+    count: int
+    last_used: float  # seconds since epoch
+
+
+class RecentItemsQueries(ABC):
+    """
+    Queries shared by RecentItemsStore and SharedRecentFilesStore,
+    subclasses provide self._lock and _namespace_items().
+    """
+
+    # NOTE: frecency = count * 0.5 ** (age / half life)
+    FRECENCY_HALF_LIFE_S = 7 * 24 * 3600.0
+
+    _lock: threading.RLock
+
+    @abstractmethod
+    def _namespace_items(self, namespace: str) -> Optional[OrderedDict[str, RecentItemStats]]:
+        """Least recent first, called with self._lock held."""
+
+    def items(self, namespace: str, limit: Optional[int] = None) -> List[str]:
+        """Most recent first."""
+        with self._lock:
+            ns = self._namespace_items(namespace)
+            if not ns:
+                return []
+            it = reversed(ns)
+            if limit is None:
+                return list(it)
+            return [item for _, item in zip(range(limit), it)]
+
+    def stats(self, namespace: str, item: str) -> Optional[RecentItemStats]:
+        with self._lock:
+            ns = self._namespace_items(namespace)
+            if not ns:
+                return None
+            return ns.get(item, None)
+
+    def frecency(self, stats: RecentItemStats, now: Optional[float] = None) -> float:
+        if now is None:
+            now = time.time()
+        age = max(0.0, now - stats.last_used)
+        return stats.count * 0.5 ** (age / self.FRECENCY_HALF_LIFE_S)
+
+    def ranked(self, namespace: str, limit: Optional[int] = None, now: Optional[float] = None) -> List[str]:
+        """Items ordered by frecency (frequency and recency combined), best first."""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            ns = self._namespace_items(namespace)
+            if not ns:
+                return []
+            scored = ((self.frecency(s, now), item) for item, s in ns.items())
+            if limit is None:
+                best = sorted(scored, reverse=True)
+            else:
+                best = heapq.nlargest(limit, scored)
+            return [item for _, item in best]
+
+
+class RecentItemsStore(RecentItemsQueries):
+    _shared: Dict[str, RecentItemsStore] = {}
+
+    def __init__(self,
+                 path: str | Path,
+                 max_items_per_namespace: int = 5000,
+                 compaction_slack: int = 1000):
+        self.path = Path(path)
+        self.max_items_per_namespace = max_items_per_namespace
+        self.compaction_slack = compaction_slack
+        self._lock = threading.RLock()
+        self._namespaces: Dict[str, OrderedDict[str, RecentItemStats]] = {}  # least recent first
+        self._log_lines = 0
+        self._load()
+
+    @classmethod
+    def shared(cls, path: str | Path) -> RecentItemsStore:
+        """One store instance per file, shared by all plugins of this process."""
+        key = str(Path(path).expanduser().absolute())
+        store = cls._shared.get(key, None)
+        if store is None:
+            store = RecentItemsStore(key)
+            cls._shared[key] = store
+        return store
+
+    def _namespace_items(self, namespace: str) -> Optional[OrderedDict[str, RecentItemStats]]:
+        return self._namespaces.get(namespace, None)
+
+    # ------------------------------------------------------------------
+    # Modifications (appended to the log)
+    #
+    # NOTE: the in-memory state is always updated,
+    #       the methods return False if the log could not be written (e.g. read-only home, disk full)
+    # ------------------------------------------------------------------
+
+    def push(self, namespace: str, item: str, timestamp: Optional[float] = None) -> bool:
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            self._apply_push(namespace, item, timestamp)
+            return self._append({'op': 'push', 'ns': namespace, 'item': item, 't': timestamp})
+
+    def remove(self, namespace: str, item: str) -> bool:
+        with self._lock:
+            ns = self._namespaces.get(namespace, None)
+            if ns is None or item not in ns:
+                return True
+            del ns[item]
+            return self._append({'op': 'remove', 'ns': namespace, 'item': item})
+
+    def clear(self, namespace: str) -> bool:
+        with self._lock:
+            self._namespaces.pop(namespace, None)
+            return self._append({'op': 'clear', 'ns': namespace})
+
+    def compact(self) -> bool:
+        with self._lock:
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                lines = 0
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    for namespace, ns in self._namespaces.items():
+                        for item, s in ns.items():
+                            f.write(json.dumps({'op': 'set', 'ns': namespace, 'item': item,
+                                                'count': s.count, 't': s.last_used}) + '\n')
+                            lines += 1
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print("RecentItemsStore.compact() caught an exception", e)
+                try:
+                    tmp_path.unlink()
+                except OSError:
+                    pass
+                return False
+            self._log_lines = lines
+            return True
+
+    # ------------------------------------------------------------------
+    # Private helpers
+    # ------------------------------------------------------------------
+
+    def _live_items(self) -> int:
+        return sum(len(ns) for ns in self._namespaces.values())
+
+    def _apply_push(self, namespace: str, item: str, timestamp: float, count_increment: int = 1):
+        ns = self._namespaces.setdefault(namespace, OrderedDict())
+        s = ns.get(item, None)
+        if s is None:
+            ns[item] = RecentItemStats(count=count_increment, last_used=timestamp)
+        else:
+            s.count += count_increment
+            s.last_used = max(s.last_used, timestamp)
+            ns.move_to_end(item)
+        while len(ns) > self.max_items_per_namespace:
+            ns.popitem(last=False)
+
+    def _apply(self, record: Dict[str, Any]):
+        op = record.get('op')
+        namespace = record['ns']
+        if op == 'push':
+            self._apply_push(namespace, record['item'], float(record['t']))
+        elif op == 'set':
+            self._apply_push(namespace, record['item'], float(record['t']), int(record['count']))
+        elif op == 'remove':
+            self._namespaces.get(namespace, {}).pop(record['item'], None)
+        elif op == 'clear':
+            self._namespaces.pop(namespace, None)
+
+    def _load(self):
+        self._namespaces = {}
+        self._log_lines = 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    self._log_lines += 1
+                    try:
+                        self._apply(json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        pass  # skip corrupt lines (e.g. truncated by a crash)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print("RecentItemsStore._load() caught an exception", e)
+
+    def _append(self, record: Dict[str, Any]) -> bool:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+        except OSError as e:
+            print("RecentItemsStore._append() caught an exception", e)
+            return False
+        self._log_lines += 1
+        if self._log_lines > 2 * self._live_items() + self.compaction_slack:
+            self.compact()
+        return True
+
+
+#--------------------------------------------------------------------------------
+
+class RecentItemsStoreTests(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / 'recent.jsonl'
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_push_order(self):
+        store = RecentItemsStore(self.path)
+        store.push('ns', 'a')
+        store.push('ns', 'b')
+        store.push('ns', 'a')
+        self.assertEqual(['a', 'b'], store.items('ns'))
+        self.assertEqual(['a'], store.items('ns', limit=1))
+        self.assertEqual(2, store.stats('ns', 'a').count)
+
+    def test_namespaces_are_separate(self):
+        store = RecentItemsStore(self.path)
+        store.push('ns1', 'a')
+        store.push('ns2', 'b')
+        store.clear('ns1')
+        self.assertEqual([], store.items('ns1'))
+        self.assertEqual(['b'], store.items('ns2'))
+
+    def test_reload(self):
+        store = RecentItemsStore(self.path)
+        store.push('ns', 'a', timestamp=1.0)
+        store.push('ns', 'b', timestamp=2.0)
+        store.push('ns', 'c', timestamp=3.0)
+        store.remove('ns', 'b')
+        reloaded = RecentItemsStore(self.path)
+        self.assertEqual(['c', 'a'], reloaded.items('ns'))
+
+    def test_compaction_keeps_state(self):
+        store = RecentItemsStore(self.path, compaction_slack=10)
+        for i in range(100):
+            store.push('ns', f"item{i % 3}", timestamp=float(i))
+        with open(self.path) as f:
+            self.assertLess(len(f.readlines()), 20)
+        reloaded = RecentItemsStore(self.path)
+        self.assertEqual(store.items('ns'), reloaded.items('ns'))
+        self.assertEqual(34, reloaded.stats('ns', 'item0').count)
+
+    def test_capacity(self):
+        store = RecentItemsStore(self.path, max_items_per_namespace=3)
+        for item in 'abcde':
+            store.push('ns', item)
+        self.assertEqual(['e', 'd', 'c'], store.items('ns'))
+
+    def test_ranked(self):
+        store = RecentItemsStore(self.path)
+        now = 1000.0 * RecentItemsStore.FRECENCY_HALF_LIFE_S
+        for _ in range(5):
+            store.push('ns', 'often_but_old', timestamp=now - 4 * RecentItemsStore.FRECENCY_HALF_LIFE_S)
+        store.push('ns', 'once_recent', timestamp=now)
+        for _ in range(3):
+            store.push('ns', 'often_recent', timestamp=now - 60)
+        self.assertEqual(['often_recent', 'once_recent', 'often_but_old'], store.ranked('ns', now=now))
+        self.assertEqual(['often_recent'], store.ranked('ns', limit=1, now=now))
+
+    def test_unwritable_log_is_reported_not_raised(self):
+        self.path.write_text('')
+        store = RecentItemsStore(self.path / 'recent.jsonl', compaction_slack=0)  # parent is a file
+        self.assertFalse(store.push('ns', 'a'))
+        self.assertFalse(store.compact())
+        self.assertEqual(['a'], store.items('ns'))  # still usable for this session
+
+    def test_queries_are_abstract(self):
+        with self.assertRaises(TypeError):
+            RecentItemsQueries()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+# --------------------------------------------------------------------------------
+# SPDX-FileCopyrightText: 2026 Martin Jan Köhler
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+# SPDX-License-Identifier: GPL-3.0-or-later
+#--------------------------------------------------------------------------------
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import os
+from typing import *
+import unittest
+
+import pya
+
+from klayout_plugin_utils.debugging import debug, Debugging
+from klayout_plugin_utils.layer_list_resolver import resolve_layer_list
+from klayout_plugin_utils.layer_list_string import LayerList
+from klayout_plugin_utils.str_enum_compat import StrEnum
+
+
+"""
+Merged regions for all layers of a LayerList, computed on all cores.
+
+Usage example
+-------------
+    layer_list = LayerList.parse_layer_list_string('met* via*').result
+    extracted = extract_merged_regions(layout, top_cell, layer_list, tile_size_um=200.0)
+    for layer_index, region in extracted.regions.items():
+        ...
+
+NOTE: the work is done by KLayout's worker threads, but the call blocks until all of them are done,
+      pya objects must not be used from Python threads (see BackgroundWorker).
+"""
+
+
+class RegionExtractionMode(StrEnum):
+    TILED = 'tiled'  # flat, pya.TilingProcessor, all layers in one job, tiles distributed over the threads
+    DEEP = 'deep'    # hierarchical, pya.DeepShapeStore, keeps the cell hierarchy
+
+
+@dataclass
+class ExtractedRegions:
+    regions: Dict[int, pya.Region] = field(default_factory=dict)  # layer index → merged region
+    deep_shape_store: Optional[pya.DeepShapeStore] = None  # DEEP mode: must outlive the regions
+
+
+def default_thread_count() -> int:
+    return os.cpu_count() or 1
+
+
+def _tiling_script(layer_count: int) -> str:
+    # NOTE: _output clips to the tile, the pieces are merged again once all tiles are done
+    return '; '.join(f"_output(o{i}, i{i}.merged)" for i in range(layer_count))
+
+
+def extract_merged_regions(layout: pya.Layout,
+                           top_cell: pya.Cell,
+                           layer_list: LayerList,
+                           threads: Optional[int] = None,
+                           tile_size_um: Optional[float] = 500.0,
+                           tile_border_um: float = 0.0,
+                           mode: RegionExtractionMode = RegionExtractionMode.TILED,
+                           merge_tiles: bool = True) -> ExtractedRegions:
+    """
+    Merged region of every layer of layer_list (see resolve_layer_list),
+    flattened from top_cell down through the whole hierarchy.
+
+    threads defaults to the number of CPUs,
+    tile_size_um None means a single tile (TILED mode, no parallelism across tiles).
+
+    TILED mode: merge_tiles joins the pieces along the tile boundaries afterwards,
+                NOTE: this runs on a single thread, over the whole layer.
+                Pass False to get the tile-clipped pieces instead (merged within each tile,
+                same area, but polygons crossing tile boundaries are split).
+    """
+    if threads is None:
+        threads = default_thread_count()
+    layer_indices = resolve_layer_list(layer_list, layout)
+    if not layer_indices:
+        return ExtractedRegions()
+
+    if Debugging.DEBUG:
+        debug(f"extract_merged_regions: {len(layer_indices)} layers, mode {mode}, "
+              f"{threads} threads, tile size {tile_size_um} µm")
+
+    if mode == RegionExtractionMode.TILED:
+        return _extract_tiled(layout, top_cell, layer_indices, threads, tile_size_um, tile_border_um, merge_tiles)
+    elif mode == RegionExtractionMode.DEEP:
+        return _extract_deep(layout, top_cell, layer_indices, threads)
+    else:
+        raise NotImplementedError(f"unknown RegionExtractionMode {mode}")
+
+
+def _extract_tiled(layout: pya.Layout,
+                   top_cell: pya.Cell,
+                   layer_indices: List[int],
+                   threads: int,
+                   tile_size_um: Optional[float],
+                   tile_border_um: float,
+                   merge_tiles: bool) -> ExtractedRegions:
+    tp = pya.TilingProcessor()
+    tp.dbu = layout.dbu
+    tp.threads = threads
+    if tile_size_um is not None:
+        tp.tile_size(tile_size_um, tile_size_um)
+    if tile_border_um > 0.0:
+        tp.tile_border(tile_border_um, tile_border_um)
+
+    regions = {}
+    for i, li in enumerate(layer_indices):
+        tp.input(f"i{i}", layout.begin_shapes(top_cell, li))
+        region = pya.Region()
+        tp.output(f"o{i}", region)
+        regions[li] = region
+
+    tp.queue(_tiling_script(len(layer_indices)))
+    tp.execute('Extracting merged regions')
+
+    if merge_tiles:
+        for region in regions.values():
+            region.merge()  # join the pieces along the tile boundaries
+    return ExtractedRegions(regions=regions)
+
+
+def _extract_deep(layout: pya.Layout,
+                  top_cell: pya.Cell,
+                  layer_indices: List[int],
+                  threads: int) -> ExtractedRegions:
+    dss = pya.DeepShapeStore()
+    dss.threads = threads
+    regions = {li: pya.Region(layout.begin_shapes(top_cell, li), dss).merged()
+               for li in layer_indices}
+    return ExtractedRegions(regions=regions, deep_shape_store=dss)
+
+
+#--------------------------------------------------------------------------------
+
+class RegionExtractionTests(unittest.TestCase):
+    def setUp(self):
+        self.layout = pya.Layout()
+        self.layout.dbu = 0.001
+        self.top = self.layout.create_cell('TOP')
+        child = self.layout.create_cell('CHILD')
+        self.metal1 = self.layout.layer(1, 0, 'metal1')
+        self.metal2 = self.layout.layer(2, 0, 'metal2')
+        self.layout.layer(3, 0, 'via1')
+
+        # metal1: two overlapping boxes in the child (one polygon of 15 x 10 µm after merging),
+        #         placed 3 times, the last two placements touch and merge as well
+        child.shapes(self.metal1).insert(pya.Box(0, 0, 10000, 10000))
+        child.shapes(self.metal1).insert(pya.Box(5000, 0, 15000, 10000))
+        for x in (0, 100000, 115000):
+            self.top.insert(pya.CellInstArray(child.cell_index(), pya.Trans(x, 0)))
+        # metal2: a long wire crossing many tiles
+        self.top.shapes(self.metal2).insert(pya.Box(0, 50000, 300000, 51000))
+
+        self.layer_list = LayerList.parse_layer_list_string('met*').result
+
+    def _check(self, extracted: ExtractedRegions):
+        self.assertEqual({self.metal1, self.metal2}, set(extracted.regions.keys()))
+        metal1 = extracted.regions[self.metal1]
+        metal2 = extracted.regions[self.metal2]
+        self.assertEqual(3 * 15000 * 10000, metal1.area())
+        self.assertEqual(2, metal1.count())
+        self.assertEqual(300000 * 1000, metal2.area())
+        self.assertEqual(1, metal2.count())  # tile pieces joined again
+
+    def test_tiled(self):
+        extracted = extract_merged_regions(self.layout, self.top, self.layer_list,
+                                           threads=4, tile_size_um=20.0,
+                                           mode=RegionExtractionMode.TILED)
+        self._check(extracted)
+
+    def test_tiled_without_merging_tiles(self):
+        extracted = extract_merged_regions(self.layout, self.top, self.layer_list,
+                                           threads=4, tile_size_um=20.0,
+                                           mode=RegionExtractionMode.TILED, merge_tiles=False)
+        metal2 = extracted.regions[self.metal2]
+        self.assertEqual(300000 * 1000, metal2.area())  # the pieces don't overlap
+        self.assertLess(1, metal2.count())              # split along the tile boundaries
+        metal2.merge()
+        self.assertEqual(1, metal2.count())
+
+    def test_deep(self):
+        extracted = extract_merged_regions(self.layout, self.top, self.layer_list,
+                                           threads=4, mode=RegionExtractionMode.DEEP)
+        self.assertIsNotNone(extracted.deep_shape_store)
+        self._check(extracted)
+
+    def test_no_matching_layers(self):
+        layer_list = LayerList.parse_layer_list_string('poly').result
+        self.assertEqual({}, extract_merged_regions(self.layout, self.top, layer_list).regions)
+
+    def test_tiling_script(self):
+        self.assertEqual('_output(o0, i0.merged); _output(o1, i1.merged)', _tiling_script(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,11 +19,13 @@
 from __future__ import annotations
 from enum import IntFlag, auto
 from typing import *
+import unittest
 
 import pya
 
 from klayout_plugin_utils.cached_classproperty import cached_classproperty
 from klayout_plugin_utils.debugging import debug, Debugging
+from klayout_plugin_utils.shape_classifier import classify_shape, ShapeKind
 
 
 class SelectionFilterOptions(IntFlag):
@@ -55,27 +57,57 @@ class SelectionFilterOptions(IntFlag):
         return SelectionFilterOptions.TEXTS in self
     
     def include_shape(self, shape: pya.Shape) -> bool:
-        if shape.is_point():
-            return SelectionFilterOptions.POINTS in self
-        elif shape.is_box():
-            return SelectionFilterOptions.BOXES in self
-        elif shape.is_path():
-            return SelectionFilterOptions.PATHS in self
-        elif shape.is_simple_polygon():
-            return SelectionFilterOptions.POLYGONS in self
-        elif shape.is_polygon():
-            return SelectionFilterOptions.POLYGONS in self
-        elif shape.is_text():
-            return SelectionFilterOptions.TEXTS in self
-        elif shape.is_user_object():
-            return SelectionFilterOptions.PARTIAL_SHAPES in self
-        elif shape.is_edge():
-            return False
-        elif shape.is_edge_pair():
-            return False
-        elif shape.is_null():
-            return False
-        return False
+        flag = self.option_by_shape_kind.get(classify_shape(shape), None)
+        if flag is None:
+            return False  # edges, edge pairs, null shapes, ...
+        return flag in self
+    
+    @cached_classproperty
+    def shape_flags_by_option(cls) -> Dict[SelectionFilterOptions, int]:
+        # NOTE: same mapping as in include_shape(), SPoints is missing in older KLayout versions
+        return {
+            SelectionFilterOptions.POINTS: getattr(pya.Shapes, 'SPoints', 0),
+            SelectionFilterOptions.BOXES: pya.Shapes.SBoxes,
+            SelectionFilterOptions.PATHS: pya.Shapes.SPaths,
+            SelectionFilterOptions.POLYGONS: pya.Shapes.SPolygons,
+            SelectionFilterOptions.TEXTS: pya.Shapes.STexts,
+            SelectionFilterOptions.PARTIAL_SHAPES: pya.Shapes.SUserObjects,
+        }
+    
+    def shape_flags(self) -> int:
+        """
+        KLayout shape flags (pya.Shapes.S...) equivalent to include_shape(),
+        e.g. for Shapes.each(flags) or RecursiveShapeIterator.shape_flags
+        """
+        flags = 0
+        for o, f in self.shape_flags_by_option.items():
+            if o in self:
+                flags |= f
+        return flags
+    
+    def each_shape(self, shapes: pya.Shapes) -> Iterator[pya.Shape]:
+        """Shapes matching this filter, filtered natively by KLayout."""
+        flags = self.shape_flags()
+        if flags == 0:
+            return iter(())
+        return shapes.each(flags)
+    
+    def configure_iterator(self, it: pya.RecursiveShapeIterator) -> pya.RecursiveShapeIterator:
+        """Restrict the iterator to shapes matching this filter, returns the iterator."""
+        it.shape_flags = self.shape_flags()
+        return it
+    
+    @cached_classproperty
+    def option_by_shape_kind(cls) -> Dict[ShapeKind, SelectionFilterOptions]:
+        return {
+            ShapeKind.POINT: SelectionFilterOptions.POINTS,
+            ShapeKind.BOX: SelectionFilterOptions.BOXES,
+            ShapeKind.PATH: SelectionFilterOptions.PATHS,
+            ShapeKind.SIMPLE_POLYGON: SelectionFilterOptions.POLYGONS,
+            ShapeKind.POLYGON: SelectionFilterOptions.POLYGONS,
+            ShapeKind.TEXT: SelectionFilterOptions.TEXTS,
+            ShapeKind.USER_OBJECT: SelectionFilterOptions.PARTIAL_SHAPES,
+        }
     
     @cached_classproperty
     def option_by_menu_title(cls) -> Dict[str, SelectionFilterOptions]:
@@ -93,29 +125,207 @@ class SelectionFilterOptions(IntFlag):
     
     @classmethod
     def from_ui(cls) -> SelectionFilterOptions:
+        """
+        Current selection filter of Edit → Select.
+
+        The result is cached, the cache is dropped whenever one of the
+        select menu actions is triggered, the current view changes,
+        the menu was rebuilt (e.g. mode switch, macro reload) or by invalidate_ui_cache().
+        """
+        cache = _SelectionFilterUICache
+        if cache.actions is not None and not cache.actions_current():
+            if Debugging.DEBUG:
+                debug("SelectionFilterOptions: select menu was rebuilt, hooking the new actions")
+            cache.actions = None
+            cache.options = None
+        if cache.options is None:
+            cache.options = cls._read_from_ui()
+        return cache.options
+    
+    @classmethod
+    def invalidate_ui_cache(cls):
+        _SelectionFilterUICache.options = None
+    
+    @classmethod
+    def _read_from_ui(cls) -> SelectionFilterOptions:
+        cache = _SelectionFilterUICache
+        if cache.actions is None:
+            cache.actions = cls._hook_menu_actions()
+        
         options = SelectionFilterOptions.NONE
+        for path, action, o in cache.actions:
+            if action.checked:
+                options |= o
+        return SelectionFilterOptions(options)
     
-        mw = pya.MainWindow.instance()
-        menu = mw.menu()
+    @classmethod
+    def _hook_menu_actions(cls) -> List[Tuple[str, pya.Action, SelectionFilterOptions]]:
+        menu = _SelectionFilterUICache.menu()
+        _SelectionFilterUICache.hook_view_changes()
         
         # NOTE: The selection filter command names are "random", 
         #       edit_menu.select_menu.pi_enable_15 is e.g. 
         #       on macOS "Rulers and Annotations", on Linux "Polygons".
         #       Therefore we must rely on the Command Titles.
+        #       This title matching is only done once (per menu build),
+        #       we keep the actions and hook into their triggers.
         
+        actions = []
         subitems = menu.items('edit_menu.select_menu')
         for si in subitems:
             if '.pi_enable_' in si:
                 action = menu.action(si)
                 o = cls.option_by_menu_title.get(action.title, None)
-                if action.checked:
-                    options |= o
+                if o is None:
+                    continue
+                action.on_triggered += cls.invalidate_ui_cache
+                actions.append((si, action, o))
         
-        return SelectionFilterOptions(options)
+        if Debugging.DEBUG:
+            debug(f"SelectionFilterOptions: hooked {len(actions)} select menu actions")
+        return actions
+
+
+class _SelectionFilterUICache:
+    # NOTE: can't be class attributes of SelectionFilterOptions, they'd become enum members
+    options: Optional[SelectionFilterOptions] = None
+    actions: Optional[List[Tuple[str, pya.Action, SelectionFilterOptions]]] = None  # (menu path, action, option)
+    view_changes_hooked = False
+    
+    @staticmethod
+    def menu() -> pya.AbstractMenu:
+        return pya.MainWindow.instance().menu()
+    
+    @classmethod
+    def actions_current(cls) -> bool:
+        """
+        Whether the cached actions are still the ones in the menu.
+        NOTE: a rebuilt menu replaces all actions, so checking the first one is enough
+        """
+        if not cls.actions:
+            return True
+        path, action, _ = cls.actions[0]
+        if action.destroyed():
+            return False
+        menu = cls.menu()
+        return menu.is_valid(path) and menu.action(path) is action
+    
+    @classmethod
+    def hook_view_changes(cls):
+        if cls.view_changes_hooked:
+            return
+        mw = pya.MainWindow.instance()
+        if mw is None:
+            return
+        mw.on_current_view_changed += SelectionFilterOptions.invalidate_ui_cache
+        cls.view_changes_hooked = True
         
 #--------------------------------------------------------------------------------
 
+class _FakeEvent:
+    def __init__(self):
+        self.callbacks = []
+    
+    def __iadd__(self, callback):
+        self.callbacks.append(callback)
+        return self
+    
+    def __call__(self):
+        for c in self.callbacks:
+            c()
+
+
+class _FakeAction:
+    def __init__(self, title: str, checked: bool):
+        self.title = title
+        self.checked = checked
+        self.on_triggered = _FakeEvent()
+    
+    def destroyed(self) -> bool:
+        return False
+
+
+class _FakeMenu:
+    def __init__(self, checked_titles: Set[str]):
+        titles = ['Polygons', 'Boxes', 'Texts', 'Instances']
+        self.actions = {f"edit_menu.select_menu.pi_enable_{i}": _FakeAction(t, t in checked_titles)
+                        for i, t in enumerate(titles)}
+    
+    def items(self, path: str) -> List[str]:
+        return list(self.actions.keys())
+    
+    def action(self, path: str) -> _FakeAction:
+        return self.actions[path]
+    
+    def is_valid(self, path: str) -> bool:
+        return path in self.actions
+
+
+class SelectionFilterUICacheTests(unittest.TestCase):
+    def setUp(self):
+        self.menu = _FakeMenu({'Polygons', 'Boxes'})
+        self._saved = (_SelectionFilterUICache.menu, _SelectionFilterUICache.view_changes_hooked)
+        _SelectionFilterUICache.menu = staticmethod(lambda: self.menu)
+        _SelectionFilterUICache.view_changes_hooked = True
+        _SelectionFilterUICache.actions = None
+        _SelectionFilterUICache.options = None
+    
+    def tearDown(self):
+        _SelectionFilterUICache.menu, _SelectionFilterUICache.view_changes_hooked = self._saved
+        _SelectionFilterUICache.actions = None
+        _SelectionFilterUICache.options = None
+    
+    def test_cached_until_triggered(self):
+        self.assertEqual(SelectionFilterOptions.POLYGONS | SelectionFilterOptions.BOXES,
+                         SelectionFilterOptions.from_ui())
+        texts = self.menu.actions['edit_menu.select_menu.pi_enable_2']
+        texts.checked = True
+        self.assertEqual(SelectionFilterOptions.POLYGONS | SelectionFilterOptions.BOXES,
+                         SelectionFilterOptions.from_ui())  # still cached
+        texts.on_triggered()
+        self.assertIn(SelectionFilterOptions.TEXTS, SelectionFilterOptions.from_ui())
+    
+    def test_rebuilt_menu_is_rehooked(self):
+        self.assertEqual(SelectionFilterOptions.POLYGONS | SelectionFilterOptions.BOXES,
+                         SelectionFilterOptions.from_ui())
+        self.menu = _FakeMenu({'Instances'})  # e.g. after a mode switch
+        self.assertEqual(SelectionFilterOptions.INSTANCES, SelectionFilterOptions.from_ui())
+        self.assertIs(self.menu.actions['edit_menu.select_menu.pi_enable_3'],
+                      _SelectionFilterUICache.actions[3][1])
+
+
+class SelectionFilterShapeFlagsTests(unittest.TestCase):
+    def setUp(self):
+        self.layout = pya.Layout()
+        self.top = self.layout.create_cell('TOP')
+        self.layer = self.layout.layer(1, 0)
+        self.shapes = self.top.shapes(self.layer)
+        for obj in (pya.Box(0, 0, 10, 10),
+                    pya.Path([pya.Point(0, 0), pya.Point(100, 0)], 10),
+                    pya.SimplePolygon(pya.Box(0, 0, 20, 20)),
+                    pya.Polygon(pya.Box(0, 0, 30, 30)),
+                    pya.Edge(0, 0, 10, 10),
+                    pya.EdgePair(pya.Edge(0, 0, 10, 0), pya.Edge(0, 20, 10, 20)),
+                    pya.Text('label', 0, 0)):
+            self.shapes.insert(obj)
+        if hasattr(pya.Shape, 'TPoint'):
+            self.shapes.insert(pya.Point(5, 5))
+    
+    def test_native_filter_matches_include_shape(self):
+        options = list(SelectionFilterOptions.shape_flags_by_option.keys())
+        for bits in range(1 << len(options)):
+            o = SelectionFilterOptions.NONE
+            for i, option in enumerate(options):
+                if bits & (1 << i):
+                    o |= option
+            expected = sorted(sh.to_s() for sh in self.shapes.each() if o.include_shape(sh))
+            self.assertEqual(expected, sorted(sh.to_s() for sh in o.each_shape(self.shapes)), repr(o))
+            
+            it = o.configure_iterator(self.layout.begin_shapes(self.top, self.layer))
+            self.assertEqual(expected, sorted(i.shape().to_s() for i in it.each()), repr(o))
+
+#--------------------------------------------------------------------------------
+
 if __name__ == "__main__":
-    options = SelectionFilterOptions.from_ui()
-    print(list(options))
+    unittest.main()
 
@@ -0,0 +1,263 @@
+# --------------------------------------------------------------------------------
+# SPDX-FileCopyrightText: 2026 Martin Jan Köhler
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+# SPDX-License-Identifier: GPL-3.0-or-later
+#--------------------------------------------------------------------------------
+
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import *
+import unittest
+
+import pya
+
+from klayout_plugin_utils.shape_classifier import classify_shape, ShapeKind
+
+
+"""
+Streaming statistics over selections or shape iterators.
+
+Usage example
+-------------
+    agg = SelectionStatisticsAggregator(compute_area=False)  # counts & bbox only, cheapest
+    agg.add_objects(view.each_object_selected())
+    stats = agg.result()
+    print(stats.total_shapes, stats.count(ShapeKind.BOX), stats.dbbox(layout.dbu))
+"""
+
+
+_KINDS: List[ShapeKind] = list(ShapeKind)
+_KIND_INDEX: Dict[ShapeKind, int] = {k: i for i, k in enumerate(_KINDS)}
+
+# shapes without area, only their bbox is taken into account
+_NON_AREA_KINDS: FrozenSet[ShapeKind] = frozenset((
+    ShapeKind.TEXT, ShapeKind.POINT, ShapeKind.EDGE, ShapeKind.EDGE_PAIR,
+    ShapeKind.NULL, ShapeKind.USER_OBJECT, ShapeKind.UNKNOWN,
+))
+
+
+@dataclass
+class SelectionStatistics:
+    counts_by_layer: Dict[int, array] = field(default_factory=dict)  # layer index → counts indexed like ShapeKind
+    instance_counts_by_cell: Counter[int] = field(default_factory=Counter)  # cell index → placements (arrays expanded)
+    bbox: pya.Box = field(default_factory=pya.Box)  # DBU, in the coordinates of the current cell
+    area_by_layer: Dict[int, int] = field(default_factory=dict)  # DBU², merged per layer (if computed)
+
+    def count(self, kind: ShapeKind, layer: Optional[int] = None) -> int:
+        i = _KIND_INDEX[kind]
+        if layer is not None:
+            counts = self.counts_by_layer.get(layer, None)
+            return counts[i] if counts is not None else 0
+        return sum(counts[i] for counts in self.counts_by_layer.values())
+
+    @property
+    def total_shapes(self) -> int:
+        return sum(sum(counts) for counts in self.counts_by_layer.values())
+
+    @property
+    def total_instances(self) -> int:
+        return sum(self.instance_counts_by_cell.values())
+
+    @property
+    def total_area(self) -> int:
+        return sum(self.area_by_layer.values())
+
+    def dbbox(self, dbu: float) -> pya.DBox:
+        return self.bbox.to_dtype(dbu)
+
+
+class SelectionStatisticsAggregator:
+    """
+    Accumulates SelectionStatistics over any number of add_objects() / add_shapes() calls.
+
+    Per object only the classification is done in Python,
+    bounding boxes and (merged) areas are computed by pya.Region in bulk when result() is called.
+    """
+
+    def __init__(self, compute_area: bool = True):
+        self.compute_area = compute_area
+        self._counts_by_layer: Dict[int, array] = {}
+        self._instance_counts: Counter[int] = Counter()
+        self._regions_by_layer: Dict[int, pya.Region] = {}
+        self._shape_bbox = pya.Box()
+        self._instance_bbox = pya.Box()
+
+    def _layer_counts(self, layer: int) -> array:
+        counts = self._counts_by_layer.get(layer, None)
+        if counts is None:
+            counts = array('q', [0] * len(_KINDS))
+            self._counts_by_layer[layer] = counts
+        return counts
+
+    def _region(self, layer: int) -> pya.Region:
+        region = self._regions_by_layer.get(layer, None)
+        if region is None:
+            region = pya.Region()
+            self._regions_by_layer[layer] = region
+        return region
+
+    def _add_shape(self, sh: pya.Shape, layer: int, trans: pya.ICplxTrans):
+        kind = classify_shape(sh)
+        self._layer_counts(layer)[_KIND_INDEX[kind]] += 1
+        if self.compute_area and kind not in _NON_AREA_KINDS:
+            self._region(layer).insert(sh.polygon.transformed(trans))
+        else:
+            self._shape_bbox += sh.bbox().transformed(trans)
+
+    def add_objects(self, objects: Iterable[pya.ObjectInstPath]):
+        for o in objects:
+            if o.is_cell_inst():
+                inst = o.inst()
+                self._instance_counts[inst.cell_index] += inst.size()
+                # NOTE: trans() includes the selected instance's transformation, bbox() already contains it
+                parent_trans = o.trans() * inst.cplx_trans.inverted()
+                self._instance_bbox += inst.bbox().transformed(parent_trans)
+                continue
+            sh = o.shape
+            if sh is None:
+                continue
+            self._add_shape(sh, o.layer, o.trans())
+
+    def add_shapes(self, it: pya.RecursiveShapeIterator):
+        """
+        NOTE: only the classification is done per shape, the region for the area
+              is built by KLayout from the iterator in one call. This requires a single layer iterator
+              (e.g. Layout.begin_shapes(cell, layer)), multi layer iterators can't be split by layer
+              and take a slower path (polygons are collected and inserted once per layer).
+        """
+        layers: Set[int] = set()
+        it_classify = it.dup()
+        while not it_classify.at_end():
+            sh = it_classify.shape()
+            layer = it_classify.layer()
+            kind = classify_shape(sh)
+            self._layer_counts(layer)[_KIND_INDEX[kind]] += 1
+            layers.add(layer)
+            if not self.compute_area or kind in _NON_AREA_KINDS:
+                self._shape_bbox += sh.bbox().transformed(it_classify.trans())
+            it_classify.next()
+
+        if not self.compute_area or not layers:
+            return
+        if len(layers) == 1:
+            self._region(next(iter(layers))).insert(pya.Region(it.dup()))
+            return
+
+        polygons_by_layer: Dict[int, List[pya.Polygon]] = {}
+        it_polygons = it.dup()
+        while not it_polygons.at_end():
+            sh = it_polygons.shape()
+            if classify_shape(sh) not in _NON_AREA_KINDS:
+                polygons_by_layer.setdefault(it_polygons.layer(), []).append(sh.polygon.transformed(it_polygons.trans()))
+            it_polygons.next()
+        for layer, polygons in polygons_by_layer.items():
+            self._region(layer).insert(polygons)
+
+    def result(self) -> SelectionStatistics:
+        bbox = pya.Box() + self._shape_bbox + self._instance_bbox
+        area_by_layer = {}
+        for layer, region in self._regions_by_layer.items():
+            bbox += region.bbox()
+            area_by_layer[layer] = region.area()  # merged semantics
+        return SelectionStatistics(counts_by_layer={l: array('q', c) for l, c in self._counts_by_layer.items()},
+                                   instance_counts_by_cell=Counter(self._instance_counts),
+                                   bbox=bbox,
+                                   area_by_layer=area_by_layer)
+
+
+#--------------------------------------------------------------------------------
+
+class SelectionStatisticsAggregatorTests(unittest.TestCase):
+    def setUp(self):
+        self.layout = pya.Layout()
+        self.layout.dbu = 0.001
+        self.top = self.layout.create_cell('TOP')
+        self.child = self.layout.create_cell('CHILD')
+        self.l1 = self.layout.layer(1, 0)
+        self.l2 = self.layout.layer(2, 0)
+        shapes = self.top.shapes(self.l1)
+        shapes.insert(pya.Box(0, 0, 100, 100))
+        shapes.insert(pya.Box(50, 0, 150, 100))  # overlaps, merged area counts once
+        shapes.insert(pya.Text('label', pya.Trans(0, 0)))
+        self.child.shapes(self.l1).insert(pya.Polygon(pya.Box(0, 0, 10, 20)))
+        self.child.shapes(self.l2).insert(pya.Path([pya.Point(0, 0), pya.Point(100, 0)], 10))
+        self.top.insert(pya.CellInstArray(self.child.cell_index(), pya.Trans(1000, 0)))
+        self.top.insert(pya.CellInstArray(self.child.cell_index(), pya.Trans(2000, 0)))
+
+    def test_single_layer_iterator(self):
+        agg = SelectionStatisticsAggregator()
+        agg.add_shapes(self.layout.begin_shapes(self.top, self.l1))
+        stats = agg.result()
+        self.assertEqual(2, stats.count(ShapeKind.BOX, self.l1))
+        self.assertEqual(1, stats.count(ShapeKind.TEXT))
+        self.assertEqual(2, stats.count(ShapeKind.POLYGON) + stats.count(ShapeKind.SIMPLE_POLYGON))
+        self.assertEqual(5, stats.total_shapes)
+        self.assertEqual(150 * 100 + 2 * 10 * 20, stats.area_by_layer[self.l1])
+        self.assertEqual(pya.Box(0, 0, 2010, 100), stats.bbox)
+
+    def test_multi_layer_iterator(self):
+        it = pya.RecursiveShapeIterator(self.layout, self.top, [self.l1, self.l2])
+        agg = SelectionStatisticsAggregator()
+        agg.add_shapes(it)
+        stats = agg.result()
+        self.assertEqual(2, stats.count(ShapeKind.PATH, self.l2))
+        self.assertEqual(150 * 100 + 2 * 10 * 20, stats.area_by_layer[self.l1])
+        self.assertEqual(2 * 100 * 10, stats.area_by_layer[self.l2])
+
+    def test_without_area(self):
+        agg = SelectionStatisticsAggregator(compute_area=False)
+        agg.add_shapes(self.layout.begin_shapes(self.top, self.l1))
+        stats = agg.result()
+        self.assertEqual(5, stats.total_shapes)
+        self.assertEqual({}, stats.area_by_layer)
+        self.assertEqual(pya.Box(0, 0, 2010, 100), stats.bbox)
+
+    def _instance_path(self, *instances: pya.Instance) -> pya.ObjectInstPath:
+        o = pya.ObjectInstPath()
+        o.top = self.top.cell_index()
+        for inst in instances:
+            o.append_path(pya.InstElement.new(inst))
+        return o
+
+    def test_instances(self):
+        array_inst = self.top.insert(pya.CellInstArray(self.child.cell_index(), pya.Trans(5000, 0),
+                                                       pya.Vector(200, 0), pya.Vector(0, 100), 2, 3))
+        single_inst = next(i for i in self.top.each_inst() if i.trans == pya.Trans(1000, 0))
+        agg = SelectionStatisticsAggregator()
+        agg.add_objects([self._instance_path(single_inst), self._instance_path(array_inst)])
+        stats = agg.result()
+        self.assertEqual(1 + 2 * 3, stats.total_instances)  # array elements are counted
+        self.assertEqual({self.child.cell_index(): 7}, dict(stats.instance_counts_by_cell))
+        self.assertEqual(0, stats.total_shapes)
+        # child bbox is (0, -5; 100, 20)
+        self.assertEqual(pya.Box(1000, -5, 5000 + 200 + 100, 200 + 20), stats.bbox)
+
+    def test_nested_instance(self):
+        grandchild = self.layout.create_cell('GRANDCHILD')
+        grandchild.shapes(self.l1).insert(pya.Box(0, 0, 10, 10))
+        inner = self.child.insert(pya.CellInstArray(grandchild.cell_index(), pya.Trans(300, 0)))
+        outer = next(i for i in self.top.each_inst() if i.trans == pya.Trans(2000, 0))
+        agg = SelectionStatisticsAggregator()
+        agg.add_objects([self._instance_path(outer, inner)])
+        stats = agg.result()
+        self.assertEqual({grandchild.cell_index(): 1}, dict(stats.instance_counts_by_cell))
+        self.assertEqual(pya.Box(2300, 0, 2310, 10), stats.bbox)  # in the coordinates of TOP
+
+
+if __name__ == "__main__":
+    unittest.main()
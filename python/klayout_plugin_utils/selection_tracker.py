@@ -0,0 +1,200 @@
+# --------------------------------------------------------------------------------
+# SPDX-FileCopyrightText: 2026 Martin Jan Köhler
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+# SPDX-License-Identifier: GPL-3.0-or-later
+#--------------------------------------------------------------------------------
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import *
+import unittest
+
+import pya
+
+from klayout_plugin_utils.debugging import debug, Debugging
+
+
+"""
+Incremental selection tracking.
+
+Usage example
+-------------
+    def on_delta(delta: SelectionDelta):
+        for o in delta.removed:
+            remove_highlight(o)
+        for o in delta.added:
+            add_highlight(o)
+
+    tracker = SelectionTracker(view)
+    tracker.attach(on_delta)
+    ...
+    tracker.detach()
+
+NOTE: KLayout only reports "the selection changed", so each event still walks
+      the selection once to compute the keys, but descriptions, highlights, filters,
+      i.e. everything downstream, only has to deal with the added / removed objects.
+"""
+
+
+SelectionKey = Hashable
+
+
+@dataclass
+class SelectionDelta:
+    added: List[pya.ObjectInstPath] = field(default_factory=list)
+    removed: List[pya.ObjectInstPath] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.added and not self.removed
+
+
+class SelectionTracker:
+    def __init__(self, view: pya.LayoutView):
+        self.view = view
+        self._snapshot: Dict[SelectionKey, pya.ObjectInstPath] = {}
+        self._on_delta: Optional[Callable[[SelectionDelta], None]] = None
+
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def selection_key(o: pya.ObjectInstPath) -> SelectionKey:
+        # NOTE: ObjectInstPath, Instance and InstElement compare by value, but hash by identity,
+        #       so we assemble a value key from the path elements.
+        #       Shape and CellInstArray hash by value.
+        path = tuple((inst.cell_inst, inst.prop_id, e.ia(), e.ib())
+                     for e in o.each_inst()
+                     for inst in (e.inst(),))
+        if o.is_cell_inst():
+            return (o.cv_index, o.top, path)
+        return (o.cv_index, o.top, path, o.layer, o.shape)
+
+    @property
+    def selection(self) -> Iterable[pya.ObjectInstPath]:
+        return self._snapshot.values()
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def reset(self):
+        self._snapshot = {}
+
+    def update(self, objects: Optional[Iterable[pya.ObjectInstPath]] = None) -> SelectionDelta:
+        """
+        Compare objects (default: the view's current selection) with the last snapshot.
+        """
+        if objects is None:
+            objects = self.view.each_object_selected()
+
+        old = self._snapshot
+        new: Dict[SelectionKey, pya.ObjectInstPath] = {}
+        delta = SelectionDelta()
+        key = self.selection_key
+        for o in objects:
+            k = key(o)  # NOTE: the key holds values only, no references into o
+            existing = old.get(k, None)
+            if existing is None:
+                existing = o.dup()  # NOTE: the iterator may reuse its objects
+                delta.added.append(existing)
+            new[k] = existing
+
+        if len(new) - len(delta.added) != len(old):  # some of the old ones are gone
+            delta.removed = [o for k, o in old.items() if k not in new]
+        self._snapshot = new
+
+        if Debugging.DEBUG:
+            debug(f"SelectionTracker: {len(new)} selected, +{len(delta.added)} / -{len(delta.removed)}")
+        return delta
+
+    # ------------------------------------------------------------------
+
+    def attach(self, on_delta: Callable[[SelectionDelta], None]):
+        self.detach()
+        self._on_delta = on_delta
+        self.view.on_selection_changed += self._on_selection_changed
+        self._on_selection_changed()
+
+    def detach(self):
+        if self._on_delta is None:
+            return
+        self.view.on_selection_changed -= self._on_selection_changed
+        self._on_delta = None
+
+    def _on_selection_changed(self):
+        delta = self.update()
+        if not delta.is_empty and self._on_delta is not None:
+            self._on_delta(delta)
+
+
+#--------------------------------------------------------------------------------
+
+class SelectionTrackerTests(unittest.TestCase):
+    def setUp(self):
+        self.layout = pya.Layout()
+        self.top = self.layout.create_cell('TOP')
+        self.child = self.layout.create_cell('CHILD')
+        self.layer = self.layout.layer(1, 0)
+        shapes = self.top.shapes(self.layer)
+        for i in range(3):
+            shapes.insert(pya.Box(i * 20, 0, i * 20 + 10, 10))
+        for i in range(2):
+            self.top.insert(pya.CellInstArray(self.child.cell_index(), pya.Trans(i * 100, 100)))
+
+    def _selection(self) -> List[pya.ObjectInstPath]:
+        """Fresh ObjectInstPath objects each time, like LayoutView.each_object_selected()"""
+        result = []
+        for sh in self.top.shapes(self.layer).each():
+            o = pya.ObjectInstPath()
+            o.top = self.top.cell_index()
+            o.layer = self.layer
+            o.shape = sh
+            result.append(o)
+        for inst in self.top.each_inst():
+            o = pya.ObjectInstPath()
+            o.top = self.top.cell_index()
+            o.append_path(pya.InstElement.new(inst))
+            result.append(o)
+        return result
+
+    def test_unchanged_selection_gives_empty_delta(self):
+        tracker = SelectionTracker(view=None)
+        self.assertEqual(5, len(tracker.update(self._selection()).added))
+        delta = tracker.update(self._selection())
+        self.assertEqual(True, delta.is_empty)
+        self.assertEqual(5, len(tracker))
+
+    def test_delta(self):
+        tracker = SelectionTracker(view=None)
+        selection = self._selection()
+        tracker.update(selection[:3])
+        delta = tracker.update(self._selection()[1:])
+        self.assertEqual(2, len(delta.added))    # the instances
+        self.assertEqual(1, len(delta.removed))  # the first box
+        self.assertEqual(selection[0], delta.removed[0])
+
+    def test_only_added_objects_are_copied(self):
+        tracker = SelectionTracker(view=None)
+        selection = self._selection()
+        delta = tracker.update(selection[:3])
+        self.assertTrue(all(a is not o for a, o in zip(delta.added, selection)))  # copies, not the iterator's objects
+        kept = list(tracker.selection)
+        tracker.update(self._selection())
+        for o in kept:
+            self.assertTrue(any(o is s for s in tracker.selection))  # unchanged objects are kept, not copied again
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+# --------------------------------------------------------------------------------
+# SPDX-FileCopyrightText: 2026 Martin Jan Köhler
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+# SPDX-License-Identifier: GPL-3.0-or-later
+#--------------------------------------------------------------------------------
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import *
+import unittest
+
+import pya
+
+from klayout_plugin_utils.str_enum_compat import StrEnum
+
+
+class ShapeKind(StrEnum):
+    NULL = 'null'
+    POINT = 'point'
+    BOX = 'box'
+    PATH = 'path'
+    SIMPLE_POLYGON = 'simple_polygon'
+    POLYGON = 'polygon'
+    EDGE = 'edge'
+    EDGE_PAIR = 'edge_pair'
+    TEXT = 'text'
+    USER_OBJECT = 'user_object'
+    INSTANCE = 'instance'  # only used when classifying selections
+    UNKNOWN = 'unknown'
+
+
+# NOTE: each shape.is_*() call crosses into C++, shape.type() is a single call,
+#       so we map all the storage variants (refs, array members, short boxes, ...)
+#       to one ShapeKind up front.
+#       Array types (TBoxArray, TPolygonPtrArray, ...) are not mapped,
+#       just like is_box(), is_polygon(), ... are false for them.
+#       Constants missing in older KLayout versions (e.g. TPoint) are skipped.
+_SHAPE_TYPE_NAMES_BY_KIND: Dict[ShapeKind, Tuple[str, ...]] = {
+    ShapeKind.NULL: ('TNull',),
+    ShapeKind.POINT: ('TPoint',),
+    ShapeKind.BOX: ('TBox', 'TBoxArrayMember', 'TShortBox', 'TShortBoxArrayMember'),
+    ShapeKind.PATH: ('TPath', 'TPathRef', 'TPathPtrArrayMember'),
+    ShapeKind.SIMPLE_POLYGON: ('TSimplePolygon', 'TSimplePolygonRef', 'TSimplePolygonPtrArrayMember'),
+    ShapeKind.POLYGON: ('TPolygon', 'TPolygonRef', 'TPolygonPtrArrayMember'),
+    ShapeKind.EDGE: ('TEdge',),
+    ShapeKind.EDGE_PAIR: ('TEdgePair',),
+    ShapeKind.TEXT: ('TText', 'TTextRef', 'TTextPtrArrayMember'),
+    ShapeKind.USER_OBJECT: ('TUserObject',),
+}
+
+_SHAPE_KIND_BY_TYPE: Dict[int, ShapeKind] = {
+    getattr(pya.Shape, name): kind
+    for kind, names in _SHAPE_TYPE_NAMES_BY_KIND.items()
+    for name in names
+    if hasattr(pya.Shape, name)
+}
+
+
+def classify_shape(shape: pya.Shape) -> ShapeKind:
+    return _SHAPE_KIND_BY_TYPE.get(shape.type(), ShapeKind.UNKNOWN)
+
+
+def classify_object(o: pya.ObjectInstPath) -> ShapeKind:
+    if o.is_cell_inst():
+        return ShapeKind.INSTANCE
+    sh = o.shape
+    if sh is None:
+        return ShapeKind.UNKNOWN
+    return classify_shape(sh)
+
+
+def count_by_kind_and_layer(objects: Iterable[pya.ObjectInstPath | pya.Shape]) -> Counter[Tuple[ShapeKind, int]]:
+    """
+    Classify and count a selection (ObjectInstPath) or shapes (e.g. from Shapes.each
+    or RecursiveShapeIterator.shape) in one pass.
+
+    Keys are (ShapeKind, layer index), instances are counted as (ShapeKind.INSTANCE, -1).
+    """
+    kind_by_type = _SHAPE_KIND_BY_TYPE
+    unknown = ShapeKind.UNKNOWN
+    counts: Counter[Tuple[ShapeKind, int]] = Counter()
+    for o in objects:
+        if isinstance(o, pya.ObjectInstPath):
+            if o.is_cell_inst():
+                counts[(ShapeKind.INSTANCE, -1)] += 1
+                continue
+            sh = o.shape
+            if sh is None:
+                counts[(unknown, -1)] += 1
+                continue
+            layer = o.layer
+        else:
+            sh = o
+            layer = sh.layer
+        counts[(kind_by_type.get(sh.type(), unknown), layer)] += 1
+    return counts
+
+
+#--------------------------------------------------------------------------------
+
+class ShapeClassifierTests(unittest.TestCase):
+    def setUp(self):
+        self.layout = pya.Layout()
+        self.top = self.layout.create_cell('TOP')
+        self.child = self.layout.create_cell('CHILD')
+        self.layer1 = self.layout.layer(1, 0)
+        self.layer2 = self.layout.layer(2, 0)
+
+    def _shape_path(self, shape: pya.Shape) -> pya.ObjectInstPath:
+        o = pya.ObjectInstPath()
+        o.top = self.top.cell_index()
+        o.layer = shape.layer
+        o.shape = shape
+        return o
+
+    def _instance_path(self, inst: pya.Instance) -> pya.ObjectInstPath:
+        o = pya.ObjectInstPath()
+        o.top = self.top.cell_index()
+        o.append_path(pya.InstElement.new(inst))
+        return o
+
+    def test_classify_shape(self):
+        shapes = self.top.shapes(self.layer1)
+        expected = [
+            (pya.Box(0, 0, 10, 10), ShapeKind.BOX),
+            (pya.Path([pya.Point(0, 0), pya.Point(100, 0)], 10), ShapeKind.PATH),
+            (pya.SimplePolygon(pya.Box(0, 0, 10, 10)), ShapeKind.SIMPLE_POLYGON),
+            (pya.Polygon(pya.Box(0, 0, 10, 10)), ShapeKind.POLYGON),
+            (pya.Edge(0, 0, 10, 10), ShapeKind.EDGE),
+            (pya.EdgePair(pya.Edge(0, 0, 10, 0), pya.Edge(0, 20, 10, 20)), ShapeKind.EDGE_PAIR),
+            (pya.Text('label', 0, 0), ShapeKind.TEXT),
+        ]
+        if hasattr(pya.Shape, 'TPoint'):
+            expected.append((pya.Point(5, 5), ShapeKind.POINT))
+        for obj, kind in expected:
+            self.assertEqual(kind, classify_shape(shapes.insert(obj)), type(obj).__name__)
+        self.assertEqual(ShapeKind.NULL, classify_shape(pya.Shape()))
+
+    def test_classify_shape_references(self):
+        layout = pya.Layout(False)  # NOTE: non-editable layouts store shape references
+        top = layout.create_cell('TOP')
+        shapes = top.shapes(layout.layer(1, 0))
+        self.assertEqual(ShapeKind.POLYGON,
+                         classify_shape(shapes.insert(pya.Polygon([pya.Point(0, 0), pya.Point(0, 10),
+                                                                   pya.Point(10, 0)]))))
+        self.assertEqual(ShapeKind.TEXT, classify_shape(shapes.insert(pya.Text('label', 0, 0))))
+
+    def test_simple_polygon_is_selected_as_polygon(self):
+        from klayout_plugin_utils.selection_filter_options import SelectionFilterOptions
+        option_by_kind = SelectionFilterOptions.option_by_shape_kind
+        self.assertEqual(SelectionFilterOptions.POLYGONS, option_by_kind[ShapeKind.SIMPLE_POLYGON])
+        self.assertEqual(SelectionFilterOptions.POLYGONS, option_by_kind[ShapeKind.POLYGON])
+
+    def test_classify_object(self):
+        box = self.top.shapes(self.layer1).insert(pya.Box(0, 0, 10, 10))
+        inst = self.top.insert(pya.CellInstArray(self.child.cell_index(), pya.Trans()))
+        self.assertEqual(ShapeKind.BOX, classify_object(self._shape_path(box)))
+        self.assertEqual(ShapeKind.INSTANCE, classify_object(self._instance_path(inst)))
+
+    def test_count_by_kind_and_layer(self):
+        shapes1 = self.top.shapes(self.layer1)
+        shapes2 = self.top.shapes(self.layer2)
+        boxes = [shapes1.insert(pya.Box(i * 20, 0, i * 20 + 10, 10)) for i in range(3)]
+        polygon = shapes2.insert(pya.Polygon(pya.Box(0, 0, 10, 10)))
+        box2 = shapes2.insert(pya.Box(0, 0, 10, 10))
+        inst = self.top.insert(pya.CellInstArray(self.child.cell_index(), pya.Trans()))
+
+        selection = [self._shape_path(sh) for sh in boxes + [polygon, box2]] + [self._instance_path(inst)]
+        expected = Counter({
+            (ShapeKind.BOX, self.layer1): 3,
+            (ShapeKind.POLYGON, self.layer2): 1,
+            (ShapeKind.BOX, self.layer2): 1,
+            (ShapeKind.INSTANCE, -1): 1,
+        })
+        self.assertEqual(expected, count_by_kind_and_layer(selection))
+
+        # plain shapes are counted the same way
+        del expected[(ShapeKind.INSTANCE, -1)]
+        self.assertEqual(expected, count_by_kind_and_layer(boxes + [polygon, box2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
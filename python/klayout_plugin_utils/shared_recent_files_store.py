@@ -0,0 +1,317 @@
+# --------------------------------------------------------------------------------
+# SPDX-FileCopyrightText: 2026 Martin Jan Köhler
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+# SPDX-License-Identifier: GPL-3.0-or-later
+#--------------------------------------------------------------------------------
+
+#--------------------------------------------------------------------------------
+# Recent items store shared by several concurrently running KLayout processes.
+#
+# Backed by a local SQLite database (WAL mode):
+#    - every modification is one short IMMEDIATE transaction (atomic read-modify-write)
+#    - readers don't block writers and vice versa
+#    - reads are served from an in-memory cache, which is only dropped
+#      when PRAGMA data_version reports a commit by another connection
+#
+# Same query / modification API as RecentItemsStore.
+#
+# NOTE: SQLite locking is not reliable on network file systems,
+#       keep the database on a local disk (e.g. KLayout's application data path)
+#--------------------------------------------------------------------------------
+
+from __future__ import annotations
+
+from collections import OrderedDict
+import heapq
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import *
+import unittest
+
+from klayout_plugin_utils.recent_items_store import RecentItemStats, RecentItemsQueries
+
+
+class SharedRecentFilesStore(RecentItemsQueries):
+    BUSY_TIMEOUT_MS = 2000
+
+    _shared: Dict[str, SharedRecentFilesStore] = {}
+
+    def __init__(self, path: str | Path, max_items_per_namespace: int = 5000):
+        self.path = Path(path)
+        self.max_items_per_namespace = max_items_per_namespace
+        self._lock = threading.RLock()
+        self._cache: Dict[str, OrderedDict[str, RecentItemStats]] = {}  # least recent first
+        self._data_version: Optional[int] = None
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = self._connect(str(self.path))
+        except (OSError, sqlite3.Error) as e:
+            print("SharedRecentFilesStore.__init__() caught an exception", e)
+            # NOTE: keep working for this session, without sharing or persistence
+            self._connection = self._connect(':memory:')
+
+    def _connect(self, database: str) -> sqlite3.Connection:
+        connection = sqlite3.connect(database,
+                                     timeout=self.BUSY_TIMEOUT_MS / 1000.0,
+                                     isolation_level=None,  # explicit transactions
+                                     check_same_thread=False)
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS recent_items (
+                    ns        TEXT NOT NULL,
+                    item      TEXT NOT NULL,
+                    count     INTEGER NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (ns, item)
+                )
+            """)
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS recent_items_by_time ON recent_items (ns, last_used)'
+            )
+        except sqlite3.Error:
+            connection.close()
+            raise
+        return connection
+
+    @classmethod
+    def shared(cls, path: str | Path) -> SharedRecentFilesStore:
+        """One store instance (connection) per database file and process."""
+        key = str(Path(path).expanduser().absolute())
+        store = cls._shared.get(key, None)
+        if store is None:
+            store = SharedRecentFilesStore(key)
+            cls._shared[key] = store
+        return store
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    # ------------------------------------------------------------------
+    # Modifications (one transaction each)
+    #
+    # NOTE: called from the GUI, so failures (e.g. the database stays locked
+    #       by another instance beyond the busy timeout) are reported, not raised
+    # ------------------------------------------------------------------
+
+    def push(self, namespace: str, item: str, timestamp: Optional[float] = None) -> bool:
+        if timestamp is None:
+            timestamp = time.time()
+        return self._modify(namespace, [
+            ("""
+                INSERT INTO recent_items (ns, item, count, last_used) VALUES (?, ?, 1, ?)
+                ON CONFLICT (ns, item) DO UPDATE SET count = count + 1,
+                                                     last_used = max(last_used, excluded.last_used)
+             """, (namespace, item, timestamp)),
+            ("""
+                DELETE FROM recent_items WHERE ns = ? AND item NOT IN (
+                    SELECT item FROM recent_items WHERE ns = ? ORDER BY last_used DESC LIMIT ?
+                )
+             """, (namespace, namespace, self.max_items_per_namespace)),
+        ])
+
+    def remove(self, namespace: str, item: str) -> bool:
+        return self._modify(namespace, [
+            ('DELETE FROM recent_items WHERE ns = ? AND item = ?', (namespace, item)),
+        ])
+
+    def clear(self, namespace: str) -> bool:
+        return self._modify(namespace, [
+            ('DELETE FROM recent_items WHERE ns = ?', (namespace,)),
+        ])
+
+    # ------------------------------------------------------------------
+    # Private helpers
+    # ------------------------------------------------------------------
+
+    def _transaction(self) -> _Transaction:
+        return _Transaction(self._connection)
+
+    def _modify(self, namespace: str, statements: List[Tuple[str, Tuple]]) -> bool:
+        """Execute statements in one transaction, returns False if it failed."""
+        with self._lock:
+            try:
+                with self._transaction() as c:
+                    for sql, args in statements:
+                        c.execute(sql, args)
+                return True
+            except sqlite3.Error as e:
+                print("SharedRecentFilesStore._modify() caught an exception", e)
+                return False
+            finally:
+                self._cache.pop(namespace, None)
+
+    def _check_data_version(self):
+        # NOTE: data_version only changes for commits of *other* connections,
+        #       our own modifications invalidate the affected namespace directly
+        version = self._connection.execute('PRAGMA data_version').fetchone()[0]
+        if version != self._data_version:
+            self._data_version = version
+            self._cache.clear()
+
+    def _namespace_items(self, namespace: str) -> Optional[OrderedDict[str, RecentItemStats]]:
+        try:
+            return self._namespace(namespace)
+        except sqlite3.Error as e:
+            print("SharedRecentFilesStore._namespace_items() caught an exception", e)
+            return self._cache.get(namespace, None)
+
+    def _namespace(self, namespace: str) -> OrderedDict[str, RecentItemStats]:
+        self._check_data_version()
+        ns = self._cache.get(namespace, None)
+        if ns is None:
+            rows = self._connection.execute(
+                'SELECT item, count, last_used FROM recent_items WHERE ns = ? ORDER BY last_used ASC',
+                (namespace,)
+            ).fetchall()
+            ns = OrderedDict((item, RecentItemStats(count=count, last_used=last_used))
+                             for item, count, last_used in rows)
+            self._cache[namespace] = ns
+        return ns
+
+
+class _Transaction:
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Connection:
+        # IMMEDIATE: take the write lock up front, so concurrent writers wait (busy timeout)
+        #            instead of failing on lock upgrade
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            try:
+                self.connection.execute('COMMIT')
+                return False
+            except sqlite3.Error:
+                self._rollback()  # otherwise the connection stays in the transaction, every later BEGIN fails
+                raise
+        self._rollback()
+        return False
+
+    def _rollback(self):
+        try:
+            self.connection.execute('ROLLBACK')
+        except sqlite3.Error:
+            pass  # no transaction open anymore (SQLite may have rolled back itself)
+
+
+#--------------------------------------------------------------------------------
+
+class SharedRecentFilesStoreTests(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / 'recent.sqlite'
+        self.stores = []
+
+    def tearDown(self):
+        for s in self.stores:
+            s.close()
+        self._tmp.cleanup()
+
+    def _open(self, **kwargs) -> SharedRecentFilesStore:
+        store = SharedRecentFilesStore(self.path, **kwargs)
+        self.stores.append(store)
+        return store
+
+    def test_push_order(self):
+        store = self._open()
+        store.push('ns', 'a', timestamp=1.0)
+        store.push('ns', 'b', timestamp=2.0)
+        store.push('ns', 'a', timestamp=3.0)
+        self.assertEqual(['a', 'b'], store.items('ns'))
+        self.assertEqual(2, store.stats('ns', 'a').count)
+
+    def test_other_process_changes_are_picked_up(self):
+        store1 = self._open()
+        store2 = self._open()  # separate connection, as another KLayout instance would have
+        store1.push('ns', 'a', timestamp=1.0)
+        self.assertEqual(['a'], store2.items('ns'))
+        store2.push('ns', 'b', timestamp=2.0)
+        self.assertEqual(['b', 'a'], store1.items('ns'))
+        store1.clear('ns')
+        self.assertEqual([], store2.items('ns'))
+
+    def test_locked_database_is_reported_not_raised(self):
+        store1 = self._open()
+        store2 = self._open()
+        store2._connection.execute('PRAGMA busy_timeout = 0')
+        store1.push('ns', 'a', timestamp=1.0)
+        store1._connection.execute('BEGIN IMMEDIATE')  # another instance holds the write lock
+        try:
+            self.assertEqual(False, store2.push('ns', 'b', timestamp=2.0))
+            self.assertEqual(['a'], store2.items('ns'))  # reads still work
+        finally:
+            store1._connection.execute('ROLLBACK')
+        self.assertEqual(True, store2.push('ns', 'b', timestamp=2.0))
+        self.assertEqual(['b', 'a'], store1.items('ns'))
+
+    def test_failed_commit_is_rolled_back(self):
+        store = self._open()
+        
+        class FailingCommit:
+            def __init__(self, connection: sqlite3.Connection):
+                self.connection = connection
+            
+            def execute(self, sql: str, *args):
+                if sql == 'COMMIT':
+                    raise sqlite3.OperationalError('database is locked')
+                return self.connection.execute(sql, *args)
+        
+        with self.assertRaises(sqlite3.OperationalError):
+            with _Transaction(FailingCommit(store._connection)) as c:
+                c.execute("INSERT INTO recent_items (ns, item, count, last_used) VALUES ('ns', 'a', 1, 1.0)")
+        self.assertFalse(store._connection.in_transaction)
+        self.assertEqual([], store.items('ns'))
+        self.assertEqual(True, store.push('ns', 'b', timestamp=2.0))  # next transaction works
+
+    def test_unusable_database_path_is_reported_not_raised(self):
+        self.path.write_text('')
+        store = SharedRecentFilesStore(self.path / 'recent.sqlite')  # parent is a file
+        self.stores.append(store)
+        self.assertEqual(True, store.push('ns', 'a', timestamp=1.0))
+        self.assertEqual(['a'], store.items('ns'))
+
+    def test_cache_is_kept_without_changes(self):
+        store = self._open()
+        store.push('ns', 'a', timestamp=1.0)
+        first = store._namespace('ns')
+        self.assertIs(first, store._namespace('ns'))
+
+    def test_capacity(self):
+        store = self._open(max_items_per_namespace=2)
+        for i, item in enumerate('abc'):
+            store.push('ns', item, timestamp=float(i))
+        self.assertEqual(['c', 'b'], store.items('ns'))
+
+    def test_ranked(self):
+        store = self._open()
+        now = 1000.0 * SharedRecentFilesStore.FRECENCY_HALF_LIFE_S
+        for _ in range(3):
+            store.push('ns', 'often', timestamp=now - 60)
+        store.push('ns', 'once', timestamp=now)
+        self.assertEqual(['often', 'once'], store.ranked('ns', now=now))
+
+
+if __name__ == "__main__":
+    unittest.main()
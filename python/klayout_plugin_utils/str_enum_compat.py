@@ -16,18 +16,75 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 #--------------------------------------------------------------------------------
 
+from __future__ import annotations
+
 import sys
+from typing import *
+import unittest
+
+from klayout_plugin_utils.cached_classproperty import cached_classproperty
 
 
 if sys.version_info >= (3, 11):
-    from enum import StrEnum
+    from enum import StrEnum as _StrEnumBase
 else:
     from enum import Enum
-    class StrEnum(str, Enum):
+    class _StrEnumBase(str, Enum):
         def __str__(self) -> str:
             return str(self.value)
 
 
+class StrEnum(_StrEnumBase):
+    """
+    str based Enum with O(1) lookup tables, built once per class on first use.
+
+    Subclasses may override aliases() to add extra (case-insensitive) spellings.
+    """
+
+    @classmethod
+    def aliases(cls) -> Dict[str, str]:
+        """alias → value, matched case-insensitively by from_alias()"""
+        return {}
+
+    @cached_classproperty
+    def members_list(cls) -> List[StrEnum]:
+        return list(cls)
+
+    @cached_classproperty
+    def member_by_value(cls) -> Dict[str, StrEnum]:
+        return {m.value: m for m in cls}
+
+    @classmethod
+    def _member_spellings(cls, member: StrEnum) -> List[str]:
+        return [member.name, member.value]
+
+    @cached_classproperty
+    def member_by_alias(cls) -> Dict[str, StrEnum]:
+        index: Dict[str, StrEnum] = {}
+        for m in cls:
+            for spelling in cls._member_spellings(m):
+                index.setdefault(spelling.casefold(), m)
+        for alias, value in cls.aliases().items():
+            index[alias.casefold()] = cls.member_by_value[value]
+        return index
+
+    @classmethod
+    def from_value(cls, value: str) -> StrEnum:
+        """Same as cls(value), but a plain dict lookup."""
+        try:
+            return cls.member_by_value[value]
+        except KeyError:
+            raise ValueError(f"{value!r} is not a valid {cls.__name__}") from None
+
+    @classmethod
+    def from_alias(cls, s: str) -> StrEnum:
+        """Case-insensitive lookup by value, member name or alias."""
+        try:
+            return cls.member_by_alias[s.casefold()]
+        except KeyError:
+            raise ValueError(f"{s!r} is not a valid {cls.__name__}") from None
+
+
 class DualStrEnum(StrEnum):
     """StrEnum with separate UI labels and CLI/serialization keys."""
     
@@ -37,9 +94,66 @@ class DualStrEnum(StrEnum):
         obj.ui_label = ui_label
         return obj
     
+    @cached_classproperty
+    def member_by_ui_label(cls) -> Dict[str, DualStrEnum]:
+        return {m.ui_label: m for m in cls}
+    
+    @classmethod
+    def _member_spellings(cls, member: DualStrEnum) -> List[str]:
+        return [member.name, member.value, member.ui_label]
+    
     @classmethod
     def from_ui_label(cls, label: str) -> "DualStrEnum":
-        for member in cls:
-            if member.ui_label == label:
-                return member
-        raise ValueError(f"No member with UI label {label!r}")
+        try:
+            return cls.member_by_ui_label[label]
+        except KeyError:
+            raise ValueError(f"No member with UI label {label!r}") from None
+
+
+#--------------------------------------------------------------------------------
+
+class _Color(StrEnum):
+    RED = 'red'
+    GREEN = 'green'
+
+    @classmethod
+    def aliases(cls) -> Dict[str, str]:
+        return {'rot': 'red'}
+
+
+class _Mode(DualStrEnum):
+    FAST = ('fast', 'Fast Mode')
+    SAFE = ('safe', 'Safe Mode')
+
+
+class StrEnumCompatTests(unittest.TestCase):
+    def test_str(self):
+        self.assertEqual('red', str(_Color.RED))
+        self.assertEqual('fast', str(_Mode.FAST))
+
+    def test_from_value(self):
+        self.assertIs(_Color.GREEN, _Color.from_value('green'))
+        self.assertIs(_Color('green'), _Color.from_value('green'))
+        with self.assertRaises(ValueError):
+            _Color.from_value('GREEN')
+
+    def test_from_alias(self):
+        self.assertIs(_Color.RED, _Color.from_alias('RED'))
+        self.assertIs(_Color.RED, _Color.from_alias('Rot'))
+        self.assertIs(_Mode.SAFE, _Mode.from_alias('safe mode'))
+        with self.assertRaises(ValueError):
+            _Color.from_alias('blue')
+
+    def test_from_ui_label(self):
+        self.assertIs(_Mode.FAST, _Mode.from_ui_label('Fast Mode'))
+        self.assertIs(_Mode.SAFE, _Mode.from_value('safe'))
+        with self.assertRaises(ValueError):
+            _Mode.from_ui_label('fast')
+
+    def test_members_list(self):
+        self.assertEqual([_Color.RED, _Color.GREEN], _Color.members_list)
+        self.assertEqual([], StrEnum.members_list)  # no leaking between base and subclasses
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -16,17 +16,265 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 #--------------------------------------------------------------------------------
 
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import os
+import re
+from types import MappingProxyType
+from typing import *
+import unittest
+import xml.etree.ElementTree as ET
+
 import pya
 
+from klayout_plugin_utils.debugging import debug, Debugging
+
+
+"""
+Technology facts (grids, DBU, layer names), read once per technology.
+
+Usage example
+-------------
+    info = TechnologyInfoCache.active()   # technology of the active cellview
+    grid_um = info.default_grid_um
+    name = info.layer_names_by_source.get((8, 0), None)
+
+The cache is dropped when the current view, the active cellview
+or a cellview (e.g. its technology) changes, see TechnologyInfoCache.install_hooks().
+"""
+
+
+FALLBACK_GRID_UM = 0.005  # some technologies have no default grid, e.g. GF180mcuD
+
+
+@dataclass(frozen=True)
+class TechnologyInfo:
+    name: str
+    dbu: float
+    default_grid_um: float  # with fallback to FALLBACK_GRID_UM
+    grids_um: Tuple[float, ...] = ()
+    layer_properties_file: str = ''  # effective path, '' if none
+    # NOTE: read-only views, TechnologyInfo is shared by all callers
+    layer_names_by_source: Mapping[Tuple[int, int], str] = field(default_factory=lambda: MappingProxyType({}))  # from the .lyp file
+    layer_sources_by_name: Mapping[str, Tuple[int, int]] = field(default_factory=lambda: MappingProxyType({}))
+
+    @classmethod
+    def from_technology(cls, tech: pya.Technology) -> TechnologyInfo:
+        default_grid = tech.default_grid()
+        # FIXME: there should be a KLayout API method for getting the effective DRC default grid
+        #        for now we just use the default grid list (the entry with !)
+        if default_grid <= 0.00001:
+            default_grid = FALLBACK_GRID_UM
+        grids = tuple(getattr(tech, 'default_grids', ()) or ())  # missing in older KLayout versions
+
+        lyp_path = tech.eff_layer_properties_file() if tech.layer_properties_file else ''
+        names_by_source = {}
+        if lyp_path and os.path.isfile(lyp_path):
+            try:
+                with open(lyp_path, 'r', encoding='utf-8') as f:
+                    names_by_source = parse_layer_properties_sources(f.read())
+            except (OSError, ET.ParseError) as e:
+                if Debugging.DEBUG:
+                    debug(f"TechnologyInfo: failed to read layer properties file {lyp_path}: {e}")
+
+        return TechnologyInfo(name=tech.name,
+                              dbu=tech.dbu,
+                              default_grid_um=default_grid,
+                              grids_um=grids,
+                              layer_properties_file=lyp_path,
+                              layer_names_by_source=MappingProxyType(names_by_source),
+                              layer_sources_by_name=MappingProxyType({n: s for s, n in names_by_source.items()}))
+
+
+# Layer source specification of .lyp files, e.g. "8/0@1", "metal1 8/0@1", "metal1@1", "*/*@*"
+_LYP_SOURCE_PATTERN = re.compile(r"""
+    ^\s*
+    (?:(?P<name>[^\s@/()]+)\s+)?        # optional name
+    \(?\s*(?P<layer>\d+)\s*/\s*(?P<datatype>\d+)\s*\)?
+    (?:@\S*)?                          # optional cellview index
+    \s*$
+""", re.VERBOSE)
+
+
+def parse_layer_properties_sources(lyp_xml: str) -> Dict[Tuple[int, int], str]:
+    """
+    (layer, datatype) → display name of all layer properties (including those nested in groups)
+    with a numeric layer source, the display name falls back to the source name and then to "L/D".
+    """
+    root = ET.fromstring(lyp_xml)
+    result = {}
+    for props in root.iter():
+        if props.tag not in ('properties', 'group-members'):  # group children are stored as group-members
+            continue
+        m = _LYP_SOURCE_PATTERN.match(props.findtext('source', default=''))
+        if m is None:
+            continue
+        key = (int(m.group('layer')), int(m.group('datatype')))
+        if key in result:
+            continue  # first one wins, like in the layer panel
+        name = (props.findtext('name', default='') or '').strip()
+        if name == '':
+            name = m.group('name') or f"{key[0]}/{key[1]}"
+        result[key] = name
+    return result
+
+
+class TechnologyInfoCache:
+    _infos: Dict[str, TechnologyInfo] = {}
+    _active_name: Optional[str] = None
+    _hooked_views: List[pya.LayoutView] = []
+    _hooks_installed = False
+
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def info(cls, technology_name: str) -> Optional[TechnologyInfo]:
+        """
+        None for unknown technologies
+        (NOTE: pya.Technology.technology_by_name() would silently return the default technology)
+        """
+        info = cls._infos.get(technology_name, None)
+        if info is None:
+            if not pya.Technology.has_technology(technology_name):
+                return None
+            tech = pya.Technology.technology_by_name(technology_name)
+            info = TechnologyInfo.from_technology(tech)
+            cls._infos[technology_name] = info
+            if Debugging.DEBUG:
+                debug(f"TechnologyInfoCache: loaded technology '{technology_name}'")
+        return info
+
+    @classmethod
+    def active(cls) -> TechnologyInfo:
+        """
+        Technology of the active cellview.
+        Falls back to the default technology (name '') if there is no cellview,
+        or if its technology is not registered (like KLayout itself does).
+        """
+        if cls._active_name is None:
+            cls.install_hooks()
+            cv = pya.CellView.active()
+            name = cv.technology if cv.is_valid() else ''
+            if not pya.Technology.has_technology(name):
+                name = ''
+            cls._active_name = name
+        return cls.info(cls._active_name)
+
+    @classmethod
+    def invalidate(cls, technology_name: Optional[str] = None):
+        cls._active_name = None
+        if technology_name is None:
+            cls._infos.clear()
+        else:
+            cls._infos.pop(technology_name, None)
+
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def install_hooks(cls):
+        if cls._hooks_installed:
+            return
+        mw = pya.MainWindow.instance()
+        if mw is None:
+            return  # batch mode, call invalidate() when needed
+        cls._hooks_installed = True
+        mw.on_current_view_changed += cls._on_current_view_changed
+        cls._hook_view(mw.current_view())
+
+    @classmethod
+    def _hook_view(cls, view: Optional[pya.LayoutView]):
+        if view is None or any(v is view for v in cls._hooked_views):
+            return
+        # NOTE: on_cellview_changed is also emitted when a cellview's technology changes
+        view.on_active_cellview_changed += cls._on_cellview_changed
+        view.on_cellview_changed += cls._on_cellview_changed
+        view.on_close += lambda: cls._unhook_view(view)
+        cls._hooked_views.append(view)
+
+    @classmethod
+    def _unhook_view(cls, view: pya.LayoutView):
+        cls._hooked_views = [v for v in cls._hooked_views if v is not view]
+        cls.invalidate()
+
+    @classmethod
+    def _on_current_view_changed(cls):
+        cls._hook_view(pya.MainWindow.instance().current_view())
+        cls.invalidate()
+
+    @classmethod
+    def _on_cellview_changed(cls, *args):
+        # NOTE: technology definitions may have been edited as well, drop everything,
+        #       refilling is cheap compared to the per-call lookups this cache replaces
+        cls.invalidate()
+
+
 def drc_tech_grid_um() -> float:
     """
     Return tech grid of current cell view's layout's technology.
     Used for DRC (offgrid errors)
     """
-    cv = pya.CellView.active()
-    default_grid = cv.layout().technology().default_grid()
-    # FIXME: there should be a KLayout API method for getting the effective DRC default grid
-    #        for now we just use the default grid list (the entry with !)
-    if default_grid <= 0.00001:  # some technologies have no default grid, e.g. GF180mcuD
-        default_grid = 0.005  # fallback to 5nm
-    return default_grid
+    return TechnologyInfoCache.active().default_grid_um
+
+
+#--------------------------------------------------------------------------------
+
+class TechHelpersTests(unittest.TestCase):
+    TECH_NAME = 'klayout_plugin_utils_test_tech'
+
+    def setUp(self):
+        self.tech = pya.Technology.create_technology(self.TECH_NAME)
+        self.tech.dbu = 0.005
+        TechnologyInfoCache.invalidate()
+
+    def tearDown(self):
+        pya.Technology.remove_technology(self.TECH_NAME)
+        TechnologyInfoCache.invalidate()
+
+    def test_info(self):
+        info = TechnologyInfoCache.info(self.TECH_NAME)
+        self.assertEqual(self.TECH_NAME, info.name)
+        self.assertEqual(0.005, info.dbu)
+        self.assertEqual(FALLBACK_GRID_UM, info.default_grid_um)  # no default grid configured
+        self.assertEqual({}, dict(info.layer_names_by_source))
+
+    def test_info_is_cached_until_invalidated(self):
+        info = TechnologyInfoCache.info(self.TECH_NAME)
+        self.tech.dbu = 0.001
+        self.assertIs(info, TechnologyInfoCache.info(self.TECH_NAME))
+        TechnologyInfoCache._on_cellview_changed(0)  # e.g. the technology of a cellview was changed
+        self.assertEqual(0.001, TechnologyInfoCache.info(self.TECH_NAME).dbu)
+        self.tech.dbu = 0.002
+        TechnologyInfoCache.invalidate(self.TECH_NAME)
+        self.assertEqual(0.002, TechnologyInfoCache.info(self.TECH_NAME).dbu)
+
+    def test_unknown_technology(self):
+        self.assertIsNone(TechnologyInfoCache.info('klayout_plugin_utils_unknown_tech'))
+        self.assertNotIn('klayout_plugin_utils_unknown_tech', TechnologyInfoCache._infos)
+
+    def test_info_is_read_only(self):
+        info = TechnologyInfoCache.info(self.TECH_NAME)
+        with self.assertRaises(TypeError):
+            info.layer_names_by_source[(1, 0)] = 'metal1'
+
+    def test_parse_layer_properties_sources(self):
+        lyp = """<?xml version="1.0" encoding="utf-8"?>
+<layer-properties>
+ <properties><name>Metal1</name><source>8/0@1</source></properties>
+ <properties><source>via1 9/0@1</source></properties>
+ <properties><source>10/2@1</source></properties>
+ <properties>
+  <name>Group</name><source>*/*@*</source>
+  <group-members><name>Metal2</name><source>11/0@1</source></group-members>
+  <properties><name>Metal3</name><source>metal3 (12/0)@1</source></properties>
+ </properties>
+ <properties><name>Duplicate</name><source>8/0@1</source></properties>
+ <properties><name>NameOnly</name><source>pad@1</source></properties>
+</layer-properties>
+"""
+        self.assertEqual({(8, 0): 'Metal1', (9, 0): 'via1', (10, 2): '10/2', (11, 0): 'Metal2', (12, 0): 'Metal3'},
+                         parse_layer_properties_sources(lyp))
+
+
+if __name__ == "__main__":
+    unittest.main()